@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Chunking Benchmark - Compares character-based and token-aware sizing of LLM requests
+
+Counts the LLM calls needed to analyze each report (chunk analyses + combine) and to
+compare its failures section in a chunked comparison, with the previous character
+limits and with the token budgets, and how many chunks overflow the token budget.
+
+Usage:
+    python benchmark_chunking.py                      # Synthetic plain-text and JSON-heavy reports
+    python benchmark_chunking.py report1.txt report2.txt
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from circuit_langchain_summarizer import (
+    estimate_tokens,
+    extract_summary_and_failures,
+    split_report_into_chunks,
+    split_text_into_chunks,
+    token_budget,
+)
+
+
+# Character limits used before token-aware chunking
+REFERENCE_ANALYSIS_CHARS = 200000
+REFERENCE_COMPARISON_CHUNK_CHARS = 50000
+
+
+def reference_split_by_chars(text, chunk_chars):
+    """The previous line-packing split by characters"""
+    chunks = []
+    current_chunk = []
+    current_size = 0
+    for line in text.split('\n'):
+        line_size = len(line) + 1
+        if current_size + line_size > chunk_chars and current_chunk:
+            chunks.append('\n'.join(current_chunk))
+            current_chunk = [line]
+            current_size = line_size
+        else:
+            current_chunk.append(line)
+            current_size += line_size
+    if current_chunk:
+        chunks.append('\n'.join(current_chunk))
+    return chunks
+
+
+def analysis_calls(num_chunks):
+    """LLM calls for a chunked analysis: one per chunk plus the combine request"""
+    return 1 if num_chunks <= 1 else num_chunks + 1
+
+
+def generate_report(path, num_failures, json_logs, seed=7):
+    """Write a synthetic report in the analyzer's text format"""
+    rng = random.Random(seed)
+    lines = ["=" * 80, "TEST RESULTS SUMMARY REPORT", "=" * 80, "", "OVERALL SUMMARY:", "-" * 80,
+             f"  PASS: {num_failures * 4}", f"  FAIL: {num_failures}", "",
+             f"  Total Tests: {num_failures * 5}", f"  Failed/Error Tests: {num_failures}",
+             "  Pass Rate: 80.0%", "", "FAILURES & ERRORS:", "=" * 80]
+    for i in range(num_failures):
+        if i % 25 == 0:
+            lines += [f"\nSUITE: suite_{i // 25}", "-" * 80]
+        lines += [f"\n  Test: test_vpn_tunnel_{i}", "  Status: FAIL",
+                  "  Failure Message: tunnel did not come up within 120s", "  Detailed Info:"]
+        for _ in range(rng.randint(10, 30)):
+            if json_logs:
+                record = {
+                    "ts": f"2024-05-01T10:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.{rng.randint(0, 999):03d}Z",
+                    "level": rng.choice(["error", "warning"]),
+                    "device": f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                    "session": f"{rng.getrandbits(32):08x}-{rng.getrandbits(16):04x}",
+                    "msg": "error: ike sa negotiation failed",
+                    "counters": [rng.randint(0, 5000) for _ in range(4)],
+                }
+                lines.append(f"    {json.dumps(record)}")
+            else:
+                lines.append(f"    ERROR: IKE SA negotiation with peer failed after {rng.randint(1, 9)} retries, "
+                             f"tunnel state remains DOWN on the device under test")
+        lines.append(f"  Log Link: https://logs.example.com/build/{i}/log.html")
+    path.write_text('\n'.join(lines), encoding='utf-8')
+
+
+def benchmark_report(name, report_content):
+    """Print the call counts and overflows for one report"""
+    analysis_budget = token_budget('analysis')
+    chunk_budget = token_budget('comparison_chunk')
+    _, failures = extract_summary_and_failures(report_content)
+
+    old_analysis = reference_split_by_chars(report_content, REFERENCE_ANALYSIS_CHARS)
+    new_analysis = split_report_into_chunks(report_content)
+    old_compare = reference_split_by_chars(failures, REFERENCE_COMPARISON_CHUNK_CHARS)
+    new_compare = split_text_into_chunks(failures, chunk_budget)
+
+    def overflows(chunks, budget):
+        return sum(1 for chunk in chunks if estimate_tokens(chunk) > budget)
+
+    print(f"\n{name}: {len(report_content):,} characters, ~{estimate_tokens(report_content):,} tokens "
+          f"({len(report_content) / max(1, estimate_tokens(report_content)):.2f} chars/token)")
+    print("-" * 80)
+    print(f"  {'':28s}{'chars':>12s}{'tokens':>12s}")
+    print(f"  {'Analysis calls':28s}{analysis_calls(len(old_analysis)):12d}{analysis_calls(len(new_analysis)):12d}")
+    print(f"  {'  chunks over budget':28s}{overflows(old_analysis, analysis_budget):12d}"
+          f"{overflows(new_analysis, analysis_budget):12d}")
+    print(f"  {'Comparison chunk calls':28s}{len(old_compare):12d}{len(new_compare):12d}")
+    print(f"  {'  chunks over budget':28s}{overflows(old_compare, chunk_budget):12d}"
+          f"{overflows(new_compare, chunk_budget):12d}")
+    return (analysis_calls(len(old_analysis)) + len(old_compare),
+            analysis_calls(len(new_analysis)) + len(new_compare),
+            overflows(old_analysis, analysis_budget) + overflows(old_compare, chunk_budget),
+            overflows(new_analysis, analysis_budget) + overflows(new_compare, chunk_budget))
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Compare character-based and token-aware chunking')
+    parser.add_argument('reports', nargs='*', help='Report files (default: synthetic reports)')
+    parser.add_argument('--failures', type=int, default=2000,
+                        help='Failures per synthetic report (default: 2000)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        reports = [Path(report) for report in args.reports]
+        if not reports:
+            for kind, json_logs in (('plain', False), ('json', True)):
+                path = Path(tmp_dir) / f"synthetic_{kind}_report.txt"
+                generate_report(path, args.failures, json_logs)
+                reports.append(path)
+
+        totals = [0, 0, 0, 0]
+        for report in reports:
+            counts = benchmark_report(report.name, report.read_text(encoding='utf-8'))
+            totals = [total + count for total, count in zip(totals, counts)]
+
+    old_calls, new_calls, old_overflows, new_overflows = totals
+    print(f"\nTotal LLM calls: {old_calls} with character limits ({old_overflows} over the token budget), "
+          f"{new_calls} with token budgets ({new_overflows} over)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
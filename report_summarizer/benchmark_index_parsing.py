@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Index Parsing Benchmark - Times test result extraction from index.html with each parser
+
+Extracts the test results of a synthetic index.html with the lxml streaming parser and
+with html.parser, and checks both produce the same results. Suite headers carry inline
+markup (<b>, <span>, ...) as well as plain text, since both engines must read the same
+suite names from them.
+
+Usage:
+    python benchmark_index_parsing.py                 # 200 suites of 50 tests
+    python benchmark_index_parsing.py --suites 20 --tests 10 --repeat 3
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from test_results_analyzer_full_error import LXML_AVAILABLE, TestResultsAnalyzer
+
+
+# Suite header variants, with and without inline markup
+SUITE_HEADERS = [
+    '<h3>SUITE: {suite}</h3>',
+    '<h3><b>SUITE:</b> {suite}</h3>',
+    '<h3>SUITE: {suite} <span class="tag">nightly</span></h3>',
+    '<h3><span>SUITE: <i>{suite}</i></span></h3>',
+]
+STATUSES = ['PASS', 'PASS', 'PASS', 'FAIL', 'ERROR', 'SKIP']
+
+
+def generate_index(path: Path, num_suites: int, tests_per_suite: int, seed: int = 7):
+    """Write a synthetic index.html in the layout of the test results page"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html>\n<head><title>Test Results</title></head>\n<body>\n')
+        for suite_num in range(num_suites):
+            suite = f"suite_{suite_num}"
+            f.write(SUITE_HEADERS[suite_num % len(SUITE_HEADERS)].format(suite=suite) + '\n')
+            f.write('<table class="test-results">\n<tr><th>Test</th><th>Status</th><th>Message</th></tr>\n')
+            for test_num in range(tests_per_suite):
+                status = rng.choice(STATUSES)
+                message = '' if status in ('PASS', 'SKIP') else f'tunnel <b>{test_num}</b> did not come up'
+                f.write(f'<tr><td><a href="logs/{suite}/test_{test_num}.log">test_{test_num}</a></td>'
+                        f'<td>{status}</td><td>{message}</td></tr>\n')
+            f.write('</table>\n')
+        f.write('</body>\n</html>\n')
+
+
+def extract(index_path: Path, parser: str):
+    """Extract the test results of index.html with the given parser"""
+    analyzer = TestResultsAnalyzer(str(index_path), parser=parser, use_cache=False)
+    if parser == 'html.parser':
+        analyzer.load_html()
+    return list(analyzer.iter_test_results())
+
+
+def time_call(func, repeat: int):
+    """Return (best seconds, result) over repeat runs"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark index.html test result extraction per parser')
+    parser.add_argument('--suites', type=int, default=200, help='Suites in the synthetic page (default: 200)')
+    parser.add_argument('--tests', type=int, default=50, help='Tests per suite (default: 50)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per measurement, best is reported')
+    args = parser.parse_args()
+
+    if not LXML_AVAILABLE:
+        print("lxml is not installed; nothing to compare")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_path = Path(tmp_dir) / 'index.html'
+        generate_index(index_path, args.suites, args.tests)
+
+        soup_time, soup_results = time_call(lambda: extract(index_path, 'html.parser'), args.repeat)
+        lxml_time, lxml_results = time_call(lambda: extract(index_path, 'lxml'), args.repeat)
+
+    identical = soup_results == lxml_results
+    print(f"\nINDEX PAGE ({len(soup_results):,} tests in {args.suites} suites):")
+    print("-" * 80)
+    print(f"  html.parser (full tree):      {soup_time:8.2f}s")
+    print(f"  lxml (streamed):              {lxml_time:8.2f}s  ({soup_time / lxml_time:.1f}x)")
+    print(f"  Identical output:             {identical}")
+    if not identical:
+        for soup_result, lxml_result in zip(soup_results, lxml_results):
+            if soup_result != lxml_result:
+                print(f"  First difference: {soup_result} != {lxml_result}")
+                break
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Log Parsing Benchmark - Times TestResultsAnalyzer log excerpt extraction on synthetic logs
+
+Usage:
+    python benchmark_log_parsing.py              # 100 MB text log, 20 MB HTML log
+    python benchmark_log_parsing.py --size-mb 20 --html-size-mb 5 --repeat 3
+"""
+
+import argparse
+import html
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bs4 import BeautifulSoup
+from test_results_analyzer_full_error import TestResultsAnalyzer
+
+
+# Mostly noise with occasional errors, tracebacks and fallback keywords, like device logs
+NOISE_LINES = [
+    '{"ts": "2024-05-01T10:00:00.000Z", "level": "info", "msg": "polling device state"}',
+    '{"ts": "2024-05-01T10:00:00.250Z", "level": "debug", "msg": "received 1532 bytes from 10.1.2.3"}',
+    '2024-05-01 10:00:01,123 INFO  [worker-3] step 14 completed in 0.42s',
+    '2024-05-01 10:00:01,456 DEBUG [worker-1] session keepalive ok',
+]
+ERROR_BLOCKS = [
+    ['Traceback (most recent call last):', '  File "tests/test_vpn.py", line 88, in test_tunnel',
+     '    assert tunnel.state == "UP"', 'AssertionError: expected UP, got DOWN'],
+    ['2024-05-01 10:00:02,000 ERROR: device not reachable after 3 retries', '  target=10.1.2.3 port=22'],
+    ['Failed: configuration push rejected', '  reason: invalid VLAN id 4097'],
+]
+FALLBACK_LINES = ['warning: cannot resolve hostname, retrying', 'optional file missing, using defaults']
+
+
+def reference_extract_error_details(log_content: str) -> str:
+    """The original per-line implementation (two passes, any() over keywords)"""
+    lines = log_content.split('\n')
+    error_lines = []
+    for idx, line in enumerate(lines):
+        line_lower = line.lower()
+        if any(keyword in line_lower for keyword in ['error:', 'failed:', 'exception:', 'traceback', 'assert']):
+            error_lines.append(line.strip())
+            for j in range(idx + 1, min(idx + 4, len(lines))):
+                next_line = lines[j].strip()
+                if next_line and not any(k in next_line.lower() for k in ['at line', 'file']):
+                    error_lines.append(next_line)
+                if 'at line' in lines[j].lower() or 'traceback' in lines[j].lower():
+                    break
+    if not error_lines:
+        important_keywords = ['failure', 'fail:', 'error', 'invalid', 'cannot', 'not found', 'missing']
+        for line in lines:
+            if any(keyword in line.lower() for keyword in important_keywords):
+                error_lines.append(line.strip())
+    error_lines = [line for line in error_lines if line]
+    error_lines = list(dict.fromkeys(error_lines))
+    return '\n'.join(error_lines) if error_lines else "No specific error details found in log"
+
+
+def reference_html_to_text(log_content: str) -> str:
+    """The original BeautifulSoup conversion of HTML logs"""
+    soup = BeautifulSoup(log_content, 'html.parser')
+    for script in soup(['script', 'style']):
+        script.decompose()
+    return soup.get_text()
+
+
+def generate_log(path: Path, size_mb: int, error_every: int, seed: int = 7):
+    """Write a synthetic plain-text log of roughly size_mb megabytes"""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        line_no = 0
+        while written < target:
+            line_no += 1
+            if line_no % error_every == 0:
+                block = rng.choice(ERROR_BLOCKS)
+            elif line_no % (error_every // 3 or 1) == 0:
+                block = [rng.choice(FALLBACK_LINES)]
+            else:
+                block = [rng.choice(NOISE_LINES)]
+            text = '\n'.join(block) + '\n'
+            f.write(text)
+            written += len(text)
+
+
+def generate_html_log(path: Path, text_log: Path):
+    """Wrap a plain-text log in HTML the way the device log viewer renders it"""
+    with open(text_log, encoding='utf-8') as src, open(path, 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html>\n<head>\n<style>.error { color: red; }</style>\n'
+                '<script>function toggle(id) { /* error: not a log line */ }</script>\n</head>\n<body>\n')
+        for line_no, line in enumerate(src, 1):
+            css = 'error' if 'error' in line.lower() else 'info'
+            f.write(f'<div class="line {css}"><span class="no">{line_no}</span> {html.escape(line.rstrip())}</div>\n')
+            if line_no % 10000 == 0:
+                f.write('<script>highlight();</script>\n')
+        f.write('</body>\n</html>\n')
+
+
+def time_call(func, repeat: int):
+    """Return (best seconds, result) over repeat runs"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark log excerpt extraction on a synthetic log')
+    parser.add_argument('--size-mb', type=int, default=100, help='Size of the synthetic log (default: 100)')
+    parser.add_argument('--html-size-mb', type=int, default=20,
+                        help='Size of the plain-text log wrapped as HTML (default: 20, 0 to skip)')
+    parser.add_argument('--error-every', type=int, default=50000,
+                        help='Insert an error block every N lines (default: 50000)')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per measurement, best is reported')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = Path(tmp_dir) / 'synthetic.log'
+        print(f"Generating {args.size_mb} MB synthetic log...")
+        generate_log(log_path, args.size_mb, args.error_every)
+        log_content = log_path.read_text(encoding='utf-8')
+
+        # No hit limit so the output is comparable with the reference implementation
+        analyzer = TestResultsAnalyzer(str(log_path), use_cache=False, max_error_hits=None)
+
+        def stream_file():
+            with open(log_path, 'rb') as f:
+                return analyzer.extract_error_details_from_stream(f)
+
+        print("\nKEYWORD SCANNER (plain text log):")
+        print("-" * 80)
+        ref_time, ref_result = time_call(lambda: reference_extract_error_details(log_content), args.repeat)
+        new_time, new_result = time_call(lambda: analyzer.extract_error_details(log_content), args.repeat)
+        stream_time, stream_result = time_call(stream_file, args.repeat)
+
+        print(f"  Reference (per-line any()):   {ref_time:8.2f}s")
+        print(f"  Keyword scanner (in memory):  {new_time:8.2f}s  ({ref_time / new_time:.1f}x)")
+        print(f"  Streamed from file:           {stream_time:8.2f}s  ({ref_time / stream_time:.1f}x, includes I/O)")
+        print(f"  Identical output:             {ref_result == new_result == stream_result}")
+
+        if args.html_size_mb:
+            text_path = Path(tmp_dir) / 'synthetic_small.log'
+            html_path = Path(tmp_dir) / 'synthetic.html'
+            print(f"\nGenerating HTML log from a {args.html_size_mb} MB text log...")
+            generate_log(text_path, args.html_size_mb, args.error_every)
+            generate_html_log(html_path, text_path)
+            html_content = html_path.read_text(encoding='utf-8')
+
+            def stream_html():
+                with open(html_path, 'rb') as f:
+                    return analyzer.extract_error_details_from_stream(f)
+
+            print(f"\nHTML LOG ({html_path.stat().st_size / (1024 * 1024):.0f} MB):")
+            print("-" * 80)
+            ref_time, ref_result = time_call(
+                lambda: reference_extract_error_details(reference_html_to_text(html_content)), args.repeat)
+            new_time, new_result = time_call(lambda: analyzer.extract_error_details(html_content), args.repeat)
+            stream_time, stream_result = time_call(stream_html, args.repeat)
+
+            print(f"  Reference (BeautifulSoup):    {ref_time:8.2f}s")
+            print(f"  Tag stripper (in memory):     {new_time:8.2f}s  ({ref_time / new_time:.1f}x)")
+            print(f"  Streamed from file:           {stream_time:8.2f}s  ({ref_time / stream_time:.1f}x, includes I/O)")
+            print(f"  Identical output:             {ref_result == new_result == stream_result}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Remote Log Benchmark - Measures bytes transferred for remote log excerpts over HTTP
+
+Serves a synthetic log from a local http.server twice, once honouring HTTP Range
+requests and once always answering with a plain 200, and extracts its excerpt through
+TestResultsAnalyzer both ways. Checks that the Range server transfers fewer bytes, that
+the plain 200 excerpt matches the one extracted from the local file, and that the cache
+is keyed from the first response without a separate HEAD request.
+
+Usage:
+    python benchmark_remote_logs.py              # 20 MB log
+    python benchmark_remote_logs.py --size-mb 5
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+from collections import Counter
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from test_results_analyzer_full_error import TestResultsAnalyzer
+
+
+NOISE_LINES = [
+    '2024-05-01 10:00:01,123 INFO  [worker-3] step 14 completed in 0.42s',
+    '2024-05-01 10:00:01,456 DEBUG [worker-1] session keepalive ok',
+]
+HEAD_ERRORS = ['2024-05-01 10:00:02,000 ERROR: device not reachable after 3 retries', '  target=10.1.2.3 port=22']
+TAIL_ERRORS = ['Traceback (most recent call last):', '  File "tests/test_vpn.py", line 88, in test_tunnel',
+               '    assert tunnel.state == "UP"', 'AssertionError: expected UP, got DOWN']
+
+
+def generate_log(path: Path, size_mb: int, seed: int = 7):
+    """Write a synthetic log of roughly size_mb megabytes with errors near its start and end"""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        def write(line):
+            nonlocal written
+            f.write(line + '\n')
+            written += len(line) + 1
+
+        for _ in range(200):
+            write(rng.choice(NOISE_LINES))
+        for line in HEAD_ERRORS:
+            write(line)
+        while written < target - 64 * 1024:
+            write(rng.choice(NOISE_LINES))
+        for line in TAIL_ERRORS:
+            write(line)
+        for _ in range(200):
+            write(rng.choice(NOISE_LINES))
+
+
+class LogRequestHandler(SimpleHTTPRequestHandler):
+    """Static file handler that optionally honours single-range Range requests"""
+
+    range_support = True
+    requests_seen = Counter()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.requests_seen['HEAD'] += 1
+        super().do_HEAD()
+
+    def do_GET(self):
+        self.requests_seen['GET'] += 1
+        range_header = self.headers.get('Range', '')
+        if not (self.range_support and range_header.startswith('bytes=')):
+            try:
+                super().do_GET()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Client stopped reading early (e.g. the excerpt was cached)
+            return
+
+        path = Path(self.translate_path(self.path))
+        data = path.read_bytes()
+        start, _, end = range_header[len('bytes='):].partition('-')
+        start = int(start)
+        end = min(int(end), len(data) - 1) if end else len(data) - 1
+        body = data[start:end + 1]
+        self.send_response(206)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Last-Modified', self.date_time_string(int(path.stat().st_mtime)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(directory: Path, range_support: bool):
+    """Start a background HTTP server for directory, returning (server, requests seen, base url)"""
+    handler = type('Handler', (LogRequestHandler,), {'range_support': range_support, 'requests_seen': Counter()})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(handler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, handler.requests_seen, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def extract(analyzer: TestResultsAnalyzer, log_link: str):
+    """Extract one log's excerpt, returning (excerpt, cached)"""
+    error_details, _, cached = analyzer._process_failure_log({'log_link': log_link})
+    return error_details, cached
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark remote log excerpt transfer over HTTP')
+    parser.add_argument('--size-mb', type=int, default=20, help='Size of the synthetic log (default: 20)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        log_path = tmp_path / 'test.log'
+        generate_log(log_path, args.size_mb)
+        index_path = tmp_path / 'index.html'
+
+        local_excerpt, _ = extract(TestResultsAnalyzer(str(index_path), use_cache=False), f"file://{log_path}")
+
+        results = {}
+        for range_support in (True, False):
+            server, requests_seen, base_url = serve(tmp_path, range_support)
+            try:
+                cache_dir = tmp_path / f"cache_{'range' if range_support else 'plain'}"
+                analyzer = TestResultsAnalyzer(str(index_path), use_cache=True, cache_dir=str(cache_dir))
+                excerpt, _ = extract(analyzer, f"{base_url}/test.log")
+                first_requests = dict(requests_seen)
+                cached_excerpt, cached = extract(analyzer, f"{base_url}/test.log")
+                results[range_support] = {
+                    'excerpt': excerpt,
+                    'bytes': analyzer.results['remote_log_bytes'],
+                    'first_requests': first_requests,
+                    'requests': dict(requests_seen),
+                    'cache_hit': cached and cached_excerpt == excerpt,
+                }
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    ranged, plain = results[True], results[False]
+    fewer_bytes = ranged['bytes'] < plain['bytes']
+    plain_matches = plain['excerpt'] == local_excerpt
+    no_head = not any(result['requests'].get('HEAD') for result in results.values())
+    cache_hits = all(result['cache_hit'] for result in results.values())
+
+    print(f"\nREMOTE LOG ({args.size_mb} MB):")
+    print("-" * 80)
+    print(f"  Range server:                 {ranged['bytes']:12,} bytes  requests {ranged['first_requests']}")
+    print(f"  Plain 200 server:             {plain['bytes']:12,} bytes  requests {plain['first_requests']}")
+    print(f"  Fewer bytes with Range:       {fewer_bytes}")
+    print(f"  Range excerpt matches local:  {ranged['excerpt'] == local_excerpt}")
+    print(f"  Identical output (200/local): {plain_matches}")
+    print(f"  No HEAD requests:             {no_head}")
+    print(f"  Cache hit on second fetch:    {cache_hits}")
+    return 0 if fewer_bytes and plain_matches and no_head and cache_hits else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
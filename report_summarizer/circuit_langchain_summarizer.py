@@ -13,13 +13,28 @@ Prerequisites:
 Usage:
     python circuit_langchain_summarizer.py <report_file_path>
     python circuit_langchain_summarizer.py  # Uses default test_report_7499.txt
+    python circuit_langchain_summarizer.py <report_file_path> --no-cache  # Bypass the LLM response cache
 """
 
+import asyncio
 import os
+import re
 import requests
 import json
+import math
+import random
 import sys
 import base64
+import contextvars
+import hashlib
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from itertools import chain
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from langchain_openai import AzureChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage, AIMessage
@@ -33,6 +48,52 @@ os.environ["LANGSMITH_PROJECT"] = "Tutorial3"
 # Configuration
 DEFAULT_REPORT = "test_report_7499.txt"
 
+# Maximum number of report chunks sent to the LLM at the same time
+MAX_CHUNK_CONCURRENCY = max(1, int(os.environ.get("REPORT_MAX_CHUNK_CONCURRENCY", "8")))
+
+# Deployment used when no model is specified
+DEFAULT_MODEL = "gpt-4.1"
+
+# Deployment per pipeline stage, set with REPORT_MODEL_<STAGE> (e.g. REPORT_MODEL_MAP=gpt-4.1-mini)
+# or configure_stage_models(); a stage without one uses the LLM passed in:
+#   map              - per-chunk analyses and failure-chunk comparisons
+#   reduce           - single-request analyses, merging/combining chunk results, direct comparisons
+#   summary_compare  - comparison of the two summary sections in a chunked comparison
+#   chat             - follow-up questions about a report or comparison
+PIPELINE_STAGES = ("map", "reduce", "summary_compare", "chat")
+STAGE_MODELS = {stage: os.environ.get(f"REPORT_MODEL_{stage.upper()}") or None for stage in PIPELINE_STAGES}
+
+# Input token budgets per request, by deployment, leaving room for prompts and the response:
+#   analysis          - one report (or report chunk) sent for analysis / quick summary
+#   comparison        - both reports together for a direct comparison
+#   comparison_chunk  - one failures chunk per build in a chunked comparison
+#   summary           - one summary section in a chunked comparison
+#   combine           - chunk analyses in one combine request (more are merged hierarchically)
+#   chat_context      - report sections retrieved for one chat question (split between the
+#                       reports when chatting about a comparison)
+TOKEN_BUDGETS = {
+    "gpt-4.1": {
+        "analysis": 50000,
+        "comparison": 100000,
+        "comparison_chunk": 12000,
+        "summary": 2500,
+        "combine": 50000,
+        "chat_context": 4000,
+    },
+}
+# Same 1M-token context window as gpt-4.1
+TOKEN_BUDGETS["gpt-4.1-mini"] = TOKEN_BUDGETS["gpt-4.1-nano"] = TOKEN_BUDGETS["gpt-4.1"]
+
+# Content-defined chunking of large reports: a chunk past CHUNK_MIN_FILL of its budget ends
+# before a test whose name hashes to a boundary, about one test in CHUNK_BOUNDARY_DIVISOR
+CHUNK_MIN_FILL = 0.75
+CHUNK_BOUNDARY_DIVISOR = 8
+
+# Tokenizer for sizing requests: a tiktoken encoding when tiktoken is installed and
+# its vocab can be loaded (on offline hosts point TIKTOKEN_CACHE_DIR at a directory
+# holding the vocab file), otherwise a calibrated estimate (see approximate_tokens)
+TOKENIZER_ENCODING = os.environ.get("REPORT_TOKENIZER_ENCODING", "o200k_base")
+
 # Cisco Brain configuration
 CISCO_OPENAI_APP_KEY = 'egai-prd-networking-123120833-summarize-1768589443863'
 CISCO_BRAIN_USER_ID = 'bbizar'
@@ -143,21 +204,24 @@ def test_token_validity(access_token):
         return False
 
 
-def initialize_llm(access_token):
+def initialize_llm(access_token, deployment_name=DEFAULT_MODEL):
     """
     Initialize Azure OpenAI LLM through Cisco's chat-ai.
     
     Args:
         access_token: OAuth2 access token
+        deployment_name: chat-ai deployment to send requests to
         
     Returns:
         AzureChatOpenAI: Initialized LLM instance
     """
     llm = AzureChatOpenAI(
-        deployment_name="gpt-4.1",
+        deployment_name=deployment_name,
         azure_endpoint='https://chat-ai.cisco.com',
         api_key=access_token,
         api_version="2023-08-01-preview",
+        # Retries are handled by the shared RateLimiter, which also counts throttles
+        max_retries=0,
         model_kwargs=dict(
             user=f'{{"appkey": "{CISCO_OPENAI_APP_KEY}", "user": "{CISCO_BRAIN_USER_ID}"}}'
         )
@@ -165,6 +229,895 @@ def initialize_llm(access_token):
     return llm
 
 
+# LLMs for routed stages, by (deployment, access token); created on first use
+_STAGE_LLMS = {}
+_STAGE_LLMS_LOCK = threading.Lock()
+
+# Per-stage request counts and latency, see get_stage_stats
+_STAGE_STATS = {}
+_STAGE_STATS_LOCK = threading.Lock()
+
+
+def configure_stage_models(**deployments):
+    """
+    Route pipeline stages to deployments, e.g. configure_stage_models(map="gpt-4.1-mini").
+    
+    Args:
+        **deployments: Deployment name per stage in PIPELINE_STAGES (None = use the LLM passed in)
+    """
+    unknown = set(deployments) - set(PIPELINE_STAGES)
+    if unknown:
+        raise ValueError(f"Unknown pipeline stage(s): {', '.join(sorted(unknown))}")
+    STAGE_MODELS.update(deployments)
+
+
+def stage_model(llm, stage):
+    """Deployment that serves the stage: the configured one, else the llm's own"""
+    return (STAGE_MODELS.get(stage) if stage else None) or getattr(llm, 'deployment_name', None)
+
+
+def llm_for_stage(llm, stage):
+    """
+    Return the LLM for a pipeline stage.
+    
+    The llm itself when the stage has no deployment configured (or it is the llm's own);
+    otherwise an LLM for the configured deployment with the same access token, reused
+    until the token changes.
+    
+    Args:
+        llm: Initialized AzureChatOpenAI instance
+        stage: Stage name in PIPELINE_STAGES, or None for no routing
+    """
+    deployment = stage_model(llm, stage)
+    if deployment == getattr(llm, 'deployment_name', None):
+        return llm
+    
+    api_key = getattr(llm, 'openai_api_key', None)
+    if api_key is None:
+        # Not an AzureChatOpenAI; nothing to derive a routed instance from
+        return llm
+    access_token = api_key.get_secret_value() if hasattr(api_key, 'get_secret_value') else api_key
+    
+    with _STAGE_LLMS_LOCK:
+        key = (deployment, access_token)
+        if key not in _STAGE_LLMS:
+            # Instances with an older (expired) token are no longer used
+            for stale in [k for k in _STAGE_LLMS if k[1] != access_token]:
+                del _STAGE_LLMS[stale]
+            _STAGE_LLMS[key] = initialize_llm(access_token, deployment)
+        return _STAGE_LLMS[key]
+
+
+def record_stage_latency(stage, llm, seconds, cached=False):
+    """Count one request of a stage; seconds include rate limiting and retries"""
+    with _STAGE_STATS_LOCK:
+        stats = _STAGE_STATS.setdefault(stage or 'other', {
+            'deployments': set(), 'requests': 0, 'cached': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+        if cached:
+            stats['cached'] += 1
+            return
+        stats['deployments'].add(getattr(llm, 'deployment_name', None) or 'unknown')
+        stats['requests'] += 1
+        stats['seconds'] += seconds
+        stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+
+def get_stage_stats():
+    """
+    Return request counts and latency per pipeline stage since the last reset.
+    
+    Returns:
+        dict: {stage: {'deployments', 'requests', 'cached', 'seconds', 'avg_seconds', 'max_seconds'}},
+              where requests excludes cached responses and seconds is the total of their latency
+    """
+    with _STAGE_STATS_LOCK:
+        return {
+            stage: {
+                'deployments': sorted(stats['deployments']),
+                'requests': stats['requests'],
+                'cached': stats['cached'],
+                'seconds': round(stats['seconds'], 2),
+                'avg_seconds': round(stats['seconds'] / stats['requests'], 2) if stats['requests'] else 0.0,
+                'max_seconds': round(stats['max_seconds'], 2)
+            }
+            for stage, stats in _STAGE_STATS.items()
+        }
+
+
+def reset_stage_stats():
+    """Clear the per-stage counters"""
+    with _STAGE_STATS_LOCK:
+        _STAGE_STATS.clear()
+
+
+# Pre-tokenizer pieces modelled on the cl100k/o200k split: words with one leading
+# non-word character, numbers in groups of up to 3 digits, punctuation runs, whitespace
+_TOKEN_PIECE_PATTERN = re.compile(r"[^\r\n\w]?[^\W\d_]+|\d{1,3}| ?[^\s\w]+[\r\n]*|\s*[\r\n]|\s+(?!\S)|\s")
+_LONG_WORD_PATTERN = re.compile(r"[^\W\d_]{9,}")
+_PUNCTUATION_RUN_PATTERN = re.compile(r"[^\s\w]{3,}")
+
+_token_counter = None
+
+
+def approximate_tokens(text):
+    """
+    Estimate the number of tokens in text without a tokenizer.
+    
+    Counts pre-tokenizer pieces, plus extra tokens for long words and punctuation
+    runs. Calibrated against tiktoken on reports, JSON and plain logs, prose and
+    code (within ~5%), where a flat 4 chars/token undercounts JSON-heavy logs by 2x.
+    """
+    tokens = len(_TOKEN_PIECE_PATTERN.findall(text))
+    tokens += sum((len(word) - 2) // 7 for word in _LONG_WORD_PATTERN.findall(text))
+    for run in _PUNCTUATION_RUN_PATTERN.findall(text):
+        # Separator lines like '=====' are few tokens, mixed punctuation about 2 chars each
+        tokens += (len(run) - 1) // 64 if len(set(run)) == 1 else (len(run) - 1) // 2
+    return tokens
+
+
+def set_token_counter(counter):
+    """
+    Set the function used to count tokens when sizing requests.
+    
+    Args:
+        counter: Function taking a string and returning its token count
+                 (None to go back to the default tiktoken/estimate selection)
+    """
+    global _token_counter
+    _token_counter = counter
+
+
+def get_token_counter():
+    """Return the token counter, loading the tiktoken encoding on first use if available"""
+    global _token_counter
+    if _token_counter is None:
+        try:
+            import tiktoken
+            encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+            _token_counter = lambda text: len(encoding.encode(text, disallowed_special=()))
+            print(f"[Token counting with tiktoken ({TOKENIZER_ENCODING})]")
+        except Exception as e:
+            print(f"[tiktoken not available ({type(e).__name__}), using calibrated token estimate]")
+            _token_counter = approximate_tokens
+    return _token_counter
+
+
+def estimate_tokens(text):
+    """Count the tokens in text with the configured token counter"""
+    return get_token_counter()(text) if text else 0
+
+
+def token_budget(kind, llm=None, stage=None):
+    """
+    Input token budget of one request of the given kind for the llm's deployment.
+    
+    Args:
+        kind: Budget name in TOKEN_BUDGETS ('analysis', 'comparison', ...)
+        llm: LLM instance whose deployment selects the budgets (default: DEFAULT_MODEL)
+        stage: Pipeline stage the request is sent to; its routed deployment selects the budgets
+    """
+    model = stage_model(llm, stage) or getattr(llm, 'model_name', None)
+    budgets = TOKEN_BUDGETS.get(model) or TOKEN_BUDGETS[DEFAULT_MODEL]
+    return budgets[kind]
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to at most max_tokens tokens, marking it as truncated"""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    while tokens > max_tokens:
+        # Proportional cut, repeated if the token density of the kept part is higher
+        text = text[:int(len(text) * max_tokens / tokens)]
+        tokens = estimate_tokens(text)
+    return text + "\n... (truncated)"
+
+
+def pack_lines_by_tokens(lines, max_tokens, reserved_tokens=0, boundary=None):
+    """
+    Pack lines into chunks of at most max_tokens tokens each, splitting lines that
+    are too long on their own.
+    
+    With a boundary function, a chunk that is at least CHUNK_MIN_FILL full also ends
+    before any line for which boundary(line) is true. Boundaries chosen from content
+    rather than position keep most chunks identical when an earlier part changes.
+    
+    Args:
+        lines: List of text lines
+        max_tokens: Token budget per chunk
+        reserved_tokens: Tokens of each chunk already used by shared content (e.g. a summary)
+        boundary: Optional function returning True for lines a chunk may end before
+        
+    Returns:
+        list: Chunks as lists of lines
+    """
+    available = max(1, max_tokens - reserved_tokens)
+    min_fill = available * CHUNK_MIN_FILL
+    chunks = []
+    current_chunk = []
+    current_tokens = 0
+    
+    for line in lines:
+        line_tokens = estimate_tokens(line) + 1  # +1 for newline
+        
+        if boundary and current_tokens >= min_fill and boundary(line):
+            chunks.append(current_chunk)
+            current_chunk = []
+            current_tokens = 0
+        
+        # Split an oversized line into pieces that each fit into a chunk
+        pieces = [(line, line_tokens)]
+        if line_tokens > available:
+            piece_chars = max(1, int(len(line) * available / line_tokens))
+            pieces = [(line[i:i + piece_chars], estimate_tokens(line[i:i + piece_chars]) + 1)
+                      for i in range(0, len(line), piece_chars)]
+        
+        for piece, piece_tokens in pieces:
+            if current_tokens + piece_tokens > available and current_chunk:
+                chunks.append(current_chunk)
+                current_chunk = []
+                current_tokens = 0
+            current_chunk.append(piece)
+            current_tokens += piece_tokens
+    
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def run_concurrently(func, items, max_concurrency=None, on_result=None):
+    """
+    Call func(item) for each item on a thread pool and return the results in item order.
+    
+    Args:
+        func: Function called with each item (typically wraps an llm.invoke call)
+        items: List of items
+        max_concurrency: Maximum calls in flight (default: MAX_CHUNK_CONCURRENCY)
+        on_result: Optional function called as on_result(index, result, done_count) on the
+                   calling thread as each call finishes, e.g. to report progress
+        
+    Returns:
+        list: Results in the order of items
+    """
+    results = [None] * len(items)
+    if not items:
+        return results
+    
+    workers = max(1, min(max_concurrency or MAX_CHUNK_CONCURRENCY, len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Each call runs in a copy of the caller's context, so settings such as
+        # bypass_llm_cache() carry over to the pool threads
+        futures = {executor.submit(contextvars.copy_context().run, func, item): idx
+                   for idx, item in enumerate(items)}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                idx = futures[future]
+                results[idx] = future.result()
+                if on_result:
+                    on_result(idx, results[idx], done)
+        except Exception:
+            # Don't start the remaining calls if one fails (e.g. expired token)
+            for pending in futures:
+                pending.cancel()
+            raise
+    return results
+
+
+class LLMResponseCache:
+    """Size-bounded on-disk cache of LLM responses, keyed by model, parameters and prompt"""
+    
+    DEFAULT_DIR = Path(os.environ.get('REPORT_ANALYZER_CACHE_DIR',
+                                      Path.home() / '.cache' / 'report_analyzer')) / 'llm_responses'
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    DEFAULT_TTL_SECONDS = int(os.environ.get('REPORT_LLM_CACHE_TTL', 7 * 24 * 3600))
+    
+    # LLM attributes that change the response, included in the key
+    KEY_ATTRIBUTES = ('deployment_name', 'model_name', 'openai_api_version', 'temperature',
+                      'max_tokens', 'top_p', 'n', 'seed', 'model_kwargs')
+    
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, ttl_seconds=DEFAULT_TTL_SECONDS):
+        """
+        Initialize the cache
+        
+        Args:
+            cache_dir: Directory holding cached responses (default: ~/.cache/report_analyzer/llm_responses)
+            max_bytes: Total size above which least recently used entries are evicted
+            ttl_seconds: Age after which a cached response is no longer returned (None = never expires)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else self.DEFAULT_DIR
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._entries())
+    
+    @classmethod
+    def llm_params(cls, llm):
+        """Return the LLM attributes that are part of every key"""
+        return {attr: getattr(llm, attr, None) for attr in cls.KEY_ATTRIBUTES}
+    
+    @classmethod
+    def make_key(cls, llm, messages):
+        """Build the key from the deployment, the sampling parameters and the exact messages"""
+        prompt = [(getattr(message, 'type', type(message).__name__), message.content) for message in messages]
+        raw = json.dumps({'llm': cls.llm_params(llm), 'messages': prompt}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def _path(self, key):
+        return self.cache_dir / key[:2] / key
+    
+    def _entries(self):
+        """List cached entries as (path, size, last_used)"""
+        entries = []
+        for path in self.cache_dir.glob('??/*'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+    
+    def get(self, key):
+        """Return the cached response fields for key, or None on a miss or expired entry"""
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding='utf-8'))
+            if self.ttl_seconds is not None and time.time() - entry['created'] > self.ttl_seconds:
+                size = path.stat().st_size
+                path.unlink()
+                with self._lock:
+                    self._total_bytes -= size
+                    self.expired += 1
+                    self.misses += 1
+                return None
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+    
+    def put(self, key, response):
+        """Store a response, evicting least recently used entries if over the size bound"""
+        path = self._path(key)
+        data = json.dumps({
+            'created': time.time(),
+            'content': response.content,
+            'response_metadata': response.response_metadata,
+            'id': response.id,
+            'usage_metadata': response.usage_metadata
+        }, default=str).encode('utf-8')
+        tmp_path = None
+        try:
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # An overwritten entry no longer counts towards the size
+            try:
+                replaced_size = path.stat().st_size
+            except FileNotFoundError:
+                replaced_size = 0
+            os.replace(tmp_path, path)
+        except OSError:
+            if tmp_path:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return
+        
+        with self._lock:
+            self._total_bytes += len(data) - replaced_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+    
+    def _evict(self):
+        """Remove least recently used entries until the cache is 10% under its bound"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+    
+    def stats(self):
+        """Return hit/miss/expiry/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'size_bytes': self._total_bytes
+            }
+
+
+class CachedLLMResponse:
+    """A response replayed from LLMResponseCache, with the attributes read from AIMessage"""
+    
+    def __init__(self, entry):
+        self.content = entry['content']
+        self.response_metadata = dict(entry.get('response_metadata') or {}, cached=True)
+        self.id = entry.get('id')
+        self.usage_metadata = entry.get('usage_metadata')
+
+
+# Process-wide response cache, created on first use; set REPORT_LLM_CACHE=0 to bypass it
+_LLM_CACHE = {
+    'enabled': os.environ.get('REPORT_LLM_CACHE', '1').lower() not in ('0', 'false', 'no', 'off'),
+    'cache': None,
+    'options': {}
+}
+_LLM_CACHE_LOCK = threading.Lock()
+# Set inside bypass_llm_cache(): requests of that caller skip the cache
+_LLM_CACHE_BYPASS = contextvars.ContextVar('llm_cache_bypass', default=False)
+
+
+def configure_llm_cache(enabled=True, cache_dir=None, max_bytes=None, ttl_seconds=None):
+    """
+    Enable, disable or relocate the LLM response cache.
+    
+    Args:
+        enabled: False bypasses the cache; responses are neither read nor stored
+        cache_dir: Directory for cached responses (default: LLMResponseCache.DEFAULT_DIR)
+        max_bytes: Size bound of the cache (default: LLMResponseCache.DEFAULT_MAX_BYTES)
+        ttl_seconds: Age after which cached responses expire (default: LLMResponseCache.DEFAULT_TTL_SECONDS)
+    """
+    options = {'cache_dir': cache_dir, 'max_bytes': max_bytes, 'ttl_seconds': ttl_seconds}
+    with _LLM_CACHE_LOCK:
+        _LLM_CACHE['enabled'] = enabled
+        _LLM_CACHE['options'] = {name: value for name, value in options.items() if value is not None}
+        _LLM_CACHE['cache'] = None
+
+
+@contextmanager
+def bypass_llm_cache():
+    """
+    Bypass the LLM response cache for the requests made inside the with block.
+    
+    Unlike configure_llm_cache(enabled=False), this only affects the current thread
+    or async task (and the chunk requests it fans out), so other callers in the
+    process keep using the cache.
+    """
+    token = _LLM_CACHE_BYPASS.set(True)
+    try:
+        yield
+    finally:
+        _LLM_CACHE_BYPASS.reset(token)
+
+
+def get_llm_cache():
+    """Return the LLM response cache, or None if it is disabled, bypassed or can't be created"""
+    if _LLM_CACHE_BYPASS.get():
+        return None
+    with _LLM_CACHE_LOCK:
+        if _LLM_CACHE['enabled'] and _LLM_CACHE['cache'] is None:
+            try:
+                _LLM_CACHE['cache'] = LLMResponseCache(**_LLM_CACHE['options'])
+            except OSError as e:
+                print(f"⚠️  LLM response cache disabled: {e}")
+                _LLM_CACHE['enabled'] = False
+        return _LLM_CACHE['cache'] if _LLM_CACHE['enabled'] else None
+
+
+class RateLimiter:
+    """
+    Client-side rate limiter and retry policy shared by every request to chat-ai.
+    
+    Two token buckets, refilled continuously, bound requests per minute and (estimated)
+    tokens per minute across all threads and event loops. A request reserves its share up
+    front and waits until the buckets cover it, so concurrent chunk analyses are spread out
+    instead of bursting into 429s. Throttled (429) and transient (5xx, timeout, connection)
+    errors are retried with jittered exponential backoff; a Retry-After header is honoured
+    and pauses all callers, and the buckets are emptied so requests resume at the steady rate.
+    """
+    
+    DEFAULT_REQUESTS_PER_MINUTE = int(os.environ.get('REPORT_LLM_RPM', '60'))
+    DEFAULT_TOKENS_PER_MINUTE = int(os.environ.get('REPORT_LLM_TPM', '300000'))
+    DEFAULT_MAX_RETRIES = int(os.environ.get('REPORT_LLM_MAX_RETRIES', '5'))
+    BACKOFF_BASE_SECONDS = 1.0
+    BACKOFF_MAX_SECONDS = 60.0
+    
+    TRANSIENT_STATUS_CODES = (500, 502, 503, 504)
+    TRANSIENT_ERRORS = ('APITimeoutError', 'APIConnectionError', 'Timeout', 'ConnectError', 'ReadTimeout')
+    
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, max_retries=DEFAULT_MAX_RETRIES):
+        """
+        Initialize the limiter
+        
+        Args:
+            requests_per_minute: Request rate limit (0 or None = unlimited)
+            tokens_per_minute: Estimated token rate limit (0 or None = unlimited)
+            max_retries: Retries of a throttled or transient error before it is raised
+        """
+        self.limits = {name: limit for name, limit in (('requests', requests_per_minute),
+                                                       ('tokens', tokens_per_minute)) if limit}
+        self.max_retries = max_retries
+        self._levels = dict(self.limits)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        
+        # Counters
+        self.requests = 0
+        self.throttles = 0
+        self.transient_errors = 0
+        self.retries = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.backoff_seconds = 0.0
+    
+    def _refill(self, now):
+        """Add the capacity accrued since the last update (caller holds the lock)"""
+        elapsed = now - self._updated
+        self._updated = now
+        for name, limit in self.limits.items():
+            self._levels[name] = min(limit, self._levels[name] + elapsed * limit / 60)
+    
+    def reserve(self, tokens=0):
+        """
+        Reserve one request and its tokens.
+        
+        Args:
+            tokens: Estimated tokens of the request (capped at the per-minute limit so
+                    an oversized request waits for a full bucket instead of forever)
+            
+        Returns:
+            float: Seconds the caller must wait before sending the request
+        """
+        amounts = {'requests': 1, 'tokens': tokens}
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            delay = max(0.0, self._paused_until - now)
+            for name, limit in self.limits.items():
+                self._levels[name] -= min(amounts[name], limit)
+                if self._levels[name] < 0:
+                    delay = max(delay, -self._levels[name] * 60 / limit)
+            
+            self.requests += 1
+            if delay > 0:
+                self.waits += 1
+                self.wait_seconds += delay
+            return delay
+    
+    @staticmethod
+    def _status_code(error):
+        """HTTP status of an openai/httpx error, or None"""
+        status = getattr(error, 'status_code', None)
+        if status is None:
+            status = getattr(getattr(error, 'response', None), 'status_code', None)
+        return status if isinstance(status, int) else None
+    
+    @staticmethod
+    def retry_after(error):
+        """Seconds from the Retry-After (or retry-after-ms) header of an error response, or None"""
+        headers = getattr(getattr(error, 'response', None), 'headers', None)
+        if not headers:
+            return None
+        try:
+            if headers.get('retry-after-ms'):
+                return max(0.0, float(headers['retry-after-ms']) / 1000)
+            value = headers.get('retry-after')
+            if not value:
+                return None
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                # HTTP-date form
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    
+    def is_throttle(self, error):
+        """Check if an error is a 429 rate limit response"""
+        return self._status_code(error) == 429 or type(error).__name__ == 'RateLimitError'
+    
+    def is_transient(self, error):
+        """Check if an error is a server error or network failure worth retrying"""
+        if self._status_code(error) in self.TRANSIENT_STATUS_CODES:
+            return True
+        return any(cls.__name__ in self.TRANSIENT_ERRORS for cls in type(error).__mro__)
+    
+    def backoff(self, error, attempt):
+        """
+        Decide whether a failed request is retried, and after how long.
+        
+        Args:
+            error: Exception raised by the request
+            attempt: Number of retries already made for this request
+            
+        Returns:
+            float: Seconds to wait before retrying, or None to raise the error
+        """
+        throttle = self.is_throttle(error)
+        if not throttle and not self.is_transient(error):
+            return None
+        
+        retry_after = self.retry_after(error)
+        with self._lock:
+            if throttle:
+                self.throttles += 1
+            else:
+                self.transient_errors += 1
+            if attempt >= self.max_retries:
+                return None
+            
+            if retry_after is not None:
+                # Small jitter so waiting callers don't all resume at the same instant
+                delay = retry_after + random.uniform(0, min(1.0, retry_after * 0.1 + 0.1))
+            else:
+                # Full jitter over an exponentially growing window
+                delay = random.uniform(0, min(self.BACKOFF_MAX_SECONDS, self.BACKOFF_BASE_SECONDS * 2 ** attempt))
+            
+            if throttle:
+                # The server is over its limit: hold back every caller, and resume at the
+                # steady rate rather than with the burst the full buckets would allow
+                now = time.monotonic()
+                self._refill(now)
+                self._paused_until = max(self._paused_until, now + delay)
+                for name in self.limits:
+                    self._levels[name] = min(self._levels[name], 0.0)
+            
+            self.retries += 1
+            self.backoff_seconds += delay
+            return delay
+    
+    def stats(self):
+        """Return limiter counters"""
+        with self._lock:
+            return {
+                'requests_per_minute': self.limits.get('requests'),
+                'tokens_per_minute': self.limits.get('tokens'),
+                'requests': self.requests,
+                'throttles': self.throttles,
+                'transient_errors': self.transient_errors,
+                'retries': self.retries,
+                'waits': self.waits,
+                'wait_seconds': round(self.wait_seconds, 2),
+                'backoff_seconds': round(self.backoff_seconds, 2)
+            }
+
+
+# Process-wide limiter shared by all requests; REPORT_LLM_RPM / REPORT_LLM_TPM set the limits
+_RATE_LIMITER = RateLimiter()
+
+
+def configure_rate_limit(requests_per_minute=None, tokens_per_minute=None, max_retries=None):
+    """
+    Replace the shared rate limiter (counters start from zero).
+    
+    Args:
+        requests_per_minute: Request rate limit, 0 = unlimited (default: RateLimiter.DEFAULT_REQUESTS_PER_MINUTE)
+        tokens_per_minute: Token rate limit, 0 = unlimited (default: RateLimiter.DEFAULT_TOKENS_PER_MINUTE)
+        max_retries: Retries of throttled/transient errors (default: RateLimiter.DEFAULT_MAX_RETRIES)
+    """
+    global _RATE_LIMITER
+    options = {'requests_per_minute': requests_per_minute, 'tokens_per_minute': tokens_per_minute,
+               'max_retries': max_retries}
+    _RATE_LIMITER = RateLimiter(**{name: value for name, value in options.items() if value is not None})
+
+
+def get_rate_limiter():
+    """Return the shared rate limiter"""
+    return _RATE_LIMITER
+
+
+def request_tokens(llm, messages):
+    """Estimated tokens a request counts against the token rate limit: prompt plus response allowance"""
+    prompt_tokens = sum(estimate_tokens(message.content) for message in messages)
+    return prompt_tokens + (getattr(llm, 'max_tokens', None) or 0)
+
+
+def call_with_backoff(call, tokens=0):
+    """
+    Call call() through the shared rate limiter, retrying throttled and transient errors.
+    
+    Args:
+        call: Function sending one request
+        tokens: Estimated tokens of the request, see request_tokens
+        
+    Returns:
+        The return value of call()
+    """
+    limiter = get_rate_limiter()
+    attempt = 0
+    while True:
+        delay = limiter.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        try:
+            return call()
+        except Exception as e:
+            delay = limiter.backoff(e, attempt)
+            if delay is None:
+                raise
+            print(f"⚠️  LLM request {'throttled' if limiter.is_throttle(e) else 'failed'}, "
+                  f"retrying in {delay:.1f}s ({attempt + 1}/{limiter.max_retries})...")
+            time.sleep(delay)
+            attempt += 1
+
+
+def invoke_llm(llm, messages, stage=None):
+    """
+    Call llm.invoke(messages), returning a cached response for an identical earlier request.
+    Requests sent to the LLM go through the shared rate limiter (see call_with_backoff).
+    
+    A cached response has the same content, response_metadata (plus 'cached': True), id
+    and usage_metadata attributes as the original, so callers build the same result dict.
+    
+    Args:
+        llm: Initialized AzureChatOpenAI instance
+        messages: List of messages for the request
+        stage: Pipeline stage of the request; routes it to the stage's deployment
+               (see llm_for_stage) and counts its latency (see get_stage_stats)
+        
+    Returns:
+        AIMessage or CachedLLMResponse
+    """
+    llm = llm_for_stage(llm, stage)
+    start = time.perf_counter()
+    
+    cache = get_llm_cache()
+    key = cache.make_key(llm, messages) if cache else None
+    entry = cache.get(key) if key else None
+    if entry is not None:
+        response = CachedLLMResponse(entry)
+    else:
+        response = call_with_backoff(lambda: llm.invoke(messages), request_tokens(llm, messages))
+        if key:
+            cache.put(key, response)
+    
+    record_stage_latency(stage, llm, time.perf_counter() - start, cached=entry is not None)
+    return response
+
+
+class LLMStream:
+    """
+    Streams an LLM response as text pieces (built on llm.stream()).
+    
+    Iterate over it to receive the text as it is generated; afterwards, result holds
+    the same dict the blocking functions return (content, metadata, message_id, usage).
+    A cached response is replayed as a single piece, and a finished stream is stored in
+    the response cache like invoke_llm does. If the deployment doesn't report usage for
+    streamed responses, usage is estimated from the prompt and response text and
+    marked 'estimated'.
+    """
+    
+    def __init__(self, llm=None, messages=None, result=None, extra=None, stage=None):
+        """
+        Args:
+            llm: Initialized AzureChatOpenAI instance
+            messages: List of messages for the request
+            result: Result dict that is already available, replayed instead of calling the LLM
+            extra: Additional entries for the result dict (e.g. preprocessing accounting)
+            stage: Pipeline stage of the request, as for invoke_llm
+        """
+        self.llm = llm_for_stage(llm, stage) if llm is not None else None
+        self.stage = stage
+        self.messages = messages
+        self.result = result
+        self.extra = extra or {}
+        # Resolved here rather than on iteration, which may run outside the caller's
+        # bypass_llm_cache() block
+        self.cache = get_llm_cache() if result is None else None
+    
+    def _open_stream(self):
+        """Send the request and wait for the first piece; returns an iterator over all pieces"""
+        pieces = iter(self.llm.stream(self.messages))
+        first = next(pieces, None)
+        return chain([first], pieces) if first is not None else iter(())
+    
+    def __iter__(self):
+        if self.result is not None:
+            if self.result['content']:
+                yield self.result['content']
+            return
+        
+        start = time.perf_counter()
+        cache = self.cache
+        key = cache.make_key(self.llm, self.messages) if cache else None
+        entry = cache.get(key) if key else None
+        if entry is not None:
+            response = CachedLLMResponse(entry)
+            yield response.content
+        else:
+            response = None
+            # Retried through the rate limiter until the first piece arrives; a stream
+            # that fails after that can't be restarted without repeating text
+            for chunk in call_with_backoff(self._open_stream, request_tokens(self.llm, self.messages)):
+                response = chunk if response is None else response + chunk
+                if chunk.content:
+                    yield chunk.content
+            if response is None:
+                raise RuntimeError("LLM returned an empty stream")
+            if not response.usage_metadata:
+                input_tokens = sum(estimate_tokens(message.content) for message in self.messages)
+                output_tokens = estimate_tokens(response.content)
+                response.usage_metadata = {'input_tokens': input_tokens, 'output_tokens': output_tokens,
+                                           'total_tokens': input_tokens + output_tokens, 'estimated': True}
+            if key:
+                cache.put(key, response)
+        record_stage_latency(self.stage, self.llm, time.perf_counter() - start, cached=entry is not None)
+        
+        self.result = {
+            'content': response.content,
+            'metadata': response.response_metadata,
+            'message_id': response.id,
+            'usage': response.usage_metadata,
+            **self.extra
+        }
+
+
+# Volatile values that differ between runs of the same failure, replaced before hashing chunks
+_VOLATILE_PATTERNS = [
+    (re.compile(r"\b\d{4}[-/]\d{2}[-/]\d{2}(?:[T ]\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?"), "<TS>"),
+    (re.compile(r"\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b"), "<TS>"),
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<ID>"),
+    (re.compile(r"\b(?:0x)?(?=[0-9a-fA-F]*\d)(?=[0-9a-fA-F]*[a-fA-F])[0-9a-fA-F]{8,}\b"), "<ID>"),
+    (re.compile(r"\b\d{5,}\b"), "<ID>"),
+    (re.compile(r"\b\d+(?:\.\d+)?\s?(?:ms|s|sec|secs|seconds)\b"), "<DURATION>"),
+]
+_CHUNK_MARKER_PATTERN = re.compile(r"^\[\.\.\.(?:continued from previous|continues in next) chunk\]$", re.MULTILINE)
+
+# Bump when create_chunked_analysis_prompt changes so stale chunk analyses are not reused
+CHUNK_ANALYSIS_VERSION = 1
+
+
+def normalize_volatile_text(text):
+    """Replace timestamps, UUIDs, hex/numeric IDs and durations with placeholders"""
+    for pattern, placeholder in _VOLATILE_PATTERNS:
+        text = pattern.sub(placeholder, text)
+    return text
+
+
+def is_chunk_boundary(line):
+    """True for test header lines whose name hashes to a content-defined chunk boundary"""
+    stripped = line.strip()
+    if not stripped.startswith(('Test:', 'SUITE:')):
+        return False
+    digest = hashlib.md5(normalize_volatile_text(stripped).encode('utf-8')).digest()
+    return digest[0] % CHUNK_BOUNDARY_DIVISOR == 0
+
+
+def strip_shared_prefix(chunks):
+    """Remove the whole lines all chunks start with (e.g. a repeated summary section)"""
+    if len(chunks) < 2:
+        return list(chunks)
+    prefix = os.path.commonprefix(chunks)
+    cut = prefix.rfind('\n') + 1
+    return [chunk[cut:] for chunk in chunks]
+
+
+def chunk_analysis_key(llm, chunk_body):
+    """
+    Build the chunk analysis cache key from the deployment, the sampling parameters and
+    the chunk content with volatile values normalized. The chunk's position is left out,
+    so the same failures analyzed as a different chunk of a later build still match.
+    """
+    normalized = normalize_volatile_text(_CHUNK_MARKER_PATTERN.sub('', chunk_body)).strip()
+    raw = json.dumps({'llm': LLMResponseCache.llm_params(llm), 'chunk': normalized,
+                      'version': CHUNK_ANALYSIS_VERSION}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
 def read_report_file(file_path):
     """
     Read the content of a test report file.
@@ -185,6 +1138,51 @@ def read_report_file(file_path):
         raise Exception(f"Error reading file {file_path}: {e}")
 
 
+def read_structured_report(report_path):
+    """
+    Read the structured report the analyzer writes next to a text report.
+    
+    Looks for the report path itself if it is a .json/.ndjson/.jsonl file, otherwise
+    for a file of the same name with one of those extensions.
+    
+    Args:
+        report_path: Path to the text report (or to the structured report)
+        
+    Returns:
+        dict: Report fields ('summary', 'total_tests', 'failed_tests', ...) with one
+              record per test under 'tests', or None if no structured report exists
+    """
+    report_path = Path(report_path)
+    if report_path.suffix in ('.json', '.ndjson', '.jsonl'):
+        candidates = [report_path]
+    else:
+        candidates = [report_path.with_suffix(suffix) for suffix in ('.json', '.ndjson', '.jsonl')]
+    
+    for path in candidates:
+        if not path.exists():
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if path.suffix == '.json':
+                    return json.load(f)
+                
+                # NDJSON: a report record followed by one record per test
+                report = {'tests': []}
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record.pop('record', None) == 'test':
+                        report['tests'].append(record)
+                    else:
+                        report.update(record)
+                return report
+        except Exception as e:
+            print(f"[Warning: Could not read structured report {path}: {e}]")
+            return None
+    return None
+
+
 def create_analysis_prompt(report_content):
     """
     Create a specialized prompt for analyzing test report failures.
@@ -243,6 +1241,10 @@ Keep FAILED and SKIPPED completely separate to clearly identify whether issues a
     return [system_message, human_message]
 
 
+# Field lines of a test block in the analyzer's report format (indented less than its log excerpt)
+TEST_FIELD_PREFIXES = ('Status:', 'Failure Message:', 'Error:', 'Detailed Info:', 'Log Link:')
+
+
 def condense_report_for_ai(report_content, max_logs_per_test=3):
     """
     Condense a large report by removing verbose logs while keeping essential failure info.
@@ -250,10 +1252,14 @@ def condense_report_for_ai(report_content, max_logs_per_test=3):
     Strategy:
     1. Keep summary section intact
     2. For each test failure:
-       - Keep test name, status, failure message
-       - Keep only first N error/log lines (not all 100+)
+       - Keep test name, status, failure message and log link in place
+       - Keep only first N log excerpt lines (not all 100+)
        - Skip repetitive JSON logs
     
+    Log lines are the lines under a test's "Detailed Info:" and JSON records within a
+    test block; field lines (Status:, Failure Message:, ...) are never treated as logs.
+    Every line stays in its test block, in order.
+    
     This reduces report size by 80-90% while preserving all essential information for AI analysis.
     
     Args:
@@ -263,52 +1269,55 @@ def condense_report_for_ai(report_content, max_logs_per_test=3):
     Returns:
         str: Condensed report content
     """
-    lines = report_content.split('\n')
     output_lines = []
-    
-    in_test_section = False
-    current_test_logs = []
-    logs_count = 0
-    
-    for line in lines:
-        # Check if we're in the failures section
-        if 'FAILURES & ERRORS:' in line or '=== FAILURES ===' in line:
-            in_test_section = True
+    in_failures = False
+    in_test = False
+    in_details = False
+    kept_logs = 0
+    omitted_logs = 0
+    
+    def flush_omitted():
+        nonlocal omitted_logs
+        if omitted_logs:
+            output_lines.append(f"    ... ({omitted_logs} more log lines omitted for brevity)")
+            omitted_logs = 0
+    
+    for line in report_content.split('\n'):
+        stripped = line.strip()
+        if not in_failures:
+            # Keep summary section intact
             output_lines.append(line)
+            in_failures = 'FAILURES & ERRORS:' in line or '=== FAILURES ===' in line
             continue
         
-        # Check if this is a new test
-        if line.strip().startswith('Test:'):
-            # Add previous test's condensed logs
-            if current_test_logs:
-                output_lines.extend(current_test_logs[:max_logs_per_test])
-                if len(current_test_logs) > max_logs_per_test:
-                    output_lines.append(f"    ... ({len(current_test_logs) - max_logs_per_test} more log lines omitted for brevity)")
-                current_test_logs = []
-                logs_count = 0
-            
-            # Start new test
+        # A test, suite or the closing separator ends the current test block
+        if stripped.startswith(('Test:', 'SUITE:')) or line.startswith('='):
+            flush_omitted()
+            in_test = stripped.startswith('Test:')
+            in_details = False
+            kept_logs = 0
             output_lines.append(line)
             continue
         
-        # If we're in a test section and see log lines
-        if in_test_section and ('"ts":' in line or '"level":' in line or 'ERROR' in line or 'FAILURE' in line):
-            # This is a log line - only keep first few
-            current_test_logs.append(line)
-            logs_count += 1
-        elif in_test_section and line.strip().startswith('Status:') or line.strip().startswith('Failure Message:') or line.strip().startswith('Error:'):
-            # Keep status and error messages
+        indent = len(line) - len(line.lstrip())
+        if in_test and indent < 4 and stripped.startswith(TEST_FIELD_PREFIXES):
+            # Keep status, error messages and links
+            flush_omitted()
+            in_details = stripped == 'Detailed Info:'
             output_lines.append(line)
-        elif not in_test_section or (in_test_section and line.strip() and not line.strip().startswith('{')):
-            # Keep summary section and non-log lines
+        elif in_test and stripped and (in_details or stripped.startswith('{')):
+            # This is a log line - only keep first few
+            if kept_logs < max_logs_per_test:
+                output_lines.append(line)
+                kept_logs += 1
+            else:
+                omitted_logs += 1
+        else:
+            flush_omitted()
+            in_details = in_details and bool(stripped)
             output_lines.append(line)
     
-    # Add last test's logs
-    if current_test_logs:
-        output_lines.extend(current_test_logs[:max_logs_per_test])
-        if len(current_test_logs) > max_logs_per_test:
-            output_lines.append(f"    ... ({len(current_test_logs) - max_logs_per_test} more log lines omitted for brevity)")
-    
+    flush_omitted()
     condensed = '\n'.join(output_lines)
     
     # Log the condensing results
@@ -322,7 +1331,175 @@ def condense_report_for_ai(report_content, max_logs_per_test=3):
     return condensed
 
 
-def split_report_into_chunks(report_content, max_chars_per_chunk=200000):
+# Values masked in failure signatures, on top of the volatile values in normalize_volatile_text
+_IP_PATTERN = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}(?::\d+)?\b|\b(?:[0-9a-fA-F]{1,4}:){2,7}[0-9a-fA-F]{1,4}\b")
+_HEX_GROUPS_PATTERN = re.compile(r"(?:<ID>|\b[0-9a-fA-F]{2,})(?:[-:](?:<ID>|[0-9a-fA-F]{2,}\b))+")
+_NUMBER_PATTERN = re.compile(r"\d+")
+
+# First line of the note cluster_report_failures adds, also marks a report as already clustered
+CLUSTER_NOTE_PREFIX = "[Failures grouped by signature:"
+
+
+def failure_signature(text):
+    """Mask IPs, timestamps, UUIDs, IDs and all other numbers so repeats of a failure compare equal"""
+    text = normalize_volatile_text(_IP_PATTERN.sub("<IP>", text))
+    # Dash/colon separated hex identifiers (session IDs, MACs) that aren't full UUIDs
+    text = _HEX_GROUPS_PATTERN.sub(lambda m: "<ID>" if re.search(r"\d|<ID>", m.group()) else m.group(), text)
+    return _NUMBER_PATTERN.sub("<N>", text)
+
+
+def cluster_report_failures(report_content, max_names_per_cluster=20):
+    """
+    Group failed tests with the same failure signature and keep one representative each.
+    
+    A test's signature is the set of distinct lines of its status, failure message and
+    log excerpt with numbers, UUIDs, IPs and timestamps masked (see failure_signature). The first test of each
+    cluster is kept in place with its full details, followed by the cluster size and
+    the names of the other members; the other members' blocks are dropped. Tests with
+    a unique signature are left unchanged.
+    
+    Args:
+        report_content: Report content in the format written by TestResultsAnalyzer
+        max_names_per_cluster: Maximum member names listed under a representative
+        
+    Returns:
+        str: Report content with clustered failures (unchanged if nothing repeats)
+    """
+    if CLUSTER_NOTE_PREFIX in report_content:
+        return report_content
+    
+    header_lines = []
+    footer_lines = []
+    suites = []  # [(suite line or None, [test blocks])]
+    in_failures = False
+    
+    for line in report_content.split('\n'):
+        stripped = line.strip()
+        if not in_failures:
+            header_lines.append(line)
+            in_failures = 'FAILURES & ERRORS:' in line or '=== FAILURES ===' in line
+        elif footer_lines or line.startswith('='):
+            # The separator under the section title, then the closing separator
+            if not suites and header_lines[-1].startswith(('FAILURES', '===')):
+                header_lines.append(line)
+            else:
+                footer_lines.append(line)
+        elif stripped.startswith('SUITE:'):
+            suites.append((line, []))
+        elif stripped.startswith('Test:'):
+            if not suites:
+                suites.append((None, []))
+            suites[-1][1].append([line])
+        elif suites and suites[-1][1] and stripped:
+            suites[-1][1][-1].append(line)
+        elif stripped and not set(stripped) <= {'-'}:
+            # Text outside any test block, kept with the section header
+            header_lines.append(line)
+    
+    # Group tests by signature, in order of first appearance
+    clusters = {}
+    for suite_line, blocks in suites:
+        suite_name = suite_line.strip()[len('SUITE:'):].strip() if suite_line else None
+        for block in blocks:
+            # Distinct masked lines, so excerpts repeating the same lines a different
+            # number of times or in a different order still match
+            signature = tuple(sorted({failure_signature(line.strip()) for line in block[1:]
+                                      if not line.strip().startswith('Log Link:')}))
+            clusters.setdefault(signature, []).append((suite_name, block))
+    
+    num_tests = sum(len(members) for members in clusters.values())
+    if len(clusters) == num_tests:
+        return report_content
+    
+    representatives = {}
+    for members in clusters.values():
+        rep_suite, rep_block = members[0]
+        others = [block[0].strip()[len('Test:'):].strip() + (f" [{suite}]" if suite != rep_suite else "")
+                  for suite, block in members[1:]]
+        extra = []
+        if others:
+            listed = others[:max_names_per_cluster]
+            more = f" ... and {len(others) - len(listed)} more" if len(others) > len(listed) else ""
+            extra = [f"  Same failure signature: {len(members)} tests",
+                     f"  Also failing: {', '.join(listed)}{more}"]
+        representatives[id(rep_block)] = rep_block + extra
+    
+    output_lines = list(header_lines)
+    output_lines.append(f"{CLUSTER_NOTE_PREFIX} {num_tests} failed tests in {len(clusters)} clusters, "
+                        f"one representative test shown per cluster]")
+    for suite_line, blocks in suites:
+        kept = [representatives[id(block)] for block in blocks if id(block) in representatives]
+        if not kept:
+            continue
+        if suite_line is not None:
+            output_lines += ['', suite_line, '-' * 80]
+        for block in kept:
+            output_lines.append('')
+            output_lines.extend(block)
+    if footer_lines:
+        output_lines.append('')
+    output_lines.extend(footer_lines)
+    
+    clustered = '\n'.join(output_lines)
+    print(f"[Failures clustered: {num_tests} tests → {len(clusters)} signatures, "
+          f"{len(report_content):,} → {len(clustered):,} chars]")
+    return clustered
+
+
+# Preprocessing applied to a report before analysis / quick summary, in order; configure with
+# REPORT_PREPROCESS_STAGES (comma-separated stage names, or "none")
+PREPROCESS_STAGES = {
+    'cluster': cluster_report_failures,
+    'condense': condense_report_for_ai,
+}
+_preprocess_env = os.environ.get("REPORT_PREPROCESS_STAGES", "cluster,condense").strip().lower()
+DEFAULT_PREPROCESS = () if _preprocess_env in ("", "none") else tuple(
+    stage.strip() for stage in _preprocess_env.split(",") if stage.strip())
+
+
+def preprocess_report(report_content, stages=None, callback=None):
+    """
+    Run the report through the preprocessing stages, recording its size after each one.
+    
+    Args:
+        report_content: Report content
+        stages: Stage names from PREPROCESS_STAGES, in order (default: DEFAULT_PREPROCESS)
+        callback: Optional callback function told about the size reduction
+        
+    Returns:
+        tuple: (processed report content, accounting dict with the input, output and
+                per-stage sizes in bytes and estimated tokens)
+    """
+    stages = DEFAULT_PREPROCESS if stages is None else tuple(stages)
+    unknown = [stage for stage in stages if stage not in PREPROCESS_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown preprocessing stage(s) {unknown}, expected any of {tuple(PREPROCESS_STAGES)}")
+    
+    def measure(stage, text):
+        return {'stage': stage, 'bytes': len(text.encode('utf-8')), 'tokens': estimate_tokens(text)}
+    
+    sizes = [measure('input', report_content)]
+    for stage in stages:
+        report_content = PREPROCESS_STAGES[stage](report_content)
+        sizes.append(measure(stage, report_content))
+    
+    accounting = {
+        'stages': sizes,
+        'input_bytes': sizes[0]['bytes'],
+        'input_tokens': sizes[0]['tokens'],
+        'output_bytes': sizes[-1]['bytes'],
+        'output_tokens': sizes[-1]['tokens'],
+    }
+    if stages:
+        reduction = (1 - accounting['output_tokens'] / accounting['input_tokens']) * 100 if accounting['input_tokens'] else 0
+        print(f"[Preprocessed report ({' → '.join(stages)}): {accounting['input_bytes']:,} → {accounting['output_bytes']:,} bytes, "
+              f"~{accounting['input_tokens']:,} → ~{accounting['output_tokens']:,} tokens ({reduction:.1f}% reduction)]")
+        if callback and accounting['output_bytes'] < accounting['input_bytes']:
+            callback(f"Preprocessed report: ~{accounting['input_tokens']:,} → ~{accounting['output_tokens']:,} tokens")
+    return report_content, accounting
+
+
+def split_report_into_chunks(report_content, max_tokens_per_chunk=None, llm=None):
     """
     Split a large report into manageable chunks while preserving structure.
     
@@ -336,13 +1513,16 @@ def split_report_into_chunks(report_content, max_chars_per_chunk=200000):
     
     Args:
         report_content: The full report content
-        max_chars_per_chunk: Maximum characters per chunk (~50K tokens)
+        max_tokens_per_chunk: Maximum tokens per chunk (default: the llm's 'analysis' budget)
+        llm: LLM instance whose deployment selects the default budget
         
     Returns:
         list: List of report chunks, or [report_content] if small enough
     """
+    max_tokens = max_tokens_per_chunk or token_budget('analysis', llm)
+    
     # If report is small enough, return as-is
-    if len(report_content) <= max_chars_per_chunk:
+    if estimate_tokens(report_content) <= max_tokens:
         return [report_content]
     
     # Try to split intelligently by finding the failures section
@@ -364,77 +1544,98 @@ def split_report_into_chunks(report_content, max_chars_per_chunk=200000):
     
     summary_text = '\n'.join(summary_lines)
     
-    # If we couldn't find a clear split, do a simple character-based split
+    # If we couldn't find a clear split, pack whole lines up to the token budget
     if not failure_lines:
+        continuation_tokens = estimate_tokens("[...continued from previous chunk]\n\n\n\n[...continues in next chunk]")
+        line_chunks = pack_lines_by_tokens(lines, max_tokens, reserved_tokens=continuation_tokens,
+                                           boundary=is_chunk_boundary)
         chunks = []
-        for i in range(0, len(report_content), max_chars_per_chunk):
-            chunk = report_content[i:i + max_chars_per_chunk]
+        for i, chunk_lines in enumerate(line_chunks):
+            chunk = '\n'.join(chunk_lines)
             if i > 0:
                 chunk = "[...continued from previous chunk]\n\n" + chunk
-            if i + max_chars_per_chunk < len(report_content):
+            if i < len(line_chunks) - 1:
                 chunk = chunk + "\n\n[...continues in next chunk]"
             chunks.append(chunk)
         return chunks
     
     # Split failures into chunks, keeping summary with each
-    chunks = []
-    current_failure_lines = []
-    current_size = len(summary_text)
-    
-    for line in failure_lines:
-        line_size = len(line) + 1  # +1 for newline
-        
-        # If adding this line would exceed the limit, create a chunk
-        if current_size + line_size > max_chars_per_chunk and current_failure_lines:
-            chunk = summary_text + '\n\n' + '\n'.join(current_failure_lines)
-            chunks.append(chunk)
-            current_failure_lines = [line]
-            current_size = len(summary_text) + line_size
-        else:
-            current_failure_lines.append(line)
-            current_size += line_size
-    
-    # Add the last chunk
-    if current_failure_lines:
-        chunk = summary_text + '\n\n' + '\n'.join(current_failure_lines)
-        chunks.append(chunk)
-    
-    return chunks
+    summary_tokens = estimate_tokens(summary_text) + 2  # +2 for the separating newlines
+    return [summary_text + '\n\n' + '\n'.join(chunk_lines)
+            for chunk_lines in pack_lines_by_tokens(failure_lines, max_tokens, reserved_tokens=summary_tokens,
+                                                    boundary=is_chunk_boundary)]
 
 
-def analyze_report_chunks(llm, report_chunks, callback=None):
+def analyze_report_chunks(llm, report_chunks, callback=None, max_concurrency=None):
     """
     Analyze a report that has been split into multiple chunks.
     
+    Chunks are analyzed concurrently (map phase), then the chunk analyses are
+    combined in a single request (reduce phase). Chunk analyses are cached under a
+    hash of the chunk with timestamps and IDs normalized (and without the summary
+    all chunks share), so re-analyzing a build, or a near-identical next build,
+    only sends the chunks that changed.
+    
     Args:
         llm: Initialized AzureChatOpenAI instance
         report_chunks: List of report chunks
-        callback: Optional callback function for progress updates
+        callback: Optional callback function for progress updates (called as chunks finish)
+        max_concurrency: Maximum chunks analyzed at once (default: MAX_CHUNK_CONCURRENCY)
         
     Returns:
         dict: Combined analysis results
     """
     if len(report_chunks) == 1:
-        # Single chunk, analyze normally
-        return analyze_report(llm, report_chunks[0])
+        # Single chunk, analyze normally (chunks are already preprocessed)
+        return analyze_report(llm, report_chunks[0], preprocess=())
+    
+    total_chunks = len(report_chunks)
+    workers = max(1, min(max_concurrency or MAX_CHUNK_CONCURRENCY, total_chunks))
     
-    msg = f"Large report detected: Analyzing in {len(report_chunks)} chunks..."
+    msg = f"Large report detected: Analyzing {total_chunks} chunks ({workers} at a time)..."
     print(f"\n[{msg}]")
     if callback:
         callback(msg)
     
-    # Analyze each chunk
-    chunk_analyses = []
-    for i, chunk in enumerate(report_chunks, 1):
-        msg = f"Analyzing chunk {i}/{len(report_chunks)} (this may take 15-30 seconds per chunk)..."
+    cache = get_llm_cache()
+    chunk_bodies = strip_shared_prefix(report_chunks)
+    map_llm = llm_for_stage(llm, 'map')
+    
+    def analyze_chunk(numbered_chunk):
+        chunk_num, chunk = numbered_chunk
+        start = time.perf_counter()
+        key = chunk_analysis_key(map_llm, chunk_bodies[chunk_num - 1]) if cache else None
+        entry = cache.get(key) if key else None
+        if entry is not None:
+            record_stage_latency('map', map_llm, 0, cached=True)
+            return entry['content'], True
+        
+        # Create a prompt that knows this is part of a larger report
+        messages = create_chunked_analysis_prompt(chunk, chunk_num, total_chunks)
+        response = call_with_backoff(lambda: map_llm.invoke(messages), request_tokens(map_llm, messages))
+        if key:
+            cache.put(key, response)
+        record_stage_latency('map', map_llm, time.perf_counter() - start)
+        return response.content, False
+    
+    def chunk_done(idx, result, done):
+        state = "Reused cached analysis of" if result[1] else "Analyzed"
+        msg = f"{state} chunk {idx + 1}/{total_chunks} ({done}/{total_chunks} done)"
+        print(f"[{msg}]")
+        if callback:
+            callback(msg)
+    
+    # Results come back in report order, so the combined analysis sees them in sequence
+    results = run_concurrently(analyze_chunk, list(enumerate(report_chunks, 1)),
+                               max_concurrency=workers, on_result=chunk_done)
+    chunk_analyses = [analysis for analysis, _ in results]
+    reused_chunks = sum(1 for _, reused in results if reused)
+    
+    if reused_chunks:
+        msg = f"{reused_chunks}/{total_chunks} chunks unchanged, reused their cached analyses"
         print(f"[{msg}]")
         if callback:
             callback(msg)
-        
-        # Create a prompt that knows this is part of a larger report
-        messages = create_chunked_analysis_prompt(chunk, i, len(report_chunks))
-        response = llm.invoke(messages)
-        chunk_analyses.append(response.content)
     
     # Combine the analyses
     msg = f"Combining {len(chunk_analyses)} chunk analyses into final report..."
@@ -442,7 +1643,9 @@ def analyze_report_chunks(llm, report_chunks, callback=None):
     if callback:
         callback(msg)
     
-    combined_analysis = combine_chunk_analyses(llm, chunk_analyses)
+    combined_analysis = combine_chunk_analyses(llm, chunk_analyses, callback=callback,
+                                               max_concurrency=max_concurrency)
+    combined_analysis['chunks'] = {'total': total_chunks, 'reused': reused_chunks}
     
     return combined_analysis
 
@@ -485,20 +1688,146 @@ Be thorough but focused on this subset of tests.""")
     return [system_message, human_message]
 
 
-def combine_chunk_analyses(llm, chunk_analyses):
+def group_label(labeled_group):
+    """Label for a merged group of analyses, e.g. 'CHUNKS 1-4' from 'CHUNK 1' ... 'CHUNKS 3-4'"""
+    if len(labeled_group) == 1:
+        return labeled_group[0][0]
+    first = labeled_group[0][0].split()[-1].split('-')[0]
+    last = labeled_group[-1][0].split()[-1].split('-')[-1]
+    return f"CHUNKS {first}-{last}"
+
+
+def create_merge_prompt(labeled_analyses):
     """
-    Combine multiple chunk analyses into a coherent final analysis.
+    Create a prompt merging a group of chunk analyses (one tree-reduce step).
     
     Args:
-        llm: Initialized AzureChatOpenAI instance
-        chunk_analyses: List of analysis strings from each chunk
+        labeled_analyses: List of (label, analysis) tuples for consecutive chunks
         
     Returns:
-        dict: Combined analysis results
+        list: List of messages for the LLM
     """
     system_message = SystemMessage(content="""You are an expert test automation engineer.
-You will receive multiple analyses from different parts of a large test report.
-Your role is to:
+You will receive analyses of consecutive parts of a large test report.
+Merge them into ONE analysis of those parts that will later be combined with others:
+1. Add up counts and statistics exactly
+2. Keep every failed and skipped test with its root cause; group tests that share a pattern
+3. Keep FAILED and SKIPPED tests separate
+4. Do not add recommendations yet""")
+    
+    merged_content = "\n\n---CHUNK ANALYSIS SEPARATOR---\n\n".join(
+        [f"{label} ANALYSIS:\n{analysis}" for label, analysis in labeled_analyses]
+    )
+    
+    human_message = HumanMessage(content=f"""Merge these analyses into one analysis of the same report parts:
+
+{merged_content}
+
+Keep the structure: TEST SUMMARY (combined counts), FAILED TESTS, SKIPPED TESTS, PATTERNS.""")
+    
+    return [system_message, human_message]
+
+
+def merge_chunk_analyses(llm, labeled_analyses):
+    """
+    Merge a group of chunk analyses into one intermediate analysis (one tree-reduce step).
+    
+    Args:
+        llm: Initialized AzureChatOpenAI instance
+        labeled_analyses: List of (label, analysis) tuples for consecutive chunks
+        
+    Returns:
+        str: Merged analysis covering all chunks of the group
+    """
+    return invoke_llm(llm, create_merge_prompt(labeled_analyses), stage='reduce').content
+
+
+def plan_merge_level(labeled_analyses, budget):
+    """
+    Group labeled analyses for the next tree-reduce level.
+    
+    Args:
+        labeled_analyses: List of (label, analysis) tuples
+        budget: Input token budget of the final combine request
+        
+    Returns:
+        tuple: (groups of consecutive analyses, fan-in), or None if they already fit the budget
+    """
+    if len(labeled_analyses) <= 1 or sum(estimate_tokens(analysis) for _, analysis in labeled_analyses) <= budget:
+        return None
+    largest = max(estimate_tokens(analysis) for _, analysis in labeled_analyses)
+    fan_in = max(2, budget // max(1, largest))
+    return [labeled_analyses[i:i + fan_in] for i in range(0, len(labeled_analyses), fan_in)], fan_in
+
+
+def combine_chunk_analyses(llm, chunk_analyses, callback=None, max_tokens=None, max_concurrency=None):
+    """
+    Combine multiple chunk analyses into a coherent final analysis.
+    
+    If the analyses together exceed the token budget of one request, they are
+    first merged hierarchically: groups of consecutive analyses are merged in
+    parallel, level by level, until the remainder fits into the final combine
+    request. The fan-in (analyses per group) is sized from the token budget and
+    the largest analysis, with a minimum of 2.
+    
+    Args:
+        llm: Initialized AzureChatOpenAI instance
+        chunk_analyses: List of analysis strings from each chunk
+        callback: Optional callback function for progress updates
+        max_tokens: Input token budget per request (default: the llm's 'combine' budget)
+        max_concurrency: Maximum merge requests in flight (default: MAX_CHUNK_CONCURRENCY)
+        
+    Returns:
+        dict: Combined analysis results
+    """
+    budget = max_tokens or token_budget('combine', llm, stage='reduce')
+    labeled = [(f"CHUNK {i+1}", analysis) for i, analysis in enumerate(chunk_analyses)]
+    
+    level = 0
+    while True:
+        plan = plan_merge_level(labeled, budget)
+        if plan is None:
+            break
+        groups, fan_in = plan
+        level += 1
+        
+        msg = f"Merging {len(labeled)} analyses in {len(groups)} groups of up to {fan_in} (level {level})..."
+        print(f"[{msg}]")
+        if callback:
+            callback(msg)
+        
+        def merge_group(group):
+            if len(group) == 1:
+                return group[0][1]
+            return merge_chunk_analyses(llm, group)
+        
+        merged = run_concurrently(merge_group, groups, max_concurrency=max_concurrency)
+        labeled = [(group_label(group), analysis) for group, analysis in zip(groups, merged)]
+    
+    print("[Sending combined analysis request to Azure OpenAI...]")
+    response = invoke_llm(llm, create_combine_prompt(labeled), stage='reduce')
+    
+    return {
+        'content': response.content,
+        'metadata': response.response_metadata,
+        'message_id': response.id,
+        'usage': response.usage_metadata
+    }
+
+
+def create_combine_prompt(labeled_analyses):
+    """
+    Create the final prompt combining chunk (or merged group) analyses into one analysis.
+    
+    Args:
+        labeled_analyses: List of (label, analysis) tuples
+        
+    Returns:
+        list: List of messages for the LLM
+    """
+    system_message = SystemMessage(content="""You are an expert test automation engineer.
+You will receive multiple analyses from different parts of a large test report.
+Your role is to:
 1. Synthesize them into ONE coherent analysis
 2. Combine counts and statistics
 3. Identify overall patterns across all chunks
@@ -506,7 +1835,7 @@ Your role is to:
 5. Keep FAILED and SKIPPED tests separate""")
     
     combined_content = "\n\n---CHUNK ANALYSIS SEPARATOR---\n\n".join(
-        [f"CHUNK {i+1} ANALYSIS:\n{analysis}" for i, analysis in enumerate(chunk_analyses)]
+        [f"{label} ANALYSIS:\n{analysis}" for label, analysis in labeled_analyses]
     )
     
     human_message = HumanMessage(content=f"""Combine these chunk analyses into ONE comprehensive report:
@@ -522,15 +1851,7 @@ Provide a unified analysis with:
 
 Present as a single coherent analysis, not as separate chunks.""")
     
-    print("[Sending combined analysis request to Azure OpenAI...]")
-    response = llm.invoke([system_message, human_message])
-    
-    return {
-        'content': response.content,
-        'metadata': response.response_metadata,
-        'message_id': response.id,
-        'usage': response.usage_metadata
-    }
+    return [system_message, human_message]
 
 
 def create_quick_summary_prompt(report_content):
@@ -576,33 +1897,50 @@ Keep it concise but clearly separate FAILED from SKIPPED.""")
     return [system_message, human_message]
 
 
-def analyze_report(llm, report_content, callback=None):
+def split_large_report(report_content, report_tokens, max_tokens, callback=None):
+    """Announce that a report will be analyzed in chunks, and split it"""
+    num_chunks = (report_tokens + max_tokens - 1) // max_tokens
+    msg = f"Report size: {len(report_content):,} characters (~{report_tokens:,} tokens) - will analyze in {num_chunks} chunks"
+    print(f"\n[{msg}]")
+    if callback:
+        callback(f"⚠️  Large report detected! {msg}")
+        # Chunks run MAX_CHUNK_CONCURRENCY at a time, plus one combine request
+        rounds = (num_chunks + MAX_CHUNK_CONCURRENCY - 1) // MAX_CHUNK_CONCURRENCY + 1
+        callback(f"⏱️  Estimated time: {rounds * 20}-{rounds * 30} seconds")
+        callback("Please be patient, analyzing all data without loss...")
+    
+    return split_report_into_chunks(report_content, max_tokens_per_chunk=max_tokens)
+
+
+def analyze_report(llm, report_content, callback=None, preprocess=None):
     """
     Send the report to the LLM for detailed analysis.
-    Automatically handles large reports by chunking them (no data loss).
+    The report is preprocessed first (failures clustered by signature, logs condensed;
+    see preprocess_report) and only chunked if it is still over the token budget.
     
     Args:
         llm: Initialized AzureChatOpenAI instance
         report_content: Content of the test report
         callback: Optional callback function for progress updates
+        preprocess: Preprocessing stage names (default: DEFAULT_PREPROCESS, () to send the report as is)
         
     Returns:
-        dict: Analysis results containing content, metadata, and usage info
+        dict: Analysis results containing content, metadata, and usage info, plus
+              'preprocessing' with the report size in bytes and tokens after each stage
     """
-    MAX_SAFE_CHARS = 200000  # ~50K tokens, leaves room for prompts + response
+    report_content, preprocessing = preprocess_report(report_content, preprocess, callback=callback)
+    
+    max_tokens = token_budget('analysis', llm, stage='reduce')  # leaves room for prompts + response
     
     # If report is large, chunk it (preserves all information)
-    if len(report_content) > MAX_SAFE_CHARS:
-        num_chunks = (len(report_content) + MAX_SAFE_CHARS - 1) // MAX_SAFE_CHARS
-        msg = f"Report size: {len(report_content):,} characters - will analyze in {num_chunks} chunks"
-        print(f"\n[{msg}]")
-        if callback:
-            callback(f"⚠️  Large report detected! {msg}")
-            callback(f"⏱️  Estimated time: {num_chunks * 20}-{num_chunks * 30} seconds ({num_chunks * 20 // 60}-{num_chunks * 30 // 60} minutes)")
-            callback("Please be patient, analyzing all data without loss...")
-        
-        chunks = split_report_into_chunks(report_content, max_chars_per_chunk=MAX_SAFE_CHARS)
-        return analyze_report_chunks(llm, chunks, callback=callback)
+    report_tokens = estimate_tokens(report_content)
+    if report_tokens > max_tokens:
+        # Chunks are analyzed by the map stage's deployment
+        chunks = split_large_report(report_content, report_tokens, token_budget('analysis', llm, stage='map'),
+                                    callback)
+        result = analyze_report_chunks(llm, chunks, callback=callback)
+        result['preprocessing'] = preprocessing
+        return result
     
     # Report is small enough, analyze normally
     messages = create_analysis_prompt(report_content)
@@ -610,59 +1948,97 @@ def analyze_report(llm, report_content, callback=None):
     print("\n[Sending to Azure OpenAI for detailed analysis...]")
     if callback:
         callback("Sending to AI for analysis...")
-    response = llm.invoke(messages)
+    response = invoke_llm(llm, messages, stage='reduce')
     
     return {
         'content': response.content,
         'metadata': response.response_metadata,
         'message_id': response.id,
-        'usage': response.usage_metadata
+        'usage': response.usage_metadata,
+        'preprocessing': preprocessing
     }
 
 
-def quick_summarize_report(llm, report_content, callback=None):
+def quick_summarize_report(llm, report_content, callback=None, preprocess=None):
     """
     Send the report to the LLM for quick summarization.
-    Automatically handles large reports by chunking them (no data loss).
+    The report is preprocessed first (failures clustered by signature, logs condensed;
+    see preprocess_report) and only chunked if it is still over the token budget.
     
     Args:
         llm: Initialized AzureChatOpenAI instance
         report_content: Content of the test report
         callback: Optional callback function for progress updates
+        preprocess: Preprocessing stage names (default: DEFAULT_PREPROCESS, () to send the report as is)
         
     Returns:
-        dict: Analysis results containing content, metadata, and usage info
+        dict: Analysis results containing content, metadata, and usage info, plus
+              'preprocessing' with the report size in bytes and tokens after each stage
     """
-    MAX_SAFE_CHARS = 200000
+    report_content, preprocessing = preprocess_report(report_content, preprocess, callback=callback)
+    
+    max_tokens = token_budget('analysis', llm, stage='reduce')
     
     # If report is large, chunk it (preserves all information)
-    if len(report_content) > MAX_SAFE_CHARS:
-        num_chunks = (len(report_content) + MAX_SAFE_CHARS - 1) // MAX_SAFE_CHARS
-        msg = f"Report size: {len(report_content):,} characters - will analyze in {num_chunks} chunks"
-        print(f"\n[{msg}]")
-        if callback:
-            callback(f"⚠️  Large report detected! {msg}")
-            callback(f"⏱️  Estimated time: {num_chunks * 20}-{num_chunks * 30} seconds ({num_chunks * 20 // 60}-{num_chunks * 30 // 60} minutes)")
-            callback("Please be patient, analyzing all data without loss...")
-        
-        chunks = split_report_into_chunks(report_content, max_chars_per_chunk=MAX_SAFE_CHARS)
-        return analyze_report_chunks(llm, chunks, callback=callback)
+    report_tokens = estimate_tokens(report_content)
+    if report_tokens > max_tokens:
+        # Chunks are analyzed by the map stage's deployment
+        chunks = split_large_report(report_content, report_tokens, token_budget('analysis', llm, stage='map'),
+                                    callback)
+        result = analyze_report_chunks(llm, chunks, callback=callback)
+        result['preprocessing'] = preprocessing
+        return result
     
     messages = create_quick_summary_prompt(report_content)
     
     print("\n[Sending to Azure OpenAI for quick summary...]")
     if callback:
         callback("Sending to AI for quick summary...")
-    response = llm.invoke(messages)
+    response = invoke_llm(llm, messages, stage='reduce')
     
     return {
         'content': response.content,
         'metadata': response.response_metadata,
         'message_id': response.id,
-        'usage': response.usage_metadata
+        'usage': response.usage_metadata,
+        'preprocessing': preprocessing
     }
 
 
+def stream_report_analysis(llm, report_content, quick=False, callback=None, preprocess=None):
+    """
+    Streaming variant of analyze_report / quick_summarize_report.
+    
+    A report that fits into one request streams its answer as it is generated. A report
+    that still needs chunking after preprocessing is analyzed chunk by chunk first (with
+    progress reported through callback), and the combined analysis is returned as one piece.
+    
+    Args:
+        llm: Initialized AzureChatOpenAI instance
+        report_content: Content of the test report
+        quick: Use the quick summary prompt instead of the detailed analysis prompt
+        callback: Optional callback function for progress updates
+        preprocess: Preprocessing stage names (default: DEFAULT_PREPROCESS)
+        
+    Returns:
+        LLMStream: Text pieces of the analysis; its result holds the analysis results
+    """
+    report_content, preprocessing = preprocess_report(report_content, preprocess, callback=callback)
+    
+    if estimate_tokens(report_content) > token_budget('analysis', llm, stage='reduce'):
+        analyze = quick_summarize_report if quick else analyze_report
+        result = analyze(llm, report_content, callback=callback, preprocess=())
+        result['preprocessing'] = preprocessing
+        return LLMStream(result=result)
+    
+    messages = create_quick_summary_prompt(report_content) if quick else create_analysis_prompt(report_content)
+    
+    print(f"\n[Streaming {'quick summary' if quick else 'detailed analysis'} from Azure OpenAI...]")
+    if callback:
+        callback(f"Streaming AI {'quick summary' if quick else 'analysis'}...")
+    return LLMStream(llm, messages, extra={'preprocessing': preprocessing}, stage='reduce')
+
+
 def create_comparison_prompt(report1_content, report2_content, build1_name, build2_name):
     """
     Create a specialized prompt for comparing two test reports.
@@ -734,7 +2110,8 @@ Keep FAILED and SKIPPED analysis completely separate to identify whether problem
     return [system_message, human_message]
 
 
-def compare_reports(llm, report1_content, report2_content, build1_name, build2_name, callback=None):
+def compare_reports(llm, report1_content, report2_content, build1_name, build2_name, callback=None,
+                    report1_data=None, report2_data=None):
     """
     Compare two test reports using AI analysis with automatic chunking if needed.
     
@@ -745,30 +2122,29 @@ def compare_reports(llm, report1_content, report2_content, build1_name, build2_n
         build1_name: Name of the first build
         build2_name: Name of the second build
         callback: Optional callback function for progress updates
+        report1_data: Optional structured report of the first build (see read_structured_report)
+        report2_data: Optional structured report of the second build
         
     Returns:
-        dict: Comparison results containing content, metadata, and usage info
+        dict: Comparison results containing content, metadata, and usage info, plus 'diff'
+              with the number of tests per diff category
     """
-    # Estimate token count (rough: 4 chars = 1 token)
-    total_chars = len(report1_content) + len(report2_content)
-    estimated_tokens = total_chars / 4
+    estimated_tokens = estimate_tokens(report1_content) + estimate_tokens(report2_content)
     
-    # Azure OpenAI GPT-4 has 128K context, but we need room for prompt + response
-    # Safe limit: ~100K tokens for input = ~400K characters total
-    MAX_SAFE_CHARS = 400000
-    
-    if total_chars <= MAX_SAFE_CHARS:
+    # The model has a larger context, but we need room for prompt + response
+    if estimated_tokens <= token_budget('comparison', llm, stage='reduce'):
         # Reports are small enough, compare directly
         messages = create_comparison_prompt(report1_content, report2_content, build1_name, build2_name)
         
         print(f"\n[Sending to Azure OpenAI for comparison analysis of {build1_name} vs {build2_name}...]")
-        response = llm.invoke(messages)
+        response = invoke_llm(llm, messages, stage='reduce')
         
         return {
             'content': response.content,
             'metadata': response.response_metadata,
             'message_id': response.id,
-            'usage': response.usage_metadata
+            'usage': response.usage_metadata,
+            'diff': diff_counts(diff_reports(report1_content, report2_content, report1_data, report2_data))
         }
     else:
         # Reports are too large, use chunking strategy
@@ -777,19 +2153,22 @@ def compare_reports(llm, report1_content, report2_content, build1_name, build2_n
         if callback:
             callback(msg)
         
-        return compare_reports_chunked(llm, report1_content, report2_content, build1_name, build2_name, callback)
+        return compare_reports_chunked(llm, report1_content, report2_content, build1_name, build2_name, callback,
+                                       report1_data, report2_data)
 
 
-def compare_reports_chunked(llm, report1_content, report2_content, build1_name, build2_name, callback=None):
+def compare_reports_chunked(llm, report1_content, report2_content, build1_name, build2_name, callback=None,
+                            report1_data=None, report2_data=None):
     """
-    Compare two large test reports using chunking strategy.
+    Compare two large test reports through a test-level diff.
     
     Strategy:
     1. Extract summary sections from both reports (always small)
-    2. Chunk the failures sections from both reports
-    3. Compare summaries first (overview)
-    4. Compare corresponding failure chunks
-    5. Combine all comparisons into final analysis
+    2. Match the failed tests of both builds on (suite, test name) and classify them as
+       new, status changed, resolved or persistent (see diff_test_results)
+    3. Send only the diff, grouped by suite, to the LLM: in one request when it fits,
+       otherwise compare the summaries and each diff chunk concurrently (at most
+       MAX_CHUNK_CONCURRENCY requests in flight), then combine the comparisons
     
     Args:
         llm: Initialized AzureChatOpenAI instance
@@ -798,74 +2177,98 @@ def compare_reports_chunked(llm, report1_content, report2_content, build1_name,
         build1_name: Name of the first build
         build2_name: Name of the second build
         callback: Optional callback function for progress updates
+        report1_data: Optional structured report of the first build; its summary and
+                      tests are used instead of parsing report1_content
+        report2_data: Optional structured report of the second build
         
     Returns:
-        dict: Combined comparison results
+        dict: Comparison results, plus 'diff' with the number of tests per diff category
     """
-    msg = "Step 1/3: Extracting summaries and splitting failures..."
+    report1_summary, report2_summary, diff, diff_chunks = prepare_diff_comparison(
+        llm, report1_content, report2_content, build1_name, build2_name, report1_data, report2_data, callback)
+    
+    if len(diff_chunks) == 1:
+        messages = create_diff_comparison_prompt(report1_summary, report2_summary, diff_chunks[0],
+                                                 build1_name, build2_name)
+        print(f"\n[Sending test diff to Azure OpenAI for comparison of {build1_name} vs {build2_name}...]")
+        response = invoke_llm(llm, messages, stage='reduce')
+        return {
+            'content': response.content,
+            'metadata': response.response_metadata,
+            'message_id': response.id,
+            'usage': response.usage_metadata,
+            'diff': diff_counts(diff)
+        }
+    
+    # The summary comparison and the diff chunk comparisons are independent; run them concurrently
+    def compare(chunk_num):
+        if chunk_num == 0:
+            return compare_summaries(llm, report1_summary, report2_summary, build1_name, build2_name)
+        return compare_diff_chunk(llm, diff_chunks[chunk_num - 1], build1_name, build2_name,
+                                  chunk_num, len(diff_chunks))
+    
+    def comparison_done(idx, comparison, done):
+        task = "summaries" if idx == 0 else f"diff chunk {idx}/{len(diff_chunks)}"
+        msg = f"  Compared {task} ({done}/{len(diff_chunks) + 1} done)..."
+        print(f"[{msg}]")
+        if callback:
+            callback(msg)
+    
+    # The summary comparison goes first, followed by the diff chunks
+    summary_comparison, *chunk_comparisons = run_concurrently(compare, list(range(len(diff_chunks) + 1)),
+                                                              on_result=comparison_done)
+    
+    msg = "Step 3/3: Combining all comparisons into final analysis..."
     print(f"[{msg}]")
     if callback:
         callback(msg)
     
-    # Split each report into summary and failures
-    report1_summary, report1_failures = extract_summary_and_failures(report1_content)
-    report2_summary, report2_failures = extract_summary_and_failures(report2_content)
-    
-    # Chunk the failures sections - use smaller chunks to be safe
-    chunk_size = 50000  # ~12K tokens per chunk (safer for comparison)
-    report1_failure_chunks = split_text_into_chunks(report1_failures, chunk_size)
-    report2_failure_chunks = split_text_into_chunks(report2_failures, chunk_size)
-    
-    print(f"[DEBUG] Report 1 split into {len(report1_failure_chunks)} chunks")
-    print(f"[DEBUG] Report 2 split into {len(report2_failure_chunks)} chunks")
+    # Combine all comparisons
+    final_comparison = combine_chunk_comparisons(llm, summary_comparison, chunk_comparisons, build1_name, build2_name)
+    final_comparison['diff'] = diff_counts(diff)
     
-    num_chunks = max(len(report1_failure_chunks), len(report2_failure_chunks))
+    return final_comparison
+
+
+def prepare_diff_comparison(llm, report1_content, report2_content, build1_name, build2_name,
+                            report1_data=None, report2_data=None, callback=None):
+    """
+    Summaries and test diff of two reports for a chunked comparison (steps 1 and 2 of
+    compare_reports_chunked).
     
-    msg = f"Step 2/3: Comparing {num_chunks} chunk pairs..."
+    Returns:
+        tuple: (report1 summary, report2 summary, diff as returned by diff_test_results,
+                diff text chunks: one if the diff fits into a single comparison request,
+                otherwise chunks of the map stage's comparison_chunk budget split at suites)
+    """
+    msg = "Step 1/3: Extracting summaries and diffing test results..."
     print(f"[{msg}]")
     if callback:
         callback(msg)
     
-    # Compare summaries first (always do this)
-    summary_comparison = compare_summaries(llm, report1_summary, report2_summary, build1_name, build2_name)
+    report1_summary, report1_tests = report_summary_and_tests(report1_content, report1_data)
+    report2_summary, report2_tests = report_summary_and_tests(report2_content, report2_data)
     
-    # Safety: if no chunks found, compare the full failure sections directly
-    if num_chunks == 0 and (report1_failures or report2_failures):
-        print("[DEBUG] No chunks created, comparing full failure sections directly")
-        msg = "Comparing full failure sections (no chunking needed)..."
-        print(f"[{msg}]")
-        if callback:
-            callback(msg)
-        
-        # Compare directly without chunking
-        comparison = compare_failure_chunks(llm, report1_failures, report2_failures, 
-                                           build1_name, build2_name, 1, 1)
-        chunk_comparisons = [comparison]
+    diff = diff_test_results(report1_tests, report2_tests)
+    diff_text = format_test_diff(diff, build1_name, build2_name)
+    diff_tokens = estimate_tokens(diff_text)
+    counts = diff_counts(diff)
+    
+    if diff_tokens <= token_budget('comparison', llm, stage='reduce'):
+        diff_chunks = [diff_text]
     else:
-        # Compare failure chunks
-        chunk_comparisons = []
-        for i in range(num_chunks):
-            chunk1 = report1_failure_chunks[i] if i < len(report1_failure_chunks) else ""
-            chunk2 = report2_failure_chunks[i] if i < len(report2_failure_chunks) else ""
-            
-            if chunk1 or chunk2:  # Skip if both are empty
-                msg = f"  Comparing failure chunk {i+1}/{num_chunks}..."
-                print(f"[{msg}]")
-                if callback:
-                    callback(msg)
-                
-                comparison = compare_failure_chunks(llm, chunk1, chunk2, build1_name, build2_name, i+1, num_chunks)
-                chunk_comparisons.append(comparison)
+        diff_chunks = split_text_into_chunks(diff_text, token_budget('comparison_chunk', llm, stage='map'),
+                                             boundary=lambda line: line.startswith('SUITE:'))
     
-    msg = "Step 3/3: Combining all comparisons into final analysis..."
+    msg = (f"Step 2/3: Test diff: {counts['new']} new, {counts['status_changed']} status changed, "
+           f"{counts['resolved']} resolved, {counts['persistent']} persistent failures "
+           f"({len(report1_content) + len(report2_content):,} → {len(diff_text):,} chars, ~{diff_tokens:,} tokens"
+           f"{f' in {len(diff_chunks)} chunks' if len(diff_chunks) > 1 else ''})")
     print(f"[{msg}]")
     if callback:
         callback(msg)
     
-    # Combine all comparisons
-    final_comparison = combine_chunk_comparisons(llm, summary_comparison, chunk_comparisons, build1_name, build2_name)
-    
-    return final_comparison
+    return report1_summary, report2_summary, diff, diff_chunks
 
 
 def extract_summary_and_failures(report_content):
@@ -887,7 +2290,8 @@ def extract_summary_and_failures(report_content):
         'pass': 0,
         'fail': 0,
         'error': 0,
-        'not_run': 0
+        'not_run': 0,
+        'failed_error': None  # "Failed/Error Tests:" line, already FAIL + ERROR
     }
     
     failure_lines = []
@@ -909,7 +2313,7 @@ def extract_summary_and_failures(report_content):
                     pass
             elif 'Failed/Error Tests:' in line:
                 try:
-                    summary_stats['fail'] = int(line.split(':')[1].strip())
+                    summary_stats['failed_error'] = int(line.split(':')[1].strip())
                 except:
                     pass
             elif 'PASS:' in line:
@@ -934,7 +2338,9 @@ def extract_summary_and_failures(report_content):
     # Create a condensed summary
     total = summary_stats['total']
     passed = summary_stats['pass']
-    failed = summary_stats['fail'] + summary_stats['error']
+    failed = summary_stats['failed_error']
+    if failed is None:
+        failed = summary_stats['fail'] + summary_stats['error']
     
     pass_pct = (passed / total * 100) if total > 0 else 0
     fail_pct = (failed / total * 100) if total > 0 else 0
@@ -947,57 +2353,326 @@ def extract_summary_and_failures(report_content):
     
     failures_text = '\n'.join(failure_lines)
     
-    # Debug: print what we found
-    print(f"[DEBUG] Extracted summary stats: {summary_stats}")
-    print(f"[DEBUG] Found {len(failure_lines)} failure lines")
-    print(f"[DEBUG] Failures section size: {len(failures_text)} characters")
-    
     # Fallback: if we didn't find any failures section, just use the whole report
     # (this handles cases where the format is different or there's a parsing issue)
     if len(failures_text) < 100:  # Too small, probably didn't find it
-        print("[DEBUG] Failures section too small, using entire report as fallback")
         failures_text = report_content
     
     return condensed_summary, failures_text
 
 
-def split_text_into_chunks(text, chunk_size):
-    """Split text into chunks of approximately chunk_size characters."""
-    if len(text) <= chunk_size:
-        return [text] if text else []
+def summary_and_failures_from_structured(report_data):
+    """
+    Build the condensed summary and failures section from a structured report.
     
-    chunks = []
-    lines = text.split('\n')
-    current_chunk = []
-    current_size = 0
+    Same output shape as extract_summary_and_failures, but the counts and the
+    per-test records are read directly instead of being recovered from the text.
     
-    for line in lines:
-        line_size = len(line) + 1  # +1 for newline
+    Args:
+        report_data: Structured report as returned by read_structured_report
         
-        if current_size + line_size > chunk_size and current_chunk:
-            # Save current chunk and start new one
-            chunks.append('\n'.join(current_chunk))
-            current_chunk = [line]
-            current_size = line_size
-        else:
-            current_chunk.append(line)
-            current_size += line_size
+    Returns:
+        tuple: (condensed_summary, failures_text)
+    """
+    total = report_data.get('total_tests', 0)
+    failed = report_data.get('failed_tests', 0)
+    try:
+        passed = int(report_data.get('summary', {}).get('PASS', total - failed))
+    except (TypeError, ValueError):
+        passed = total - failed
     
-    # Add final chunk
-    if current_chunk:
-        chunks.append('\n'.join(current_chunk))
+    pass_pct = (passed / total * 100) if total > 0 else 0
+    fail_pct = (failed / total * 100) if total > 0 else 0
     
-    return chunks
+    condensed_summary = f"""Test Results Summary:
+- Total Tests: {total}
+- Passed: {passed} ({pass_pct:.1f}%)
+- Failed/Error: {failed} ({fail_pct:.1f}%)
+"""
+    
+    # Failures grouped by suite, laid out like the FAILURES & ERRORS section of the text report
+    by_suite = {}
+    for test in report_data.get('tests', []):
+        if test.get('failed'):
+            by_suite.setdefault(test.get('suite') or 'Unknown', []).append(test)
+    
+    failure_lines = ["FAILURES & ERRORS:"] if by_suite else []
+    for suite_name in sorted(by_suite):
+        failure_lines.append(f"\nSUITE: {suite_name}")
+        for test in by_suite[suite_name]:
+            failure_lines.append(f"\n  Test: {test.get('name')}")
+            failure_lines.append(f"  Status: {test.get('status')}")
+            if test.get('failure_message'):
+                failure_lines.append(f"  Failure Message: {test['failure_message']}")
+            if test.get('detailed_info'):
+                failure_lines.append("  Detailed Info:")
+                failure_lines.extend(f"    {line}" for line in test['detailed_info'].split('\n') if line.strip())
+            if test.get('log_link'):
+                failure_lines.append(f"  Log Link: {test['log_link']}")
+    
+    failures_text = '\n'.join(failure_lines)
+    return condensed_summary, failures_text
 
 
-def compare_summaries(llm, summary1, summary2, build1_name, build2_name):
-    """Compare summary sections of two reports."""
+# Test-level diff of two builds, sent to the LLM instead of position-paired failure chunks:
+#   new             - failing in build 2, not failing in build 1
+#   status_changed  - failing in both, with a different status (e.g. FAIL → ERROR)
+#   resolved        - failing in build 1, not failing in build 2
+#   persistent      - failing in both with the same status
+DIFF_CATEGORIES = ('new', 'status_changed', 'resolved', 'persistent')
+
+# Log excerpt lines shown per new or changed failure, and test names listed per group
+DIFF_DETAIL_LINES = 8
+DIFF_MAX_NAMES = 30
+
+
+def report_summary_and_tests(report_content, report_data=None):
+    """
+    Condensed summary and test records of a report, from the structured report when available.
+    
+    Returns:
+        tuple: (condensed summary, test records: all tests of a structured report, or the
+                failed tests parsed from the text report)
+    """
+    if report_data:
+        summary, _ = summary_and_failures_from_structured(report_data)
+        return summary, report_data.get('tests', [])
+    summary, _ = extract_summary_and_failures(report_content)
+    return summary, parse_failure_records(report_content)
+
+
+def diff_reports(report1_content, report2_content, report1_data=None, report2_data=None):
+    """
+    Test-level diff of two reports (see diff_test_results), from their structured
+    reports when available.
+    """
+    _, report1_tests = report_summary_and_tests(report1_content, report1_data)
+    _, report2_tests = report_summary_and_tests(report2_content, report2_data)
+    return diff_test_results(report1_tests, report2_tests)
+
+
+def parse_failure_records(report_content):
+    """
+    Parse the FAILURES & ERRORS section of a text report into per-test records.
+    
+    Args:
+        report_content: Report content in the format written by TestResultsAnalyzer
+        
+    Returns:
+        list: Records with the fields of the structured report ('suite', 'name', 'status',
+              'failure_message', 'detailed_info', 'log_link', 'failed'), one per failed test
+    """
+    records = []
+    suite = None
+    record = None
+    in_failures = False
+    in_details = False
+    
+    for line in report_content.split('\n'):
+        stripped = line.strip()
+        if not in_failures:
+            in_failures = 'FAILURES & ERRORS:' in line or 'FAILURES AND ERRORS:' in line
+            continue
+        
+        if stripped.startswith('SUITE:'):
+            suite = stripped[len('SUITE:'):].strip()
+            record = None
+        elif stripped.startswith('Test:'):
+            record = {'suite': suite, 'name': stripped[len('Test:'):].strip(), 'status': None,
+                      'failure_message': None, 'detailed_info': None, 'log_link': None, 'failed': True}
+            records.append(record)
+            in_details = False
+        elif record is None:
+            continue
+        elif stripped.startswith('Status:') and record['status'] is None:
+            record['status'] = stripped[len('Status:'):].strip()
+        elif stripped.startswith('Failure Message:') and record['failure_message'] is None:
+            record['failure_message'] = stripped[len('Failure Message:'):].strip()
+        elif stripped == 'Detailed Info:':
+            in_details = True
+        elif stripped.startswith('Log Link:'):
+            record['log_link'] = stripped[len('Log Link:'):].strip()
+            in_details = False
+        elif in_details and line.startswith('    ') and stripped:
+            record['detailed_info'] = (record['detailed_info'] + '\n' if record['detailed_info'] else '') + stripped
+    
+    return records
+
+
+def diff_test_results(tests1, tests2):
+    """
+    Classify the failures of two builds by matching tests on (suite, test name).
+    
+    Records come from a structured report (all tests) or from parse_failure_records
+    (failed tests only). A test that fails in one build and has no record in the other
+    counts as new or resolved. Repeated (suite, name) pairs are matched by occurrence.
+    
+    Args:
+        tests1: Test records of build 1
+        tests2: Test records of build 2
+        
+    Returns:
+        dict: {category: [{'suite', 'name', 'before', 'after'}]} for each of DIFF_CATEGORIES,
+              with the build 1 and build 2 records (or None) of each test, sorted by suite and name
+    """
+    def keyed(tests):
+        by_key = {}
+        seen = {}
+        for test in tests:
+            key = (test.get('suite') or 'Unknown', test.get('name') or '')
+            seen[key] = seen.get(key, 0) + 1
+            by_key[key + (seen[key],)] = test
+        return by_key
+    
+    before_tests = keyed(tests1)
+    after_tests = keyed(tests2)
+    
+    diff = {category: [] for category in DIFF_CATEGORIES}
+    for key in sorted(before_tests.keys() | after_tests.keys()):
+        before = before_tests.get(key)
+        after = after_tests.get(key)
+        failed_before = bool(before and before.get('failed'))
+        failed_after = bool(after and after.get('failed'))
+        
+        if failed_before and failed_after:
+            category = 'persistent' if before.get('status') == after.get('status') else 'status_changed'
+        elif failed_after:
+            category = 'new'
+        elif failed_before:
+            category = 'resolved'
+        else:
+            continue
+        diff[category].append({'suite': key[0], 'name': key[1], 'before': before, 'after': after})
+    
+    return diff
+
+
+def diff_counts(diff):
+    """Number of tests per diff category, plus persistent failures whose message changed"""
+    counts = {category: len(diff[category]) for category in DIFF_CATEGORIES}
+    counts['message_changed'] = sum(1 for entry in diff['persistent'] if _failure_message_changed(entry))
+    return counts
+
+
+def _failure_message_changed(entry):
+    """Check if a persistent failure's message differs beyond IDs, numbers and timestamps"""
+    return (failure_signature(entry['before'].get('failure_message') or '')
+            != failure_signature(entry['after'].get('failure_message') or ''))
+
+
+def format_test_diff(diff, build1_name, build2_name, max_detail_lines=DIFF_DETAIL_LINES,
+                     max_names=DIFF_MAX_NAMES):
+    """
+    Render a test diff as text grouped by suite, for the comparison prompt.
+    
+    New and status-changed failures are shown with their failure message and the start
+    of their log excerpt. Resolved tests are grouped by their previous failure, and
+    persistent failures by their failure message, unless it changed.
+    
+    Args:
+        diff: Diff as returned by diff_test_results
+        build1_name: Name of the first build
+        build2_name: Name of the second build
+        max_detail_lines: Log excerpt lines shown per new or status-changed failure
+        max_names: Test names listed per group of resolved or unchanged persistent tests
+        
+    Returns:
+        str: The diff, or a note that no test changed
+    """
+    def message(record):
+        return truncate_to_tokens(record.get('failure_message') or '(no failure message)', 100)
+    
+    def names(group):
+        listed = [entry['name'] for entry in group[:max_names]]
+        more = f" ... and {len(group) - len(listed)} more" if len(group) > len(listed) else ""
+        return f"{', '.join(listed)}{more}"
+    
+    def details(record):
+        lines = (record.get('detailed_info') or '').split('\n')
+        lines = [line for line in lines if line.strip()]
+        shown = [f"      {line}" for line in lines[:max_detail_lines]]
+        if len(lines) > max_detail_lines:
+            shown.append(f"      ... {len(lines) - max_detail_lines} more log lines")
+        return shown
+    
+    by_suite = {}
+    for category in DIFF_CATEGORIES:
+        for entry in diff[category]:
+            by_suite.setdefault(entry['suite'], {name: [] for name in DIFF_CATEGORIES})[category].append(entry)
+    
+    counts = diff_counts(diff)
+    lines = [f"TEST DIFF: {build1_name} → {build2_name} (tests matched by suite and test name)",
+             f"  New failures: {counts['new']} | Status changed: {counts['status_changed']} | "
+             f"Resolved: {counts['resolved']} | Persistent: {counts['persistent']} "
+             f"({counts['message_changed']} with a changed failure message)"]
+    if not by_suite:
+        lines.append("\nNo failing tests in either build.")
+        return '\n'.join(lines)
+    
+    for suite_name in sorted(by_suite):
+        entries = by_suite[suite_name]
+        lines.append(f"\nSUITE: {suite_name}")
+        
+        for entry in entries['new']:
+            after = entry['after']
+            was = f", was {entry['before'].get('status')}" if entry['before'] else ""
+            lines.append(f"  NEW: {entry['name']} [{after.get('status')}{was}] {message(after)}")
+            lines.extend(details(after))
+        
+        for entry in entries['status_changed']:
+            before, after = entry['before'], entry['after']
+            lines.append(f"  STATUS CHANGED: {entry['name']} [{before.get('status')} → {after.get('status')}] "
+                         f"{message(after)}")
+            lines.extend(details(after))
+        
+        # Resolved tests, grouped by their current state and previous failure
+        groups = {}
+        for entry in entries['resolved']:
+            before, after = entry['before'], entry['after']
+            now = f"now {after.get('status')}" if after else f"not failing in {build2_name}"
+            key = (now, before.get('status'), failure_signature(before.get('failure_message') or ''))
+            groups.setdefault(key, []).append(entry)
+        for (now, status, _), group in groups.items():
+            lines.append(f"  RESOLVED ({len(group)}) [{now}, was {status}] {message(group[0]['before'])}: "
+                         f"{names(group)}")
+        
+        unchanged = []
+        for entry in entries['persistent']:
+            if _failure_message_changed(entry):
+                lines.append(f"  PERSISTENT, MESSAGE CHANGED: {entry['name']} [{entry['after'].get('status')}] "
+                             f"was: {message(entry['before'])} | now: {message(entry['after'])}")
+            else:
+                unchanged.append(entry)
+        
+        # Unchanged persistent failures, grouped by status and failure message
+        groups = {}
+        for entry in unchanged:
+            after = entry['after']
+            groups.setdefault((after.get('status'), failure_signature(after.get('failure_message') or '')),
+                              []).append(entry)
+        for (status, _), group in groups.items():
+            lines.append(f"  PERSISTENT ({len(group)}, unchanged) [{status}] {message(group[0]['after'])}: "
+                         f"{names(group)}")
+    
+    return '\n'.join(lines)
+
+
+def split_text_into_chunks(text, max_tokens, boundary=None):
+    """Split text into chunks of whole lines of at most max_tokens tokens (see pack_lines_by_tokens)."""
+    if not text:
+        return []
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    return ['\n'.join(chunk_lines)
+            for chunk_lines in pack_lines_by_tokens(text.split('\n'), max_tokens, boundary=boundary)]
+
+
+def create_summary_comparison_prompt(llm, summary1, summary2, build1_name, build2_name):
+    """Create the prompt comparing summary sections of two reports (truncated to the llm's budget)."""
     # Additional safety: truncate summaries if still too large
-    max_summary_chars = 10000  # ~2.5K tokens per summary
-    if len(summary1) > max_summary_chars:
-        summary1 = summary1[:max_summary_chars] + "\n... (truncated)"
-    if len(summary2) > max_summary_chars:
-        summary2 = summary2[:max_summary_chars] + "\n... (truncated)"
+    max_summary_tokens = token_budget('summary', llm, stage='summary_compare')
+    summary1 = truncate_to_tokens(summary1, max_summary_tokens)
+    summary2 = truncate_to_tokens(summary2, max_summary_tokens)
     
     prompt = f"""Compare the SUMMARY sections of these two test builds:
 
@@ -1014,67 +2689,77 @@ Provide a brief overview comparison focusing on:
 
 Keep it concise (3-5 sentences)."""
 
-    messages = [SystemMessage(content="You are a test automation expert."), HumanMessage(content=prompt)]
-    response = llm.invoke(messages)
+    return [SystemMessage(content="You are a test automation expert."), HumanMessage(content=prompt)]
+
+
+def compare_summaries(llm, summary1, summary2, build1_name, build2_name):
+    """Compare summary sections of two reports."""
+    messages = create_summary_comparison_prompt(llm, summary1, summary2, build1_name, build2_name)
+    response = invoke_llm(llm, messages, stage='summary_compare')
     return response.content
 
 
-def compare_failure_chunks(llm, chunk1, chunk2, build1_name, build2_name, chunk_num, total_chunks):
-    """Compare failure chunks from two reports."""
-    # Safety truncation for individual chunks
-    max_chunk_chars = 45000  # ~11K tokens per chunk, leaves room for prompt
-    if len(chunk1) > max_chunk_chars:
-        chunk1 = chunk1[:max_chunk_chars] + "\n... (truncated)"
-    if len(chunk2) > max_chunk_chars:
-        chunk2 = chunk2[:max_chunk_chars] + "\n... (truncated)"
-    
-    prompt = f"""Compare FAILURE CHUNK {chunk_num} of {total_chunks} from these two test builds:
+def create_diff_comparison_prompt(summary1, summary2, diff_text, build1_name, build2_name):
+    """Create the prompt comparing two builds from their summaries and complete test diff."""
+    prompt = f"""You are analyzing a comparison between two test builds: {build1_name} vs {build2_name}.
 
-BUILD 1 ({build1_name}) FAILURES:
-{chunk1 if chunk1 else "(No failures in this chunk)"}
+The test diff below was computed deterministically by matching tests on suite and test name.
+Its classification (new, status changed, resolved, persistent) is exact; build on it rather
+than re-deriving it. Unchanged persistent failures are listed by name only.
 
-BUILD 2 ({build2_name}) FAILURES:
-{chunk2 if chunk2 else "(No failures in this chunk)"}
+BUILD 1 ({build1_name}) SUMMARY:
+{summary1}
 
-Identify:
-1. Common failures (persistent issues)
-2. New failures in Build 2 (regressions)
-3. Resolved failures in Build 2 (fixes)
-4. Patterns in this chunk
+BUILD 2 ({build2_name}) SUMMARY:
+{summary2}
 
-Be concise and focus on actionable insights."""
+{diff_text}
 
-    messages = [SystemMessage(content="You are a test automation expert."), HumanMessage(content=prompt)]
-    response = llm.invoke(messages)
-    return response.content
+Write a COMPREHENSIVE COMPARISON with:
 
+{COMPARISON_REPORT_SECTIONS}"""
 
-def combine_chunk_comparisons(llm, summary_comparison, chunk_comparisons, build1_name, build2_name):
-    """Combine all chunk comparisons into a final comprehensive comparison."""
-    all_comparisons = f"""SUMMARY COMPARISON:
-{summary_comparison}
+    return [SystemMessage(content="You are a test automation expert creating a comparison report."),
+            HumanMessage(content=prompt)]
 
-FAILURE COMPARISONS:
-"""
-    
-    for i, chunk_comp in enumerate(chunk_comparisons, 1):
-        all_comparisons += f"\n\nChunk {i}:\n{chunk_comp}"
+
+def create_diff_chunk_comparison_prompt(llm, diff_chunk, build1_name, build2_name, chunk_num, total_chunks):
+    """Create the prompt analyzing one chunk of a test diff (truncated to the llm's budget)."""
+    diff_chunk = truncate_to_tokens(diff_chunk, token_budget('comparison_chunk', llm, stage='map'))
     
-    prompt = f"""You are analyzing a comparison between two test builds: {build1_name} vs {build2_name}.
+    prompt = f"""Analyze TEST DIFF CHUNK {chunk_num} of {total_chunks} between these two test builds:
+{build1_name} (Build 1) → {build2_name} (Build 2)
 
-Here are the individual comparison results:
+Tests were matched by suite and test name; the classification is exact.
 
-{all_comparisons}
+{diff_chunk}
 
-Synthesize these into a COMPREHENSIVE FINAL COMPARISON with:
+Identify:
+1. New failures in Build 2 (regressions) and their likely causes
+2. What the resolved failures have in common (fixes)
+3. Status changes and changed failure messages worth attention
+4. Patterns in this chunk
 
-1. OVERVIEW COMPARISON
-   - Overall test count trends
-   - Pass rate changes
-   - Quality direction
+Be concise and focus on actionable insights."""
 
-2. KEY FINDINGS
-   - Most critical failures (persistent or new)
+    return [SystemMessage(content="You are a test automation expert."), HumanMessage(content=prompt)]
+
+
+def compare_diff_chunk(llm, diff_chunk, build1_name, build2_name, chunk_num, total_chunks):
+    """Analyze one chunk of a test diff."""
+    messages = create_diff_chunk_comparison_prompt(llm, diff_chunk, build1_name, build2_name, chunk_num, total_chunks)
+    response = invoke_llm(llm, messages, stage='map')
+    return response.content
+
+
+# Sections of the final comparison report, shared by the single-request and combine prompts
+COMPARISON_REPORT_SECTIONS = """1. OVERVIEW COMPARISON
+   - Overall test count trends
+   - Pass rate changes
+   - Quality direction
+
+2. KEY FINDINGS
+   - Most critical failures (persistent or new)
    - Major improvements (resolved issues)
    - Patterns across all failures
 
@@ -1088,11 +2773,38 @@ Synthesize these into a COMPREHENSIVE FINAL COMPARISON with:
 
 Make it concise but comprehensive, focusing on what matters most."""
 
-    messages = [SystemMessage(content="You are a test automation expert creating a final comparison report."), 
-                HumanMessage(content=prompt)]
+
+def create_final_comparison_prompt(summary_comparison, chunk_comparisons, build1_name, build2_name):
+    """Create the prompt combining all chunk comparisons into a final comparison."""
+    all_comparisons = f"""SUMMARY COMPARISON:
+{summary_comparison}
+
+TEST DIFF COMPARISONS:
+"""
+    
+    for i, chunk_comp in enumerate(chunk_comparisons, 1):
+        all_comparisons += f"\n\nChunk {i}:\n{chunk_comp}"
+    
+    prompt = f"""You are analyzing a comparison between two test builds: {build1_name} vs {build2_name}.
+
+Here are the individual comparison results:
+
+{all_comparisons}
+
+Synthesize these into a COMPREHENSIVE FINAL COMPARISON with:
+
+{COMPARISON_REPORT_SECTIONS}"""
+
+    return [SystemMessage(content="You are a test automation expert creating a final comparison report."), 
+            HumanMessage(content=prompt)]
+
+
+def combine_chunk_comparisons(llm, summary_comparison, chunk_comparisons, build1_name, build2_name):
+    """Combine all chunk comparisons into a final comprehensive comparison."""
+    messages = create_final_comparison_prompt(summary_comparison, chunk_comparisons, build1_name, build2_name)
     
     print(f"\n[Generating final comparison report...]")
-    response = llm.invoke(messages)
+    response = invoke_llm(llm, messages, stage='reduce')
     
     return {
         'content': response.content,
@@ -1102,20 +2814,473 @@ Make it concise but comprehensive, focusing on what matters most."""
     }
 
 
-def chat_with_report(llm, report_content, ai_summary, chat_history, user_question):
+# Status codes of the test × build matrix; '.' marks a test a build doesn't list (passed in text reports)
+MATRIX_STATUS_CODES = {'PASS': 'P', 'FAIL': 'F', 'ERROR': 'E', 'SKIP': 'S', 'NOT RUN': 'NR',
+                       'SETUP ERROR': 'SE', 'CLEANUP ERROR': 'CE', 'PLUGIN ERROR': 'PE'}
+
+
+def build_status_matrix(builds_tests):
     """
-    Interactive chat with AI about the test report.
+    Build a test × build status matrix in one pass over the test records of all builds.
+    
+    Args:
+        builds_tests: List with the test records of each build, in comparison order
+                      (structured report records or parse_failure_records output)
+        
+    Returns:
+        dict: {(suite, name): [record or None for each build]} for the tests failing in at
+              least one build, sorted by suite and name
+    """
+    matrix = {}
+    failing = set()
+    for build_index, tests in enumerate(builds_tests):
+        for test in tests:
+            key = (test.get('suite') or 'Unknown', test.get('name') or '')
+            row = matrix.get(key)
+            if row is None:
+                row = matrix[key] = [None] * len(builds_tests)
+            # Repeated (suite, name) pairs within a build: keep the first failing record
+            if row[build_index] is None or (test.get('failed') and not row[build_index].get('failed')):
+                row[build_index] = test
+            if test.get('failed'):
+                failing.add(key)
+    return {key: matrix[key] for key in sorted(failing)}
+
+
+def status_trend(row):
+    """
+    Describe how a test's failures evolve across the builds of a matrix row.
+    
+    Returns:
+        str: 'always failing', 'new in B<k>' (failing from build k on), 'fixed in B<k>'
+             (failing until build k) or 'intermittent'
+    """
+    failed = [bool(record and record.get('failed')) for record in row]
+    if all(failed):
+        return 'always failing'
+    first_change = next(i for i in range(1, len(failed) + 1) if i == len(failed) or failed[i] != failed[0])
+    if all(value != failed[0] for value in failed[first_change:]):
+        return f"{'fixed' if failed[0] else 'new'} in B{first_change + 1}"
+    return 'intermittent'
+
+
+def matrix_trend_counts(matrix):
+    """Number of tests per trend: always failing, new, fixed (in any build) and intermittent"""
+    counts = {'always_failing': 0, 'new': 0, 'fixed': 0, 'intermittent': 0}
+    for row in matrix.values():
+        trend = status_trend(row)
+        counts['always_failing' if trend == 'always failing' else trend.split()[0]] += 1
+    return counts
+
+
+def format_status_matrix(matrix, build_names, max_names=DIFF_MAX_NAMES):
+    """
+    Render a status matrix as compact text grouped by suite, for the comparison prompt.
+    
+    Tests of a suite with the same status in every build and the same latest failure
+    message (IDs and numbers masked) share one row listing their names.
+    
+    Args:
+        matrix: Matrix as returned by build_status_matrix
+        build_names: Build names, in matrix column order
+        max_names: Test names listed per row
+        
+    Returns:
+        str: The matrix with a build legend and trend counts
+    """
+    counts = matrix_trend_counts(matrix)
+    lines = [f"STATUS MATRIX: {len(build_names)} builds, {len(matrix)} tests failing in at least one build "
+             f"(tests matched by suite and test name)",
+             "Builds: " + ", ".join(f"B{i} = {name}" for i, name in enumerate(build_names, 1)),
+             "Status codes: " + " ".join(f"{code}={status}" for status, code in MATRIX_STATUS_CODES.items())
+             + " .=not listed (passed or not run)",
+             f"Trends: always failing: {counts['always_failing']} | new: {counts['new']} | "
+             f"fixed: {counts['fixed']} | intermittent: {counts['intermittent']}"]
+    if not matrix:
+        lines.append("\nNo failing tests in any build.")
+        return '\n'.join(lines)
+    
+    by_suite = {}
+    for (suite, name), row in matrix.items():
+        codes = tuple('.' if record is None
+                      else MATRIX_STATUS_CODES.get(record.get('status'), record.get('status') or '?')
+                      for record in row)
+        latest = next(record for record in reversed(row) if record and record.get('failed'))
+        message = latest.get('failure_message') or '(no failure message)'
+        groups = by_suite.setdefault(suite, {})
+        groups.setdefault((codes, status_trend(row), failure_signature(message)), (message, []))[1].append(name)
+    
+    width = max(len(code) for groups in by_suite.values() for codes, _, _ in groups for code in codes)
+    for suite_name, groups in by_suite.items():
+        lines.append(f"\nSUITE: {suite_name}")
+        for (codes, trend, _), (message, names) in groups.items():
+            listed = names[:max_names]
+            more = f" ... and {len(names) - len(listed)} more" if len(names) > len(listed) else ""
+            lines.append(f"  {' '.join(code.ljust(width) for code in codes)} | {trend} | "
+                         f"{truncate_to_tokens(message, 100)} ({len(names)}): {', '.join(listed)}{more}")
+    
+    return '\n'.join(lines)
+
+
+def compare_builds(llm, builds, callback=None):
+    """
+    Compare any number of builds in one pass through a test × build status matrix.
+    
+    The failed tests of all builds are matched on (suite, test name) into one matrix,
+    rendered compactly (see format_status_matrix) and sent in one request with the
+    build summaries. A matrix over the comparison budget is analyzed in chunks split
+    at suites, which are then combined.
     
     Args:
         llm: Initialized AzureChatOpenAI instance
+        builds: List of (build_name, report_content, report_data) in comparison order, where
+                report_data is the optional structured report (see read_structured_report)
+        callback: Optional callback function for progress updates
+        
+    Returns:
+        dict: Comparison results containing content, metadata, and usage info, plus
+              'matrix' with the number of builds, failing tests and tests per trend
+    """
+    build_names, summaries, matrix, matrix_chunks = prepare_matrix_comparison(llm, builds, callback)
+    
+    if len(matrix_chunks) == 1:
+        messages = create_matrix_comparison_prompt(build_names, summaries, matrix_chunks[0])
+        print(f"\n[Sending status matrix of {len(build_names)} builds to Azure OpenAI...]")
+        response = invoke_llm(llm, messages, stage='reduce')
+    else:
+        def analyze_chunk(item):
+            chunk_num, chunk = item
+            messages = create_matrix_chunk_prompt(llm, build_names, chunk, chunk_num, len(matrix_chunks))
+            return invoke_llm(llm, messages, stage='map').content
+        
+        def chunk_done(idx, analysis, done):
+            msg = f"  Analyzed matrix chunk {done}/{len(matrix_chunks)}..."
+            print(f"[{msg}]")
+            if callback:
+                callback(msg)
+        
+        chunk_analyses = run_concurrently(analyze_chunk, list(enumerate(matrix_chunks, 1)), on_result=chunk_done)
+        
+        msg = "Combining matrix chunk analyses into final comparison..."
+        print(f"[{msg}]")
+        if callback:
+            callback(msg)
+        messages = create_matrix_comparison_prompt(build_names, summaries, None, chunk_analyses)
+        response = invoke_llm(llm, messages, stage='reduce')
+    
+    return {
+        'content': response.content,
+        'metadata': response.response_metadata,
+        'message_id': response.id,
+        'usage': response.usage_metadata,
+        'matrix': {'builds': len(build_names), 'failing_tests': len(matrix), **matrix_trend_counts(matrix)}
+    }
+
+
+def prepare_matrix_comparison(llm, builds, callback=None):
+    """
+    Build names, summaries, status matrix and matrix text chunks for compare_builds.
+    
+    Returns:
+        tuple: (build names, summaries, matrix, matrix text chunks: one if the matrix fits
+                into a single comparison request, otherwise chunks split at suites)
+    """
+    build_names = [build_name for build_name, _, _ in builds]
+    msg = f"Building test status matrix of {len(builds)} builds..."
+    print(f"[{msg}]")
+    if callback:
+        callback(msg)
+    
+    summaries = []
+    builds_tests = []
+    for _, report_content, report_data in builds:
+        summary, tests = report_summary_and_tests(report_content, report_data)
+        summaries.append(summary)
+        builds_tests.append(tests)
+    
+    matrix = build_status_matrix(builds_tests)
+    matrix_text = format_status_matrix(matrix, build_names)
+    matrix_tokens = estimate_tokens(matrix_text)
+    
+    if matrix_tokens <= token_budget('comparison', llm, stage='reduce'):
+        matrix_chunks = [matrix_text]
+    else:
+        matrix_chunks = split_text_into_chunks(matrix_text, token_budget('comparison_chunk', llm, stage='map'),
+                                               boundary=lambda line: line.startswith('SUITE:'))
+    
+    counts = matrix_trend_counts(matrix)
+    msg = (f"Status matrix: {len(matrix)} tests failing in at least one build - {counts['always_failing']} "
+           f"always failing, {counts['new']} new, {counts['fixed']} fixed, {counts['intermittent']} intermittent "
+           f"(~{matrix_tokens:,} tokens{f' in {len(matrix_chunks)} chunks' if len(matrix_chunks) > 1 else ''})")
+    print(f"[{msg}]")
+    if callback:
+        callback(msg)
+    
+    return build_names, summaries, matrix, matrix_chunks
+
+
+def create_matrix_chunk_prompt(llm, build_names, matrix_chunk, chunk_num, total_chunks):
+    """Create the prompt analyzing one chunk of a status matrix (truncated to the llm's budget)."""
+    matrix_chunk = truncate_to_tokens(matrix_chunk, token_budget('comparison_chunk', llm, stage='map'))
+    legend = ", ".join(f"B{i} = {name}" for i, name in enumerate(build_names, 1))
+    
+    prompt = f"""Analyze PART {chunk_num} of {total_chunks} of a test status matrix across {len(build_names)} builds
+({legend}, in this order).
+
+Each row gives a test group's status in every build, its trend, its latest failure message
+and the tests in the group. Tests were matched by suite and test name; the matrix is exact.
+
+{matrix_chunk}
+
+Identify:
+1. Regressions (new failures) and the builds that introduced them
+2. Fixes and the builds that brought them
+3. Intermittent (flaky) tests
+4. Patterns in persistent failures
+
+Be concise and focus on actionable insights."""
+
+    return [SystemMessage(content="You are a test automation expert."), HumanMessage(content=prompt)]
+
+
+def create_matrix_comparison_prompt(build_names, summaries, matrix_text, chunk_analyses=None):
+    """
+    Create the prompt comparing any number of builds from their summaries and status matrix,
+    or from the analyses of the matrix chunks when the matrix didn't fit into one request.
+    """
+    build_summaries = "\n\n".join(f"B{i} ({name}):\n{summary.strip()}"
+                                  for i, (name, summary) in enumerate(zip(build_names, summaries), 1))
+    if chunk_analyses is None:
+        evidence = f"""The status matrix below was computed deterministically by matching tests on suite and
+test name across all builds; its statuses and trends are exact.
+
+{matrix_text}"""
+    else:
+        evidence = "STATUS MATRIX ANALYSES:" + "".join(
+            f"\n\nPart {i}:\n{analysis}" for i, analysis in enumerate(chunk_analyses, 1))
+    
+    prompt = f"""You are comparing {len(build_names)} test builds, listed in order: {', '.join(build_names)}.
+
+BUILD SUMMARIES:
+{build_summaries}
+
+{evidence}
+
+Write a COMPREHENSIVE MULTI-BUILD COMPARISON with:
+
+1. OVERVIEW ACROSS BUILDS
+   - Test count and pass rate trend from the first to the last build
+   - Quality direction
+
+2. REGRESSIONS AND FIXES
+   - Failures introduced in later builds, and the build that introduced them
+   - Failures fixed, and the build that fixed them
+
+3. PERSISTENT AND INTERMITTENT FAILURES
+   - Failures present in every build (most critical first)
+   - Intermittent (flaky) tests
+
+4. FAILED vs SKIPPED ANALYSIS
+   - Separate code issues (FAILED) from environment issues (SKIPPED)
+
+5. ACTIONABLE RECOMMENDATIONS
+   - Top 3-5 priority items
+   - Clear next steps
+
+Make it concise but comprehensive, focusing on what matters most."""
+
+    return [SystemMessage(content="You are a test automation expert creating a multi-build comparison report."),
+            HumanMessage(content=prompt)]
+
+
+# ---------------------------------------------------------------------------
+# Chat retrieval: a BM25 index over the per-test blocks of a report, so chat
+# questions are answered from the report blocks relevant to them, wherever in
+# the report they are, instead of from its first few thousand characters.
+# ---------------------------------------------------------------------------
+
+# Report blocks retrieved per chat question (within the 'chat_context' token budget)
+CHAT_TOP_K = max(1, int(os.environ.get("REPORT_CHAT_TOP_K", "8")))
+# Report indexes kept in memory, most recently used first (one per chatted report)
+CHAT_INDEX_CACHE_SIZE = 8
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Words and dotted/dashed identifiers (test_vpn_tunnel_12, 10.1.2.3, ike-sa); identifiers are
+# indexed whole and by their parts, so both exact names and their words match
+_SEARCH_TERM_PATTERN = re.compile(r"\w+(?:[.\-]\w+)*")
+_TERM_PART_PATTERN = re.compile(r"[._\-]+")
+
+
+def search_terms(text):
+    """Lowercased search terms of a text: each word/identifier and, for identifiers, its parts"""
+    terms = []
+    for term in _SEARCH_TERM_PATTERN.findall(text.lower()):
+        terms.append(term)
+        parts = _TERM_PART_PATTERN.split(term)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part)
+    return terms
+
+
+class ReportIndex:
+    """
+    BM25 index over the blocks of a test report.
+    
+    A report in the analyzer's format is split into its header (summary sections
+    before FAILURES & ERRORS) and one block per test, prefixed with the test's suite;
+    other reports are split into blocks of lines. Use get_report_index to build an
+    index once per report.
+    """
+    
+    # Size of the line blocks of reports without per-test sections
+    LINE_BLOCK_TOKENS = 400
+    
+    def __init__(self, report_content):
+        self.header, self.blocks = self._split_blocks(report_content)
+        
+        self._postings = {}  # term -> [(block index, term frequency)]
+        self._lengths = []
+        for idx, block in enumerate(self.blocks):
+            terms = Counter(search_terms(block))
+            self._lengths.append(sum(terms.values()))
+            for term, count in terms.items():
+                self._postings.setdefault(term, []).append((idx, count))
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0
+    
+    @classmethod
+    def _split_blocks(cls, report_content):
+        """Split a report into (header, blocks)"""
+        lines = report_content.split('\n')
+        start = next((i for i, line in enumerate(lines)
+                      if 'FAILURES & ERRORS:' in line or 'FAILURES AND ERRORS:' in line), None)
+        if start is None:
+            return '', ['\n'.join(block) for block in pack_lines_by_tokens(lines, cls.LINE_BLOCK_TOKENS)]
+        
+        blocks = []
+        suite = None
+        current = None
+        for line in lines[start + 1:]:
+            stripped = line.strip()
+            if stripped.startswith('SUITE:'):
+                suite = stripped
+                current = None
+            elif stripped.startswith('Test:'):
+                current = [suite] if suite else []
+                current.append(line)
+                blocks.append(current)
+            elif current is not None:
+                current.append(line)
+        
+        header = '\n'.join(lines[:start]).strip()
+        return header, ['\n'.join(block).strip() for block in blocks]
+    
+    def search(self, query, top_k=CHAT_TOP_K):
+        """
+        Rank the blocks against a query with BM25.
+        
+        Returns:
+            list: (block index, score) of the top_k best-matching blocks, best first
+        """
+        scores = {}
+        num_blocks = len(self.blocks)
+        for term in set(search_terms(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (num_blocks - len(postings) + 0.5) / (len(postings) + 0.5))
+            for idx, count in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[idx] / self._avg_length)
+                scores[idx] = scores.get(idx, 0.0) + idf * count * (BM25_K1 + 1) / (count + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+    
+    def context(self, query, max_tokens, top_k=CHAT_TOP_K):
+        """
+        Report context for a question: the header and the blocks most relevant to the query.
+        
+        The header takes at most a third of max_tokens and each block at most a quarter.
+        Without any matching block, the first blocks of the report are used.
+        
+        Returns:
+            str: Header and selected blocks, in report order, within max_tokens
+        """
+        parts = []
+        remaining = max_tokens
+        if self.header:
+            header = truncate_to_tokens(self.header, max_tokens // 3)
+            parts.append(header)
+            remaining -= estimate_tokens(header)
+        
+        ranked = [idx for idx, _ in self.search(query, top_k)] or list(range(min(top_k, len(self.blocks))))
+        selected = []
+        for idx in ranked:
+            block = truncate_to_tokens(self.blocks[idx], max_tokens // 4)
+            block_tokens = estimate_tokens(block) + 1
+            if block_tokens > remaining:
+                continue
+            selected.append((idx, block))
+            remaining -= block_tokens
+        
+        parts.extend(block for _, block in sorted(selected))
+        if len(selected) < len(self.blocks):
+            parts.append(f"[{len(selected)} of {len(self.blocks)} report sections shown, "
+                         f"selected for relevance to the question]")
+        return '\n\n'.join(parts)
+
+
+_REPORT_INDEXES = OrderedDict()
+_REPORT_INDEXES_LOCK = threading.Lock()
+
+
+def get_report_index(report_content):
+    """
+    Retrieval index of a report, built on first use and kept for the following chat turns.
+    
+    Indexes are keyed by the report's content hash; the CHAT_INDEX_CACHE_SIZE most
+    recently used ones are kept.
+    """
+    key = hashlib.sha256(report_content.encode('utf-8')).hexdigest()
+    with _REPORT_INDEXES_LOCK:
+        index = _REPORT_INDEXES.get(key)
+        if index is not None:
+            _REPORT_INDEXES.move_to_end(key)
+            return index
+    
+    index = ReportIndex(report_content)
+    with _REPORT_INDEXES_LOCK:
+        _REPORT_INDEXES[key] = index
+        while len(_REPORT_INDEXES) > CHAT_INDEX_CACHE_SIZE:
+            _REPORT_INDEXES.popitem(last=False)
+    return index
+
+
+def chat_query(chat_history, user_question):
+    """Retrieval query of a chat turn: the question plus the previous one, for follow-ups"""
+    previous = [msg['content'] for msg in chat_history if msg['role'] == 'user'][-1:]
+    return '\n'.join(previous + [user_question])
+
+
+def create_chat_prompt(report_content, ai_summary, chat_history, user_question, llm=None):
+    """
+    Create the messages for a chat question about a test report.
+    
+    The report sections most relevant to the question are retrieved from the whole
+    report (see ReportIndex), within the 'chat_context' token budget.
+    
+    Args:
         report_content: The full test report content
         ai_summary: The AI-generated summary (from quick or full analysis)
         chat_history: List of previous chat messages [{"role": "user/assistant", "content": "..."}]
         user_question: The user's current question
+        llm: LLM instance whose chat deployment selects the context budget
         
     Returns:
-        dict: Chat response containing content, metadata, and usage info
+        list: List of messages for the LLM
     """
+    report_context = get_report_index(report_content).context(
+        chat_query(chat_history, user_question), token_budget('chat_context', llm, stage='chat'))
+    
     # Build the system message with report context
     system_message = SystemMessage(content=f"""You are an expert test automation engineer assistant. 
 You have access to a test report and its analysis. Your role is to:
@@ -1125,10 +3290,11 @@ You have access to a test report and its analysis. Your role is to:
 4. Suggest actionable next steps
 5. Be concise but thorough in your explanations
 
-Here is the test report you're analyzing:
+Here are the summary of the test report you're analyzing and the report sections most
+relevant to the question:
 
 --- TEST REPORT ---
-{report_content[:8000]}  # Limit to first 8000 chars to manage tokens
+{report_context}
 --- END TEST REPORT ---
 
 Here is the AI analysis summary:
@@ -1136,8 +3302,8 @@ Here is the AI analysis summary:
 {ai_summary}
 --- END AI ANALYSIS ---
 
-Answer the user's questions based on this context. If the information isn't in the report, 
-say so clearly. Always ground your answers in the actual report data.""")
+Answer the user's questions based on this context. If the information isn't in the report sections
+shown, say so clearly. Always ground your answers in the actual report data.""")
     
     # Build messages list with chat history
     messages = [system_message]
@@ -1152,8 +3318,27 @@ say so clearly. Always ground your answers in the actual report data.""")
     # Add current question
     messages.append(HumanMessage(content=user_question))
     
+    return messages
+
+
+def chat_with_report(llm, report_content, ai_summary, chat_history, user_question):
+    """
+    Interactive chat with AI about the test report.
+    
+    Args:
+        llm: Initialized AzureChatOpenAI instance
+        report_content: The full test report content
+        ai_summary: The AI-generated summary (from quick or full analysis)
+        chat_history: List of previous chat messages [{"role": "user/assistant", "content": "..."}]
+        user_question: The user's current question
+        
+    Returns:
+        dict: Chat response containing content, metadata, and usage info
+    """
+    messages = create_chat_prompt(report_content, ai_summary, chat_history, user_question, llm)
+    
     # Get response from LLM
-    response = llm.invoke(messages)
+    response = invoke_llm(llm, messages, stage='chat')
     
     return {
         'content': response.content,
@@ -1163,44 +3348,60 @@ say so clearly. Always ground your answers in the actual report data.""")
     }
 
 
-def chat_with_comparison(llm, report1_content, report2_content, comparison_summary, 
-                         build1_name, build2_name, chat_history, user_question):
+def stream_chat_with_report(llm, report_content, ai_summary, chat_history, user_question):
     """
-    Interactive chat with AI about the comparison of two test reports.
+    Streaming variant of chat_with_report.
+    
+    Returns:
+        LLMStream: Text pieces of the answer; its result holds the chat response
+    """
+    return LLMStream(llm, create_chat_prompt(report_content, ai_summary, chat_history, user_question, llm), stage='chat')
+
+
+def create_builds_chat_prompt(builds, comparison_summary, chat_history, user_question, llm=None):
+    """
+    Create the messages for a chat question about the comparison of two or more test reports.
+    
+    The sections of each report most relevant to the question are retrieved (see
+    ReportIndex). The reports share the 'chat_context' token budget equally, each
+    getting at least a quarter of it.
     
     Args:
-        llm: Initialized AzureChatOpenAI instance
-        report1_content: Content of the first test report
-        report2_content: Content of the second test report
+        builds: List of (build_name, report_content), in the order they were compared
         comparison_summary: The AI-generated comparison summary
-        build1_name: Name of the first build
-        build2_name: Name of the second build
         chat_history: List of previous chat messages
         user_question: The user's current question
+        llm: LLM instance whose chat deployment selects the context budget
         
     Returns:
-        dict: Chat response containing content, metadata, and usage info
+        list: List of messages for the LLM
     """
+    query = chat_query(chat_history, user_question)
+    budget = token_budget('chat_context', llm, stage='chat')
+    context_tokens = max(budget // len(builds), budget // 4)
+    
+    build_list = '\n'.join(f"- Build {i}: {build_name}" for i, (build_name, _) in enumerate(builds, 1))
+    report_sections = '\n\n'.join(
+        f"--- REPORT {i} ({build_name}) ---\n"
+        f"{get_report_index(report_content).context(query, context_tokens)}\n"
+        f"--- END REPORT {i} ---"
+        for i, (build_name, report_content) in enumerate(builds, 1))
+    
     # Build the system message with comparison context
     system_message = SystemMessage(content=f"""You are an expert test automation engineer assistant. 
-You have access to two test reports and their comparison analysis. Your role is to:
+You have access to {len(builds)} test reports and their comparison analysis. Your role is to:
 1. Answer questions about the comparison accurately
 2. Explain differences, regressions, and fixes
-3. Identify patterns across both runs
+3. Identify patterns across the runs
 4. Help users understand what changed between builds
 5. Suggest actionable next steps
 
-Here are the two builds being compared:
-- Build 1: {build1_name}
-- Build 2: {build2_name}
+Here are the builds being compared, oldest first:
+{build_list}
 
---- REPORT 1 ({build1_name}) ---
-{report1_content[:4000]}  # Limit to manage tokens
---- END REPORT 1 ---
+Each report is shown as its summary and the sections most relevant to the question:
 
---- REPORT 2 ({build2_name}) ---
-{report2_content[:4000]}  # Limit to manage tokens
---- END REPORT 2 ---
+{report_sections}
 
 Here is the comparison analysis:
 --- COMPARISON ANALYSIS ---
@@ -1208,7 +3409,7 @@ Here is the comparison analysis:
 --- END COMPARISON ANALYSIS ---
 
 Answer the user's questions based on this comparison context. If the information isn't in the 
-reports, say so clearly. Always ground your answers in the actual report data.""")
+report sections shown, say so clearly. Always ground your answers in the actual report data.""")
     
     # Build messages list with chat history
     messages = [system_message]
@@ -1223,8 +3424,34 @@ reports, say so clearly. Always ground your answers in the actual report data.""
     # Add current question
     messages.append(HumanMessage(content=user_question))
     
+    return messages
+
+
+def create_comparison_chat_prompt(report1_content, report2_content, comparison_summary,
+                                  build1_name, build2_name, chat_history, user_question, llm=None):
+    """Create the messages for a chat question about two test reports, see create_builds_chat_prompt."""
+    return create_builds_chat_prompt([(build1_name, report1_content), (build2_name, report2_content)],
+                                     comparison_summary, chat_history, user_question, llm)
+
+
+def chat_with_builds(llm, builds, comparison_summary, chat_history, user_question):
+    """
+    Interactive chat with AI about the comparison of two or more test reports.
+    
+    Args:
+        llm: Initialized AzureChatOpenAI instance
+        builds: List of (build_name, report_content), in the order they were compared
+        comparison_summary: The AI-generated comparison summary
+        chat_history: List of previous chat messages
+        user_question: The user's current question
+        
+    Returns:
+        dict: Chat response containing content, metadata, and usage info
+    """
+    messages = create_builds_chat_prompt(builds, comparison_summary, chat_history, user_question, llm)
+    
     # Get response from LLM
-    response = llm.invoke(messages)
+    response = invoke_llm(llm, messages, stage='chat')
     
     return {
         'content': response.content,
@@ -1234,6 +3461,446 @@ reports, say so clearly. Always ground your answers in the actual report data.""
     }
 
 
+def stream_chat_with_builds(llm, builds, comparison_summary, chat_history, user_question):
+    """
+    Streaming variant of chat_with_builds.
+    
+    Returns:
+        LLMStream: Text pieces of the answer; its result holds the chat response
+    """
+    return LLMStream(llm, create_builds_chat_prompt(builds, comparison_summary, chat_history, user_question, llm),
+                     stage='chat')
+
+
+def chat_with_comparison(llm, report1_content, report2_content, comparison_summary, 
+                         build1_name, build2_name, chat_history, user_question):
+    """
+    Interactive chat with AI about the comparison of two test reports.
+    
+    Args:
+        llm: Initialized AzureChatOpenAI instance
+        report1_content: Content of the first test report
+        report2_content: Content of the second test report
+        comparison_summary: The AI-generated comparison summary
+        build1_name: Name of the first build
+        build2_name: Name of the second build
+        chat_history: List of previous chat messages
+        user_question: The user's current question
+        
+    Returns:
+        dict: Chat response containing content, metadata, and usage info
+    """
+    return chat_with_builds(llm, [(build1_name, report1_content), (build2_name, report2_content)],
+                            comparison_summary, chat_history, user_question)
+
+
+def stream_chat_with_comparison(llm, report1_content, report2_content, comparison_summary,
+                                build1_name, build2_name, chat_history, user_question):
+    """
+    Streaming variant of chat_with_comparison.
+    
+    Returns:
+        LLMStream: Text pieces of the answer; its result holds the chat response
+    """
+    return stream_chat_with_builds(llm, [(build1_name, report1_content), (build2_name, report2_content)],
+                                   comparison_summary, chat_history, user_question)
+
+
+# ---------------------------------------------------------------------------
+# Async API: the same pipeline on llm.ainvoke, so many analyses can share one
+# event loop. Prompts, chunking and caching are shared with the functions above.
+# ---------------------------------------------------------------------------
+
+async def acall_with_backoff(call, tokens=0):
+    """Async variant of call_with_backoff: awaits call() and sleeps without blocking the event loop"""
+    limiter = get_rate_limiter()
+    attempt = 0
+    while True:
+        delay = limiter.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            return await call()
+        except Exception as e:
+            delay = limiter.backoff(e, attempt)
+            if delay is None:
+                raise
+            print(f"⚠️  LLM request {'throttled' if limiter.is_throttle(e) else 'failed'}, "
+                  f"retrying in {delay:.1f}s ({attempt + 1}/{limiter.max_retries})...")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def ainvoke_llm(llm, messages, stage=None):
+    """Async variant of invoke_llm, built on llm.ainvoke"""
+    llm = llm_for_stage(llm, stage)
+    start = time.perf_counter()
+    
+    # Cache lookups and writes are disk I/O; run them off the event loop
+    cache = get_llm_cache()
+    key = cache.make_key(llm, messages) if cache else None
+    entry = await asyncio.to_thread(cache.get, key) if key else None
+    if entry is not None:
+        response = CachedLLMResponse(entry)
+    else:
+        response = await acall_with_backoff(lambda: llm.ainvoke(messages), request_tokens(llm, messages))
+        if key:
+            await asyncio.to_thread(cache.put, key, response)
+    
+    record_stage_latency(stage, llm, time.perf_counter() - start, cached=entry is not None)
+    return response
+
+
+async def arun_concurrently(func, items, max_concurrency=None, on_result=None):
+    """
+    Async variant of run_concurrently: await func(item) for each item on the running
+    event loop, at most max_concurrency at a time, and return the results in item order.
+    
+    Args:
+        func: Coroutine function called with each item
+        items: List of items
+        max_concurrency: Maximum calls in flight (default: MAX_CHUNK_CONCURRENCY)
+        on_result: Optional function called as on_result(index, result, done_count) as each call finishes
+        
+    Returns:
+        list: Results in the order of items
+    """
+    results = [None] * len(items)
+    if not items:
+        return results
+    
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or MAX_CHUNK_CONCURRENCY))
+    
+    async def run(idx, item):
+        async with semaphore:
+            return idx, await func(item)
+    
+    tasks = [asyncio.ensure_future(run(idx, item)) for idx, item in enumerate(items)]
+    try:
+        for done, next_result in enumerate(asyncio.as_completed(tasks), 1):
+            idx, results[idx] = await next_result
+            if on_result:
+                on_result(idx, results[idx], done)
+    except BaseException:
+        # Don't start the remaining calls if one fails (e.g. expired token)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return results
+
+
+async def aanalyze_report_chunks(llm, report_chunks, callback=None, max_concurrency=None):
+    """Async variant of analyze_report_chunks"""
+    if len(report_chunks) == 1:
+        # Single chunk, analyze normally (chunks are already preprocessed)
+        return await aanalyze_report(llm, report_chunks[0], preprocess=())
+    
+    total_chunks = len(report_chunks)
+    workers = max(1, min(max_concurrency or MAX_CHUNK_CONCURRENCY, total_chunks))
+    
+    msg = f"Large report detected: Analyzing {total_chunks} chunks ({workers} at a time)..."
+    print(f"\n[{msg}]")
+    if callback:
+        callback(msg)
+    
+    # Keying chunks (prefix stripping, normalizing, hashing) is CPU-bound and cache
+    # lookups and writes are disk I/O; both run off the event loop
+    cache = get_llm_cache()
+    chunk_bodies = await asyncio.to_thread(strip_shared_prefix, report_chunks) if cache else None
+    map_llm = llm_for_stage(llm, 'map')
+    
+    async def analyze_chunk(numbered_chunk):
+        chunk_num, chunk = numbered_chunk
+        start = time.perf_counter()
+        key = await asyncio.to_thread(chunk_analysis_key, map_llm, chunk_bodies[chunk_num - 1]) if cache else None
+        entry = await asyncio.to_thread(cache.get, key) if key else None
+        if entry is not None:
+            record_stage_latency('map', map_llm, 0, cached=True)
+            return entry['content'], True
+        
+        messages = create_chunked_analysis_prompt(chunk, chunk_num, total_chunks)
+        response = await acall_with_backoff(lambda: map_llm.ainvoke(messages), request_tokens(map_llm, messages))
+        if key:
+            await asyncio.to_thread(cache.put, key, response)
+        record_stage_latency('map', map_llm, time.perf_counter() - start)
+        return response.content, False
+    
+    def chunk_done(idx, result, done):
+        state = "Reused cached analysis of" if result[1] else "Analyzed"
+        msg = f"{state} chunk {idx + 1}/{total_chunks} ({done}/{total_chunks} done)"
+        print(f"[{msg}]")
+        if callback:
+            callback(msg)
+    
+    results = await arun_concurrently(analyze_chunk, list(enumerate(report_chunks, 1)),
+                                      max_concurrency=workers, on_result=chunk_done)
+    chunk_analyses = [analysis for analysis, _ in results]
+    reused_chunks = sum(1 for _, reused in results if reused)
+    
+    if reused_chunks:
+        msg = f"{reused_chunks}/{total_chunks} chunks unchanged, reused their cached analyses"
+        print(f"[{msg}]")
+        if callback:
+            callback(msg)
+    
+    msg = f"Combining {len(chunk_analyses)} chunk analyses into final report..."
+    print(f"[{msg}]")
+    if callback:
+        callback(msg)
+    
+    combined_analysis = await acombine_chunk_analyses(llm, chunk_analyses, callback=callback,
+                                                      max_concurrency=max_concurrency)
+    combined_analysis['chunks'] = {'total': total_chunks, 'reused': reused_chunks}
+    
+    return combined_analysis
+
+
+async def acombine_chunk_analyses(llm, chunk_analyses, callback=None, max_tokens=None, max_concurrency=None):
+    """Async variant of combine_chunk_analyses"""
+    budget = max_tokens or token_budget('combine', llm, stage='reduce')
+    labeled = [(f"CHUNK {i+1}", analysis) for i, analysis in enumerate(chunk_analyses)]
+    
+    level = 0
+    while True:
+        plan = plan_merge_level(labeled, budget)
+        if plan is None:
+            break
+        groups, fan_in = plan
+        level += 1
+        
+        msg = f"Merging {len(labeled)} analyses in {len(groups)} groups of up to {fan_in} (level {level})..."
+        print(f"[{msg}]")
+        if callback:
+            callback(msg)
+        
+        async def merge_group(group):
+            if len(group) == 1:
+                return group[0][1]
+            return (await ainvoke_llm(llm, create_merge_prompt(group), stage='reduce')).content
+        
+        merged = await arun_concurrently(merge_group, groups, max_concurrency=max_concurrency)
+        labeled = [(group_label(group), analysis) for group, analysis in zip(groups, merged)]
+    
+    response = await ainvoke_llm(llm, create_combine_prompt(labeled), stage='reduce')
+    
+    return {
+        'content': response.content,
+        'metadata': response.response_metadata,
+        'message_id': response.id,
+        'usage': response.usage_metadata
+    }
+
+
+async def _aanalyze(llm, report_content, quick, callback=None, preprocess=None):
+    """Shared body of aanalyze_report and aquick_summarize_report"""
+    # Preprocessing is CPU-bound; run it off the event loop so other requests keep going
+    report_content, preprocessing = await asyncio.to_thread(preprocess_report, report_content, preprocess)
+    if callback and preprocessing['output_bytes'] < preprocessing['input_bytes']:
+        callback(f"Preprocessed report: ~{preprocessing['input_tokens']:,} → ~{preprocessing['output_tokens']:,} tokens")
+    
+    max_tokens = token_budget('analysis', llm, stage='reduce')
+    report_tokens = await asyncio.to_thread(estimate_tokens, report_content)
+    if report_tokens > max_tokens:
+        # Splitting is CPU-bound too, with its progress messages delivered on the loop
+        loop = asyncio.get_running_loop()
+        thread_callback = (lambda msg: loop.call_soon_threadsafe(callback, msg)) if callback else None
+        chunks = await asyncio.to_thread(split_large_report, report_content, report_tokens,
+                                         token_budget('analysis', llm, stage='map'), thread_callback)
+        result = await aanalyze_report_chunks(llm, chunks, callback=callback)
+        result['preprocessing'] = preprocessing
+        return result
+    
+    messages = create_quick_summary_prompt(report_content) if quick else create_analysis_prompt(report_content)
+    if callback:
+        callback(f"Sending to AI for {'quick summary' if quick else 'analysis'}...")
+    response = await ainvoke_llm(llm, messages, stage='reduce')
+    
+    return {
+        'content': response.content,
+        'metadata': response.response_metadata,
+        'message_id': response.id,
+        'usage': response.usage_metadata,
+        'preprocessing': preprocessing
+    }
+
+
+async def aanalyze_report(llm, report_content, callback=None, preprocess=None):
+    """Async variant of analyze_report"""
+    return await _aanalyze(llm, report_content, quick=False, callback=callback, preprocess=preprocess)
+
+
+async def aquick_summarize_report(llm, report_content, callback=None, preprocess=None):
+    """Async variant of quick_summarize_report"""
+    return await _aanalyze(llm, report_content, quick=True, callback=callback, preprocess=preprocess)
+
+
+async def acompare_reports(llm, report1_content, report2_content, build1_name, build2_name, callback=None,
+                           report1_data=None, report2_data=None):
+    """Async variant of compare_reports"""
+    estimated_tokens = estimate_tokens(report1_content) + estimate_tokens(report2_content)
+    
+    if estimated_tokens <= token_budget('comparison', llm, stage='reduce'):
+        messages = create_comparison_prompt(report1_content, report2_content, build1_name, build2_name)
+        response = await ainvoke_llm(llm, messages, stage='reduce')
+        # Parsing and diffing is CPU-bound; run it off the event loop (see acompare_reports_chunked)
+        diff = await asyncio.to_thread(diff_reports, report1_content, report2_content, report1_data, report2_data)
+        
+        return {
+            'content': response.content,
+            'metadata': response.response_metadata,
+            'message_id': response.id,
+            'usage': response.usage_metadata,
+            'diff': diff_counts(diff)
+        }
+    
+    msg = f"Large comparison detected (~{int(estimated_tokens):,} tokens). Using intelligent chunking..."
+    print(f"\n[{msg}]")
+    if callback:
+        callback(msg)
+    
+    return await acompare_reports_chunked(llm, report1_content, report2_content, build1_name, build2_name,
+                                          callback, report1_data, report2_data)
+
+
+async def acompare_reports_chunked(llm, report1_content, report2_content, build1_name, build2_name, callback=None,
+                                   report1_data=None, report2_data=None):
+    """Async variant of compare_reports_chunked; the summary and diff chunk comparisons run concurrently"""
+    # Parsing and diffing is CPU-bound; run it off the event loop so other requests keep
+    # going, with its progress messages delivered on the loop
+    loop = asyncio.get_running_loop()
+    thread_callback = (lambda msg: loop.call_soon_threadsafe(callback, msg)) if callback else None
+    report1_summary, report2_summary, diff, diff_chunks = await asyncio.to_thread(
+        prepare_diff_comparison, llm, report1_content, report2_content, build1_name, build2_name,
+        report1_data, report2_data, thread_callback)
+    
+    if len(diff_chunks) == 1:
+        messages = create_diff_comparison_prompt(report1_summary, report2_summary, diff_chunks[0],
+                                                 build1_name, build2_name)
+        response = await ainvoke_llm(llm, messages, stage='reduce')
+        return {
+            'content': response.content,
+            'metadata': response.response_metadata,
+            'message_id': response.id,
+            'usage': response.usage_metadata,
+            'diff': diff_counts(diff)
+        }
+    
+    async def compare(chunk_num):
+        if chunk_num == 0:
+            messages = create_summary_comparison_prompt(llm, report1_summary, report2_summary,
+                                                        build1_name, build2_name)
+        else:
+            messages = create_diff_chunk_comparison_prompt(llm, diff_chunks[chunk_num - 1], build1_name, build2_name,
+                                                           chunk_num, len(diff_chunks))
+        return (await ainvoke_llm(llm, messages, stage='summary_compare' if chunk_num == 0 else 'map')).content
+    
+    def comparison_done(idx, comparison, done):
+        task = "summaries" if idx == 0 else f"diff chunk {idx}/{len(diff_chunks)}"
+        msg = f"  Compared {task} ({done}/{len(diff_chunks) + 1} done)..."
+        print(f"[{msg}]")
+        if callback:
+            callback(msg)
+    
+    # The summary comparison goes first, followed by the diff chunks
+    comparisons = await arun_concurrently(compare, list(range(len(diff_chunks) + 1)), on_result=comparison_done)
+    
+    msg = "Step 3/3: Combining all comparisons into final analysis..."
+    print(f"[{msg}]")
+    if callback:
+        callback(msg)
+    
+    messages = create_final_comparison_prompt(comparisons[0], comparisons[1:], build1_name, build2_name)
+    response = await ainvoke_llm(llm, messages, stage='reduce')
+    
+    return {
+        'content': response.content,
+        'metadata': response.response_metadata,
+        'message_id': response.id,
+        'usage': response.usage_metadata,
+        'diff': diff_counts(diff)
+    }
+
+
+async def acompare_builds(llm, builds, callback=None):
+    """Async variant of compare_builds; the matrix chunks are analyzed concurrently"""
+    # Building the matrix is CPU-bound; run it off the event loop (see acompare_reports_chunked)
+    loop = asyncio.get_running_loop()
+    thread_callback = (lambda msg: loop.call_soon_threadsafe(callback, msg)) if callback else None
+    build_names, summaries, matrix, matrix_chunks = await asyncio.to_thread(
+        prepare_matrix_comparison, llm, builds, thread_callback)
+    
+    if len(matrix_chunks) == 1:
+        messages = create_matrix_comparison_prompt(build_names, summaries, matrix_chunks[0])
+        response = await ainvoke_llm(llm, messages, stage='reduce')
+    else:
+        async def analyze_chunk(item):
+            chunk_num, chunk = item
+            messages = create_matrix_chunk_prompt(llm, build_names, chunk, chunk_num, len(matrix_chunks))
+            return (await ainvoke_llm(llm, messages, stage='map')).content
+        
+        def chunk_done(idx, analysis, done):
+            msg = f"  Analyzed matrix chunk {done}/{len(matrix_chunks)}..."
+            print(f"[{msg}]")
+            if callback:
+                callback(msg)
+        
+        chunk_analyses = await arun_concurrently(analyze_chunk, list(enumerate(matrix_chunks, 1)),
+                                                 on_result=chunk_done)
+        
+        msg = "Combining matrix chunk analyses into final comparison..."
+        print(f"[{msg}]")
+        if callback:
+            callback(msg)
+        messages = create_matrix_comparison_prompt(build_names, summaries, None, chunk_analyses)
+        response = await ainvoke_llm(llm, messages, stage='reduce')
+    
+    return {
+        'content': response.content,
+        'metadata': response.response_metadata,
+        'message_id': response.id,
+        'usage': response.usage_metadata,
+        'matrix': {'builds': len(build_names), 'failing_tests': len(matrix), **matrix_trend_counts(matrix)}
+    }
+
+
+async def achat_with_report(llm, report_content, ai_summary, chat_history, user_question):
+    """Async variant of chat_with_report"""
+    # Indexing a report on its first question is CPU-bound; keep it off the event loop
+    messages = await asyncio.to_thread(create_chat_prompt, report_content, ai_summary, chat_history,
+                                       user_question, llm)
+    response = await ainvoke_llm(llm, messages, stage='chat')
+    
+    return {
+        'content': response.content,
+        'metadata': response.response_metadata,
+        'message_id': response.id,
+        'usage': response.usage_metadata
+    }
+
+
+async def achat_with_builds(llm, builds, comparison_summary, chat_history, user_question):
+    """Async variant of chat_with_builds"""
+    # Indexing the reports on their first question is CPU-bound; keep it off the event loop
+    messages = await asyncio.to_thread(create_builds_chat_prompt, builds, comparison_summary, chat_history,
+                                       user_question, llm)
+    response = await ainvoke_llm(llm, messages, stage='chat')
+    
+    return {
+        'content': response.content,
+        'metadata': response.response_metadata,
+        'message_id': response.id,
+        'usage': response.usage_metadata
+    }
+
+
+async def achat_with_comparison(llm, report1_content, report2_content, comparison_summary,
+                                build1_name, build2_name, chat_history, user_question):
+    """Async variant of chat_with_comparison"""
+    return await achat_with_builds(llm, [(build1_name, report1_content), (build2_name, report2_content)],
+                                   comparison_summary, chat_history, user_question)
+
+
 def format_output(analysis_result, report_path, report_size):
     """
     Format the analysis results for display.
@@ -1251,6 +3918,12 @@ def format_output(analysis_result, report_path, report_size):
     print(f"Model: {analysis_result['metadata'].get('model', 'N/A')}")
     print(f"Message ID: {analysis_result['message_id']}")
     
+    preprocessing = analysis_result.get('preprocessing')
+    if preprocessing and len(preprocessing['stages']) > 1:
+        print("\nPreprocessing:")
+        for stage in preprocessing['stages']:
+            print(f"  - {stage['stage'].capitalize()}: {stage['bytes']:,} bytes, ~{stage['tokens']:,} tokens")
+    
     if 'usage' in analysis_result and analysis_result['usage']:
         usage = analysis_result['usage']
         print(f"\nToken Usage:")
@@ -1296,9 +3969,14 @@ def main():
     print("Using Cisco Azure OpenAI (chat-ai)")
     print("=" * 100)
     
+    # --no-cache sends every request to the LLM instead of reusing cached responses
+    args = [arg for arg in sys.argv[1:] if arg != '--no-cache']
+    if len(args) < len(sys.argv) - 1:
+        configure_llm_cache(enabled=False)
+    
     # Determine which report file to use
-    if len(sys.argv) > 1:
-        report_file = sys.argv[1]
+    if args:
+        report_file = args[0]
     else:
         # Use default report file in the same directory as this script
         script_dir = Path(__file__).parent
@@ -1362,6 +4040,18 @@ def main():
     # Display results
     format_output(analysis_result, report_path, len(report_content))
     
+    stage_stats = get_stage_stats()
+    if stage_stats:
+        print("LLM latency by stage:")
+        for stage, stats in stage_stats.items():
+            print(f"  {stage:16s} {', '.join(stats['deployments']) or '-':16s} {stats['requests']:4d} requests, "
+                  f"avg {stats['avg_seconds']:.1f}s, max {stats['max_seconds']:.1f}s, {stats['cached']} cached")
+    
+    limiter_stats = get_rate_limiter().stats()
+    if limiter_stats['throttles'] or limiter_stats['waits']:
+        print(f"Rate limiting: {limiter_stats['throttles']} throttled, {limiter_stats['retries']} retries, "
+              f"waited {limiter_stats['wait_seconds'] + limiter_stats['backoff_seconds']:.1f}s")
+    
     # Save to file
     output_file = report_path.parent / f"{report_path.stem}_failure_analysis.txt"
     save_analysis_to_file(analysis_result['content'], output_file)
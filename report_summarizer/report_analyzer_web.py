@@ -962,16 +962,17 @@ def run_analysis(index_path: Path, analysis_mode: str, build_info: dict, url: st
         
         if analysis_mode.lower() == "quick":
             st.write("⚡ Quick mode: Concise AI summary (10-20 seconds)...")
-            success, summary_result, error = summarizer.analyze_quick(
-                report_path,
-                callback=progress_callback
-            )
+            stream = summarizer.stream_analyze_quick(report_path, callback=progress_callback)
         else:  # Full analysis
             st.write("🔍 Full mode: Detailed AI analysis (30-60 seconds)...")
-            success, summary_result, error = summarizer.analyze_full(
-                report_path,
-                callback=progress_callback
-            )
+            stream = summarizer.stream_analyze_full(report_path, callback=progress_callback)
+        
+        # Render the answer as it is generated
+        try:
+            st.write_stream(stream)
+            success, summary_result, error = True, summarizer.last_stream_result, None
+        except Exception as e:
+            success, summary_result, error = False, None, str(e)
         
         if not success:
             st.error(f"Error during AI analysis: {error}")
@@ -1236,7 +1237,9 @@ def display_comparison():
     """Display AI-powered comparison view"""
     st.markdown("### 🔄 AI-Powered Build Comparison")
     
-    selected = st.session_state.session_manager.get_selected_entries()
+    # Oldest analysis first, so the comparison trends and its chat read forward
+    selected = sorted(st.session_state.session_manager.get_selected_entries(),
+                      key=lambda entry: entry.get('timestamp', ''))
     
     if len(selected) < 2:
         st.warning("Please select at least 2 runs from history to compare")
@@ -1300,7 +1303,7 @@ def display_comparison():
             with st.expander("🔍 Running AI Comparison", expanded=True):
                 # Prepare report paths and build names
                 report_paths = []
-                for entry in selected[:2]:  # Compare first 2 for now
+                for entry in selected:
                     analyzer_results = entry.get('analyzer_results', {})
                     report_path = analyzer_results.get('report_path')
                     build_name = entry.get('build_info', {}).get('build_name', 'Unknown')
@@ -1333,6 +1336,32 @@ def display_comparison():
         
         # Display AI analysis
         st.markdown(result['content'])
+        # Test diff counts of the two builds
+        # Test diff counts (large comparisons are made from the test-level diff)
+        if result.get('diff'):
+            diff = result['diff']
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("New Failures", diff['new'])
+            with col2:
+                st.metric("Status Changed", diff['status_changed'])
+            with col3:
+                st.metric("Resolved", diff['resolved'])
+            with col4:
+                st.metric("Persistent", diff['persistent'])
+        
+        # Status matrix trends (three or more builds are compared through a test × build matrix)
+        if result.get('matrix'):
+            matrix = result['matrix']
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Always Failing", matrix['always_failing'])
+            with col2:
+                st.metric("New Failures", matrix['new'])
+            with col3:
+                st.metric("Fixed", matrix['fixed'])
+            with col4:
+                st.metric("Intermittent", matrix['intermittent'])
         
         # Show token usage
         if 'usage' in result and result['usage']:
@@ -1414,12 +1443,11 @@ def display_chat_interface(results, is_comparison=False):
     # Use entry_id to create a unique chat session per analysis
     # This ensures each analysis has its own isolated chat history
     if is_comparison:
-        # For comparisons, create a unique key from both entry IDs
+        # For comparisons, create a unique key from all compared entry IDs
         selected_entries = results.get('selected_entries', [])
         if len(selected_entries) >= 2:
-            id1 = selected_entries[0].get('id', 'a')
-            id2 = selected_entries[1].get('id', 'b')
-            chat_key = f"chat_comparison_{id1}_{id2}"
+            entry_ids = '_'.join(entry.get('id', str(idx)) for idx, entry in enumerate(selected_entries))
+            chat_key = f"chat_comparison_{entry_ids}"
         else:
             chat_key = "chat_comparison_unknown"
     else:
@@ -1499,10 +1527,11 @@ def display_chat_interface(results, is_comparison=False):
         try:
             with chat_container:
                 with st.chat_message("assistant"):
-                    with st.spinner("Thinking..."):
+                    with st.empty():
                         try:
                             # Initialize summarizer
                             summarizer = SummarizerWrapper()
+                            stream = None
                             
                             if is_comparison:
                                 # Comparison chat
@@ -1510,35 +1539,27 @@ def display_chat_interface(results, is_comparison=False):
                                 comparison_result = results.get('comparison_result', {})
                                 
                                 if len(selected_entries) >= 2:
-                                    # Get report contents
-                                    report1_path = selected_entries[0].get('analyzer_results', {}).get('report_path')
-                                    report2_path = selected_entries[1].get('analyzer_results', {}).get('report_path')
-                                    build1_name = selected_entries[0].get('build_info', {}).get('build_name', 'Build 1')
-                                    build2_name = selected_entries[1].get('build_info', {}).get('build_name', 'Build 2')
+                                    # The builds the comparison was made from, in the same order
+                                    builds = []
+                                    for entry in selected_entries:
+                                        report_path = entry.get('analyzer_results', {}).get('report_path')
+                                        if report_path:
+                                            build_name = entry.get('build_info', {}).get('build_name', 'Unknown')
+                                            with open(report_path, 'r') as f:
+                                                builds.append((build_name, f.read()))
                                     
-                                    if report1_path and report2_path:
-                                        # Read report files
-                                        with open(report1_path, 'r') as f:
-                                            report1_content = f.read()
-                                        with open(report2_path, 'r') as f:
-                                            report2_content = f.read()
-                                        
+                                    if len(builds) >= 2:
                                         comparison_summary = comparison_result.get('content', '')
                                         
-                                        success, ai_response, error = summarizer.chat_comparison(
-                                            report1_content,
-                                            report2_content,
+                                        stream = summarizer.stream_chat_builds(
+                                            builds,
                                             comparison_summary,
-                                            build1_name,
-                                            build2_name,
                                             chat_history[:-1],  # Exclude the just-added user message
                                             user_question
                                         )
                                     else:
-                                        success = False
                                         error = "Could not find report paths"
                                 else:
-                                    success = False
                                     error = "Not enough comparison data"
                             else:
                                 # Single report chat
@@ -1558,15 +1579,17 @@ def display_chat_interface(results, is_comparison=False):
                                 with open(error_report_path, 'r') as f:
                                     report_content = f.read()
                                 
-                                success, ai_response, error = summarizer.chat(
+                                stream = summarizer.stream_chat(
                                     report_content,
                                     ai_summary,
                                     chat_history[:-1],  # Exclude the just-added user message
                                     user_question
                                 )
                             
-                            if success:
-                                st.markdown(ai_response)
+                            if stream is not None:
+                                # Render the answer as it is generated
+                                st.caption("Thinking...")
+                                ai_response = st.write_stream(stream)
                                 # Add AI response to chat history
                                 chat_history.append({"role": "assistant", "content": ai_response})
                             else:
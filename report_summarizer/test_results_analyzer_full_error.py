@@ -7,11 +7,28 @@ import os
 import sys
 import argparse
 import re
+import io
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterator, Iterable, IO
 from urllib.parse import urlparse, parse_qs, unquote
+from html.parser import HTMLParser
 import gzip
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
 
 try:
     import requests
@@ -20,13 +37,314 @@ except ImportError:
     sys.exit(1)
 
 
+# Elements of index.html that the summary is read from; everything else is skipped
+# while parsing (test-results tables are streamed separately, see iter_test_results)
+INDEX_SECTIONS = {
+    'div': {'subheader'},
+    'table': {'config-summary'},
+}
+
+
+def _is_index_section(name: str, attrs: Dict) -> bool:
+    """Check whether a tag (by name and raw attributes) is one the analyzer reads"""
+    if name not in INDEX_SECTIONS:
+        return False
+    wanted_classes = INDEX_SECTIONS[name]
+    if wanted_classes is None:
+        return True
+    classes = attrs.get('class') or ''
+    if isinstance(classes, str):
+        classes = classes.split()
+    return bool(wanted_classes.intersection(classes))
+
+
+def _index_page_strainer() -> SoupStrainer:
+    """Build a SoupStrainer that only keeps the index.html sections the analyzer reads"""
+    try:
+        from bs4.filter import ElementFilter  # noqa: F401  (bs4 >= 4.13)
+    except ImportError:
+        # Older bs4 calls a callable name filter with (name, attrs) while parsing
+        return SoupStrainer(_is_index_section)
+
+    class _IndexPageStrainer(SoupStrainer):
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            return _is_index_section(name, attrs or {})
+
+        def allow_string_creation(self, string):
+            return False
+
+    return _IndexPageStrainer()
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """
+    Streaming tag stripper for HTML logs: collects text content as it is fed,
+    skipping script and style elements, without building a document tree.
+
+    Matches BeautifulSoup's get_text() on the html.parser tree, including its
+    collapsing of whitespace-only text nodes outside pre/textarea elements.
+    """
+
+    SKIP_TAGS = ('script', 'style')
+    PRESERVE_WHITESPACE_TAGS = ('pre', 'textarea')
+    VOID_TAGS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+                           'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+                           'command', 'frame', 'image', 'isindex', 'nextid', 'spacer'])
+    ASCII_SPACES = ' \t\n\r\f'
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        # Open elements; an end tag closes everything up to its most recent start tag
+        self._open_tags = []
+        # Void elements written as <tag> whose redundant </tag> is still to be ignored
+        self._closed_void_tags = {}
+        self._skip_depth = 0
+        self._preserve_depth = 0
+        self._pieces = []
+        # Leading whitespace of the current text node, held until it is known
+        # whether the node has any other content
+        self._whitespace = ''
+        self._in_text = False
+
+    def _end_text(self):
+        """Close the current text node"""
+        if self._whitespace:
+            if not self._preserve_depth:
+                self._whitespace = '\n' if '\n' in self._whitespace else ' '
+            if not self._skip_depth:
+                self._pieces.append(self._whitespace)
+            self._whitespace = ''
+        self._in_text = False
+
+    def handle_starttag(self, tag, attrs):
+        self._end_text()
+        if tag in self.VOID_TAGS:
+            self._closed_void_tags[tag] = self._closed_void_tags.get(tag, 0) + 1
+            return
+        self._open_tags.append(tag)
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.PRESERVE_WHITESPACE_TAGS:
+            self._preserve_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._end_text()
+        if tag not in self.VOID_TAGS:
+            self.handle_starttag(tag, attrs)
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self._closed_void_tags.get(tag):
+            # Redundant end tag of a void element; not even the text node ends here
+            self._closed_void_tags[tag] -= 1
+            return
+        self._end_text()
+        if tag not in self._open_tags:
+            return
+        while True:
+            closed = self._open_tags.pop()
+            if closed in self.SKIP_TAGS:
+                self._skip_depth -= 1
+            elif closed in self.PRESERVE_WHITESPACE_TAGS:
+                self._preserve_depth -= 1
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        if self._in_text:
+            if not self._skip_depth:
+                self._pieces.append(data)
+        elif data.strip(self.ASCII_SPACES):
+            if not self._skip_depth:
+                self._pieces.append(self._whitespace + data)
+            self._whitespace = ''
+            self._in_text = True
+        else:
+            self._whitespace += data
+
+    def handle_comment(self, data):
+        self._end_text()
+
+    def handle_decl(self, decl):
+        self._end_text()
+
+    def handle_pi(self, data):
+        self._end_text()
+
+    def unknown_decl(self, data):
+        self._end_text()
+        # CDATA sections are text content, as in BeautifulSoup's get_text()
+        if data.upper().startswith('CDATA['):
+            self.handle_data(data[len('CDATA['):])
+            self._end_text()
+
+    def close(self):
+        super().close()
+        self._end_text()
+
+    def pop_text(self) -> str:
+        """Return the text collected since the last call"""
+        text = ''.join(self._pieces)
+        self._pieces = []
+        return text
+
+
+class LogExcerptCache:
+    """Size-bounded on-disk LRU cache of extracted log excerpts"""
+
+    DEFAULT_DIR = Path(os.environ.get('REPORT_ANALYZER_CACHE_DIR',
+                                      Path.home() / '.cache' / 'report_analyzer')) / 'log_excerpts'
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+    # Bump when extract_error_details output changes so stale excerpts are not reused
+    EXTRACTOR_VERSION = 3
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding cached excerpts (default: ~/.cache/report_analyzer/log_excerpts)
+            max_bytes: Total size above which least recently used entries are evicted
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else self.DEFAULT_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._entries())
+
+    @classmethod
+    def make_key(cls, *parts) -> str:
+        """Build a content-addressed key from the parts identifying a log version"""
+        raw = '\0'.join(str(part) for part in (cls.EXTRACTOR_VERSION,) + parts)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def _entries(self) -> List[Tuple[Path, int, float]]:
+        """List cached entries as (path, size, last_used)"""
+        entries = []
+        for path in self.cache_dir.glob('??/*'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached excerpt for key, or None on a miss"""
+        path = self._path(key)
+        try:
+            value = path.read_text(encoding='utf-8')
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: str):
+        """Store an excerpt, evicting least recently used entries if over the size bound"""
+        path = self._path(key)
+        data = value.encode('utf-8')
+        tmp_path = None
+        try:
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # An overwritten entry no longer counts towards the size
+            try:
+                replaced_size = path.stat().st_size
+            except FileNotFoundError:
+                replaced_size = 0
+            os.replace(tmp_path, path)
+        except OSError:
+            if tmp_path:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return
+
+        with self._lock:
+            self._total_bytes += len(data) - replaced_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache is 10% under its bound"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+    def stats(self) -> Dict:
+        """Return hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'size_bytes': self._total_bytes
+            }
+
+
 class TestResultsAnalyzer:
     """Analyzes test results from HTML files and extracts failure information"""
 
     # Test result statuses that indicate failures
     FAILURE_STATUSES = {'FAIL', 'ERROR', 'NOT RUN', 'SETUP ERROR', 'CLEANUP ERROR', 'PLUGIN ERROR', 'SKIP'}
 
-    def __init__(self, html_file: str, base_url: Optional[str] = None, verbose: bool = False):
+    # Number of logs fetched and parsed concurrently
+    DEFAULT_MAX_WORKERS = 8
+
+    # HTML parsing engines for index.html ('auto' prefers lxml when installed)
+    PARSER_ENGINES = ('auto', 'lxml', 'html.parser')
+
+    # Where local logs are parsed: in the fetching threads, or in worker processes
+    # (sidesteps the GIL for CPU-bound parsing of large logs)
+    EXECUTORS = ('thread', 'process')
+
+    # Log lines that start an error excerpt, and keywords used when none are found
+    ERROR_KEYWORDS = ['error:', 'failed:', 'exception:', 'traceback', 'assert']
+    FALLBACK_KEYWORDS = ['failure', 'fail:', 'error', 'invalid', 'cannot', 'not found', 'missing']
+
+    # Stop scanning a log after this many error keyword hits
+    DEFAULT_MAX_ERROR_HITS = 200
+
+    # Number of leading characters checked to detect HTML-formatted logs
+    HTML_SNIFF_CHARS = 64 * 1024
+
+    # Bytes of a plain remote log fetched with HTTP Range requests (head and tail)
+    REMOTE_HEAD_BYTES = 256 * 1024
+    REMOTE_TAIL_BYTES = 1024 * 1024
+
+    # Layout version of the structured (JSON/NDJSON) report
+    STRUCTURED_REPORT_VERSION = 1
+
+    def __init__(self, html_file: str, base_url: Optional[str] = None, verbose: bool = False,
+                 max_workers: int = DEFAULT_MAX_WORKERS, parser: str = 'auto',
+                 use_cache: bool = True, cache_dir: Optional[str] = None,
+                 max_error_hits: Optional[int] = DEFAULT_MAX_ERROR_HITS, executor: str = 'thread'):
         """
         Initialize the analyzer
 
@@ -34,20 +352,57 @@ class TestResultsAnalyzer:
             html_file: Path to the test results HTML file
             base_url: Optional base URL for resolving relative links
             verbose: Enable verbose output
+            max_workers: Maximum number of logs fetched and parsed concurrently
+            parser: HTML parsing engine for index.html ('auto', 'lxml' or 'html.parser')
+            use_cache: Reuse log excerpts extracted by previous runs from the on-disk cache
+            cache_dir: Directory for the log excerpt cache (default: LogExcerptCache.DEFAULT_DIR)
+            max_error_hits: Stop scanning a log after this many error hits (None = scan everything)
+            executor: 'thread' parses local logs in the fetching threads, 'process' in a
+                pool of max_workers worker processes
         """
+        if parser not in self.PARSER_ENGINES:
+            raise ValueError(f"Unknown parser '{parser}', expected one of {self.PARSER_ENGINES}")
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}', expected one of {self.EXECUTORS}")
+
         self.html_file = Path(html_file)
         self.base_url = base_url
         self.verbose = verbose
+        self.max_workers = max(1, max_workers)
+        self.parser = parser
+        self.max_error_hits = max_error_hits
+        self.executor = executor
+        self._process_pool = None
         self.soup = None
         self.results = {
             'summary': {},
             'test_suites': [],
             'failures': [],
             'total_tests': 0,
-            'failed_tests': 0
+            'failed_tests': 0,
+            'log_timings': [],
+            'log_cache': {},
+            'remote_log_bytes': 0
         }
         self.session = requests.Session()
         self.session.timeout = 10
+        self._remote_bytes_lock = threading.Lock()
+        self.log_cache = None
+        if use_cache:
+            try:
+                self.log_cache = LogExcerptCache(cache_dir)
+            except OSError as e:
+                print(f"Warning: Log excerpt cache disabled: {e}")
+
+    def _resolve_parser(self) -> str:
+        """Pick the parsing engine, falling back to html.parser when lxml is unavailable"""
+        if self.parser == 'html.parser':
+            return 'html.parser'
+        if LXML_AVAILABLE:
+            return 'lxml'
+        if self.parser == 'lxml' and self.verbose:
+            print("  Warning: lxml not installed, falling back to html.parser")
+        return 'html.parser'
 
     def load_html(self) -> bool:
         """Load and parse the HTML file"""
@@ -56,12 +411,20 @@ class TestResultsAnalyzer:
                 print(f"Error: File not found: {self.html_file}")
                 return False
 
-            with open(self.html_file, 'r', encoding='utf-8') as f:
-                html_content = f.read()
+            engine = self._resolve_parser()
+            if engine == 'lxml':
+                # Fast path: lxml only builds the sections the analyzer reads
+                with open(self.html_file, 'rb') as f:
+                    self.soup = BeautifulSoup(f, 'lxml', parse_only=_index_page_strainer(),
+                                              from_encoding='utf-8')
+            else:
+                with open(self.html_file, 'r', encoding='utf-8') as f:
+                    html_content = f.read()
+
+                self.soup = BeautifulSoup(html_content, 'html.parser')
 
-            self.soup = BeautifulSoup(html_content, 'html.parser')
             if self.verbose:
-                print(f"✓ Successfully loaded HTML file: {self.html_file}")
+                print(f"✓ Successfully loaded HTML file: {self.html_file} (parser: {engine})")
             return True
 
         except Exception as e:
@@ -102,54 +465,111 @@ class TestResultsAnalyzer:
             print(f"Warning: Error extracting summary: {e}")
             return summary
 
+    @staticmethod
+    def _suite_from_header(text: str) -> str:
+        """Convert an h3 header text (e.g. 'SUITE: foo') to a suite name"""
+        return text.replace('SUITE: ', '').strip()
+
+    @staticmethod
+    def _build_test_result(suite: Optional[str], cell_texts: List[str], log_link: Optional[str]) -> Dict:
+        """Build a test result record from the text of a row's first three cells"""
+        return {
+            'suite': suite,
+            'name': cell_texts[0].strip(),
+            'status': cell_texts[1].strip(),
+            'failure_message': cell_texts[2].strip(),
+            'log_link': log_link,
+            'detailed_info': None
+        }
+
+    def _iter_test_results_soup(self) -> Iterator[Dict]:
+        """Single forward pass over the parsed tree, tracking the current suite header"""
+        current_suite = None
+        for elem in self.soup.find_all(['h3', 'table']):
+            if elem.name == 'h3':
+                current_suite = self._suite_from_header(elem.get_text())
+                continue
+            if 'test-results' not in (elem.get('class') or []):
+                continue
+
+            for row in elem.find_all('tr')[1:]:  # Skip header row
+                cells = row.find_all('td')
+                if len(cells) >= 3:
+                    link_elem = cells[0].find('a')
+                    log_link = link_elem.get('href') if link_elem and link_elem.get('href') else None
+                    yield self._build_test_result(
+                        current_suite, [cell.get_text() for cell in cells[:3]], log_link
+                    )
+
+    def _iter_test_results_lxml(self) -> Iterator[Dict]:
+        """Stream test rows with lxml iterparse, discarding elements once processed"""
+        current_suite = None
+        table_suite = None
+        table_depth = 0
+        header_depth = 0
+        rows_seen = 0
+
+        for event, elem in etree.iterparse(str(self.html_file), events=('start', 'end'),
+                                           html=True, encoding='utf-8'):
+            tag = elem.tag
+            if event == 'start':
+                if tag == 'h3':
+                    header_depth += 1
+                elif tag == 'table' and 'test-results' in (elem.get('class') or '').split():
+                    if table_depth == 0:
+                        table_suite = current_suite
+                        rows_seen = 0
+                    table_depth += 1
+                continue
+
+            if tag == 'h3':
+                current_suite = self._suite_from_header(''.join(elem.itertext()))
+                header_depth -= 1
+            elif tag == 'tr' and table_depth:
+                rows_seen += 1
+                if rows_seen > 1:  # Skip header row
+                    cells = list(elem.iter('td'))
+                    if len(cells) >= 3:
+                        link_elem = next(cells[0].iter('a'), None)
+                        log_link = link_elem.get('href') if link_elem is not None and link_elem.get('href') else None
+                        yield self._build_test_result(
+                            table_suite, [''.join(cell.itertext()) for cell in cells[:3]], log_link
+                        )
+            elif tag == 'table' and 'test-results' in (elem.get('class') or '').split():
+                table_depth -= 1
+
+            # Rows are still needed for nested lookups until their table closes, and
+            # the markup inside a suite header until the header's text is read
+            if (table_depth and tag != 'tr') or header_depth:
+                continue
+            # Free processed elements so memory stays flat on huge pages
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    def iter_test_results(self) -> Iterator[Dict]:
+        """
+        Yield test results in document order as they are parsed.
+
+        With lxml the page is streamed, so the first rows are available before
+        the whole file has been read; otherwise the loaded tree is walked once.
+        """
+        if self._resolve_parser() == 'lxml':
+            return self._iter_test_results_lxml()
+        return self._iter_test_results_soup()
+
     def extract_test_results(self) -> List[Dict]:
         """Extract all test results from the HTML"""
         test_data = []
         try:
-            # Find all test result tables
-            test_tables = self.soup.find_all('table', class_='test-results')
-
-            current_suite = None
-            for table in test_tables:
-                # Get the suite name from the h3 before the table
-                h3 = table.find_previous('h3')
-                if h3:
-                    current_suite = h3.get_text().replace('SUITE: ', '').strip()
-
-                # Process each row in the table
-                for row in table.find_all('tr')[1:]:  # Skip header row
-                    cells = row.find_all('td')
-                    if len(cells) >= 3:
-                        test_name_cell = cells[0]
-                        status_cell = cells[1]
-                        failure_msg_cell = cells[2]
-
-                        test_name = test_name_cell.get_text().strip()
-                        status = status_cell.get_text().strip()
-                        failure_msg = failure_msg_cell.get_text().strip()
-
-                        # Extract log link if available
-                        log_link = None
-                        link_elem = test_name_cell.find('a')
-                        if link_elem and link_elem.get('href'):
-                            log_link = link_elem.get('href')
-
-                        test_result = {
-                            'suite': current_suite,
-                            'name': test_name,
-                            'status': status,
-                            'failure_message': failure_msg,
-                            'log_link': log_link,
-                            'detailed_info': None
-                        }
+            for test_result in self.iter_test_results():
+                test_data.append(test_result)
 
-                        test_data.append(test_result)
-
-                        # Count results
-                        self.results['total_tests'] += 1
-                        if status in self.FAILURE_STATUSES:
-                            self.results['failed_tests'] += 1
-                            self.results['failures'].append(test_result)
+                # Count results
+                self.results['total_tests'] += 1
+                if test_result['status'] in self.FAILURE_STATUSES:
+                    self.results['failed_tests'] += 1
+                    self.results['failures'].append(test_result)
 
             self.results['test_suites'] = test_data
             if self.verbose:
@@ -218,102 +638,294 @@ class TestResultsAnalyzer:
                 print(f"  Warning: Error extracting local path from URL: {e}")
             return None
 
-    def fetch_log_content(self, log_link: str) -> Optional[str]:
-        """Fetch the content from a log link, prioritizing local file access"""
+    def _resolve_log_source(self, log_link: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Resolve a log link to where its content can be read from, prioritizing local files.
+
+        Returns:
+            Tuple of (local_path, url); at most one of them is set
+        """
+        if not log_link:
+            return None, None
+
+        # Handle local file paths with file:// protocol
+        if log_link.startswith('file://'):
+            file_path = log_link.replace('file://', '')
+            if os.path.exists(file_path):
+                return file_path, None
+            return None, None
+
+        if not log_link.startswith('http'):
+            return None, None
+
+        # Direct URL fetch (non-log_view.html links)
+        if not ('log_view.html' in log_link and 'page=' in log_link):
+            return None, log_link
+
+        # Handle URLs with log_view.html (extract the actual log URL from page parameter)
+        parsed_url = urlparse(log_link)
+        query_params = parse_qs(parsed_url.query)
+        if 'page' not in query_params:
+            return None, None
+        actual_log_url = query_params['page'][0]
+
+        # First, try to extract and access local file path
+        local_path = self._extract_local_path_from_url(actual_log_url)
+        if local_path and os.path.exists(local_path):
+            if self.verbose:
+                print(f"      └─ Using local file: {local_path}")
+            return local_path, None
+
+        # Fallback to URL fetch if local path not found
+        if self.verbose and local_path:
+            print(f"      └─ Local path not found at {local_path[:80]}, trying URL fetch")
+        return None, actual_log_url
+
+    def _count_remote_bytes(self, num_bytes: int):
+        """Add to the number of bytes transferred for remote logs"""
+        with self._remote_bytes_lock:
+            self.results['remote_log_bytes'] += num_bytes
+
+    @staticmethod
+    def _content_range_total(response) -> Optional[int]:
+        """Total resource size from a 206 response's Content-Range header"""
+        match = re.match(r'bytes\s+\d+-\d+/(\d+)', response.headers.get('Content-Range', ''))
+        return int(match.group(1)) if match else None
+
+    def _extract_from_response_stream(self, response) -> Optional[str]:
+        """Extract error details from a streamed response body without materialising it"""
+        response.raw.decode_content = True  # Undo any Content-Encoding transparently
+        response.raw.auto_close = False  # Keep reads at EOF valid for the buffered wrappers
+        stream = io.BufferedReader(response.raw)
+        gzipped = stream.peek(2)[:2] == b'\x1f\x8b'
         try:
-            if not log_link:
-                return None
+            return self.extract_error_details_from_stream(stream, gzipped=gzipped)
+        finally:
+            self._count_remote_bytes(response.raw.tell())
 
-            # Handle local file paths with file:// protocol
-            if log_link.startswith('file://'):
-                file_path = log_link.replace('file://', '')
-                if os.path.exists(file_path):
-                    if file_path.endswith('.gz'):
-                        with gzip.open(file_path, 'rt', encoding='utf-8', errors='ignore') as f:
-                            return f.read()
-                    else:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            return f.read()
-                return None
+    def _remote_log_cache_key(self, url: str, response) -> Optional[str]:
+        """
+        Build the cache key for a remote log from the validators of its first response
+        (ETag/Last-Modified plus total size). Returns None when the server sends neither.
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not (etag or last_modified):
+            return None
+        if response.status_code == 206:
+            total = self._content_range_total(response)
+            size = str(total) if total is not None else None
+        else:
+            size = response.headers.get('Content-Length')
+        return LogExcerptCache.make_key('url', url, etag, last_modified, size)
 
-            # Handle URLs with log_view.html (extract the actual log URL from page parameter)
-            if log_link.startswith('http'):
-                try:
-                    # Check if it's a log_view.html link with a page parameter
-                    if 'log_view.html' in log_link and 'page=' in log_link:
-                        # Extract the actual log file URL from the page parameter
-                        parsed_url = urlparse(log_link)
-                        query_params = parse_qs(parsed_url.query)
-                        if 'page' in query_params:
-                            actual_log_url = query_params['page'][0]
-
-                            # First, try to extract and access local file path
-                            local_path = self._extract_local_path_from_url(actual_log_url)
-                            if local_path and os.path.exists(local_path):
-                                if self.verbose:
-                                    print(f"      └─ Using local file: {local_path}")
-                                if local_path.endswith('.gz'):
-                                    with gzip.open(local_path, 'rt', encoding='utf-8', errors='ignore') as f:
-                                        return f.read()
-                                else:
-                                    with open(local_path, 'r', encoding='utf-8', errors='ignore') as f:
-                                        return f.read()
-
-                            # Fallback to URL fetch if local path not found
-                            if self.verbose and local_path:
-                                print(f"      └─ Local path not found at {local_path[:80]}, trying URL fetch")
-
-                            try:
-                                # Try to fetch the actual log file from URL
-                                response = self.session.get(actual_log_url, timeout=10, verify=False, stream=True)
-                                if response.status_code == 200:
-                                    # If it's gzipped content, decompress it
-                                    if actual_log_url.endswith('.gz') or response.headers.get('Content-Encoding') == 'gzip':
-                                        try:
-                                            return gzip.decompress(response.content).decode('utf-8', errors='ignore')
-                                        except Exception:
-                                            # If decompression fails, try treating as plain text
-                                            return response.text
-                                    return response.text
-                            except requests.exceptions.Timeout:
-                                if self.verbose:
-                                    print(f"  Warning: Timeout fetching URL {actual_log_url}")
-                                return None
-                            except Exception as e:
-                                if self.verbose:
-                                    print(f"  Warning: Could not fetch URL: {type(e).__name__}")
-                                return None
-                    else:
-                        # Direct URL fetch (non-log_view.html links)
-                        try:
-                            response = self.session.get(log_link, timeout=10, verify=False, stream=True)
-                            if response.status_code == 200:
-                                if log_link.endswith('.gz') or response.headers.get('Content-Encoding') == 'gzip':
-                                    try:
-                                        return gzip.decompress(response.content).decode('utf-8', errors='ignore')
-                                    except Exception:
-                                        return response.text
-                                return response.text
-                        except requests.exceptions.Timeout:
-                            if self.verbose:
-                                print(f"  Warning: Timeout fetching URL {log_link}")
-                            return None
-                        except Exception as e:
-                            if self.verbose:
-                                print(f"  Warning: Could not fetch URL: {type(e).__name__}")
-                            return None
+    def _extract_remote_log(self, url: str) -> Tuple[Optional[str], Optional[str], bool]:
+        """
+        Extract error details from a remote log, transferring only what is needed.
 
-                except Exception as e:
-                    if self.verbose:
-                        print(f"  Warning: Error processing log link: {e}")
-                    return None
+        Plain logs are read with HTTP Range requests for the head and tail; gzip
+        logs (and servers that ignore Range) are stream-decompressed and scanned.
+        The cache is checked as soon as the first response's headers arrive, so a
+        cached log costs no extra request and no body transfer.
 
-            return None
+        Returns:
+            Tuple of (error_details, cache_key, cached)
+        """
+        headers = {}
+        if not url.endswith('.gz'):
+            # Ranges must apply to the stored bytes, not a compressed transfer
+            headers = {'Range': f'bytes=0-{self.REMOTE_HEAD_BYTES - 1}', 'Accept-Encoding': 'identity'}
 
+        cache_key = None
+        try:
+            with self.session.get(url, headers=headers, timeout=10, verify=False, stream=True) as response:
+                if response.status_code not in (200, 206):
+                    return None, None, False
+                if self.log_cache:
+                    cache_key = self._remote_log_cache_key(url, response)
+                    if cache_key:
+                        error_details = self.log_cache.get(cache_key)
+                        if error_details is not None:
+                            return error_details, cache_key, True
+                if response.status_code == 200:
+                    # Full body (gzip log, or Range not supported)
+                    return self._extract_from_response_stream(response), cache_key, False
+                head = response.content
+                total = self._content_range_total(response)
+            self._count_remote_bytes(len(head))
+
+            tail = b''
+            if total is not None and total > len(head):
+                tail_start = max(len(head), total - self.REMOTE_TAIL_BYTES)
+                range_headers = {'Range': f'bytes={tail_start}-', 'Accept-Encoding': 'identity'}
+                with self.session.get(url, headers=range_headers, timeout=10, verify=False) as response:
+                    if response.status_code == 206:
+                        tail = response.content
+                        self._count_remote_bytes(len(tail))
+                if tail_start > len(head):
+                    # Skipped a gap: drop the partial lines at the edges of both ranges
+                    head = head[:head.rfind(b'\n') + 1]
+                    tail = tail[tail.find(b'\n') + 1:]
+
+            content = (head + tail).decode('utf-8', errors='ignore')
+            return (self.extract_error_details(content) if content else None), cache_key, False
+
+        except requests.exceptions.Timeout:
+            if self.verbose:
+                print(f"  Warning: Timeout fetching URL {url}")
+            return None, None, False
         except Exception as e:
             if self.verbose:
-                print(f"  Warning: Error fetching log content: {e}")
-            return None
+                print(f"  Warning: Could not fetch URL: {type(e).__name__}")
+            return None, None, False
+
+    @staticmethod
+    def _find_keyword_lines(text_lower: str, keywords: List[str], end: int) -> set:
+        """
+        Return the start offsets of lines before end containing any of the keywords.
+
+        Each keyword is located with str.find over the whole lowercased block, which
+        runs in C and skips non-matching lines entirely; after a hit the search
+        resumes on the next line.
+        """
+        line_starts = set()
+        for keyword in keywords:
+            pos = text_lower.find(keyword, 0, end)
+            while pos != -1:
+                line_starts.add(text_lower.rfind('\n', 0, pos) + 1)
+                line_end = text_lower.find('\n', pos)
+                if line_end == -1:
+                    break
+                pos = text_lower.find(keyword, line_end + 1, end)
+        return line_starts
+
+    def _extract_error_lines(self, text_blocks: Iterable[str]) -> List[str]:
+        """
+        Scan log text once and collect error lines with up to 3 lines of context.
+
+        Text arrives in blocks of whole lines so a log can be streamed; the last 3
+        lines of each block are carried over as lookahead for the next one. Each
+        block is lowercased once and keyword lines are located with
+        _find_keyword_lines, so only matching lines are visited individually.
+        Fallback keywords are only searched while no error line has been found,
+        since they are used only if there is none. Scanning stops after
+        max_error_hits error hits.
+        """
+        error_lines = []
+        fallback_lines = []
+        hits = 0
+        max_hits = self.max_error_hits
+        carry = None
+
+        for block in chain(text_blocks, [None]):
+            if block is None:
+                if carry is None:
+                    break
+                text = carry
+                cut = len(text)
+            else:
+                text = block if carry is None else carry + '\n' + block
+                # Hold back the last 3 lines until their lookahead is available
+                cut = len(text)
+                for _ in range(3):
+                    cut = text.rfind('\n', 0, cut)
+                    if cut == -1:
+                        break
+                cut += 1  # Start of the third-to-last line (0 if there are fewer lines)
+
+            text_lower = text.lower()
+            if len(text_lower) != len(text):
+                # Only U+0130 lowercases to two characters; it can't be part of a
+                # keyword match, so a placeholder keeps offsets aligned
+                text_lower = text.replace('\u0130', '\x00').lower()
+
+            error_starts = self._find_keyword_lines(text_lower, self.ERROR_KEYWORDS, cut)
+            fallback_starts = set()
+            if not error_lines and not error_starts and (not max_hits or len(fallback_lines) < max_hits):
+                fallback_starts = self._find_keyword_lines(text_lower, self.FALLBACK_KEYWORDS, cut)
+
+            for line_start in sorted(error_starts or fallback_starts):
+                line_end = text_lower.find('\n', line_start)
+                if line_end == -1:
+                    line_end = len(text_lower)
+
+                if line_start not in error_starts:
+                    # Important keywords, only used if no specific errors are found
+                    if max_hits and len(fallback_lines) >= max_hits:
+                        break
+                    fallback_lines.append(text[line_start:line_end].strip())
+                    continue
+
+                # Add the line and some context around it
+                error_lines.append(text[line_start:line_end].strip())
+                hits += 1
+
+                # Add next few lines for context (usually contain error details)
+                next_end = line_end
+                for _ in range(3):
+                    if next_end >= len(text):
+                        break
+                    next_start = next_end + 1
+                    next_end = text_lower.find('\n', next_start)
+                    if next_end == -1:
+                        next_end = len(text_lower)
+                    next_line = text[next_start:next_end].strip()
+                    next_lower = text_lower[next_start:next_end]
+                    if next_line and 'at line' not in next_lower and 'file' not in next_lower:
+                        error_lines.append(next_line)
+                    if 'at line' in next_lower or 'traceback' in next_lower:
+                        break
+
+                if max_hits and hits >= max_hits:
+                    return error_lines
+
+            carry = text[cut:] if block is not None else None
+
+        return error_lines if error_lines else fallback_lines
+
+    @staticmethod
+    def _iter_line_blocks(chunks: Iterable[str]) -> Iterator[str]:
+        """Regroup text chunks into blocks of whole lines (without the final newline)"""
+        partial = ''
+        for chunk in chunks:
+            text = partial + chunk
+            last_newline = text.rfind('\n')
+            if last_newline == -1:
+                partial = text
+                continue
+            partial = text[last_newline + 1:]
+            yield text[:last_newline]
+        yield partial
+
+    @classmethod
+    def _iter_text_blocks(cls, text_stream: IO[str], head: str, block_chars: int = 256 * 1024) -> Iterator[str]:
+        """Split a text stream into blocks of whole lines, reading block_chars at a time"""
+        return cls._iter_line_blocks(chain([head], iter(lambda: text_stream.read(block_chars), '')))
+
+    @staticmethod
+    def _iter_html_text(text_stream: IO[str], head: str, block_chars: int = 256 * 1024) -> Iterator[str]:
+        """Strip tags from an HTML text stream block by block, yielding its text content"""
+        extractor = _HTMLTextExtractor()
+        for chunk in chain([head], iter(lambda: text_stream.read(block_chars), '')):
+            extractor.feed(chunk)
+            yield extractor.pop_text()
+        extractor.close()
+        yield extractor.pop_text()
+
+    @staticmethod
+    def _format_error_lines(error_lines: List[str]) -> str:
+        """Clean up, deduplicate and join extracted error lines"""
+        error_lines = [line for line in error_lines if line]
+        error_lines = list(dict.fromkeys(error_lines))  # Remove duplicates while preserving order
+        return '\n'.join(error_lines) if error_lines else "No specific error details found in log"
+
+    @staticmethod
+    def _html_to_text(log_content: str) -> str:
+        """Convert an HTML log to plain text, dropping script and style elements"""
+        extractor = _HTMLTextExtractor()
+        extractor.feed(log_content)
+        extractor.close()
+        return extractor.pop_text()
 
     def extract_error_details(self, log_content: str) -> str:
         """Extract error details from log content"""
@@ -322,75 +934,173 @@ class TestResultsAnalyzer:
 
         try:
             # Try to parse as HTML if it's an HTML log
-            if '<html' in log_content.lower() or '<body' in log_content.lower():
-                soup = BeautifulSoup(log_content, 'html.parser')
-                # Remove script and style elements
-                for script in soup(['script', 'style']):
-                    script.decompose()
-                text = soup.get_text()
+            content_lower = log_content.lower()
+            if '<html' in content_lower or '<body' in content_lower:
+                text = self._html_to_text(log_content)
             else:
                 text = log_content
 
             # Extract error/failure lines with context
-            lines = text.split('\n')
-            error_lines = []
-            exception_started = False
-
-            for idx, line in enumerate(lines):
-                line_lower = line.lower()
-                line_stripped = line.strip()
-
-                # Look for error keywords
-                if any(keyword in line_lower for keyword in ['error:', 'failed:', 'exception:', 'traceback', 'assert']):
-                    # Add the line and some context around it
-                    error_lines.append(line_stripped)
-                    exception_started = True
-
-                    # Add next few lines for context (usually contain error details)
-                    for j in range(idx + 1, min(idx + 4, len(lines))):
-                        next_line = lines[j].strip()
-                        if next_line and not any(k in next_line.lower() for k in ['at line', 'file']):
-                            error_lines.append(next_line)
-                        if 'at line' in lines[j].lower() or 'traceback' in lines[j].lower():
-                            break
-
-            # If no specific errors found, look for important keywords
-            if not error_lines:
-                important_keywords = ['failure', 'fail:', 'error', 'invalid', 'cannot', 'not found', 'missing']
-                for line in lines:
-                    if any(keyword in line.lower() for keyword in important_keywords):
-                        error_lines.append(line.strip())
-
-            # Clean up and deduplicate
-            error_lines = [line for line in error_lines if line]
-            error_lines = list(dict.fromkeys(error_lines))  # Remove duplicates while preserving order
-
-            # Limit to first 15 lines
-            return '\n'.join(error_lines) if error_lines else "No specific error details found in log"
+            return self._format_error_lines(self._extract_error_lines([text]))
 
         except Exception as e:
             return f"Error parsing log content: {e}"
 
+    def extract_error_details_from_stream(self, stream: IO[bytes], gzipped: bool = False) -> Optional[str]:
+        """
+        Extract error details from a binary log stream without loading it whole.
+
+        Gzip is decompressed incrementally and lines are scanned as they are
+        decoded in blocks. HTML logs (detected in the first HTML_SNIFF_CHARS
+        characters) are passed through the tag stripper block by block first.
+
+        Returns:
+            Error details, or None if the log is empty
+        """
+        raw = gzip.GzipFile(fileobj=stream) if gzipped else stream
+        text_stream = io.TextIOWrapper(raw, encoding='utf-8', errors='ignore', newline='\n')
+
+        try:
+            head = text_stream.read(self.HTML_SNIFF_CHARS)
+            if not head:
+                return None
+
+            head_lower = head.lower()
+            if '<html' in head_lower or '<body' in head_lower:
+                text_blocks = self._iter_line_blocks(self._iter_html_text(text_stream, head))
+            else:
+                text_blocks = self._iter_text_blocks(text_stream, head)
+
+            return self._format_error_lines(self._extract_error_lines(text_blocks))
+
+        except Exception as e:
+            return f"Error parsing log content: {e}"
+        finally:
+            text_stream.detach()
+
+    @staticmethod
+    def _log_cache_key(local_path: str) -> str:
+        """
+        Build the cache key for a local log: resolved path plus mtime/size. Remote logs
+        are keyed from their first response instead (see _remote_log_cache_key).
+        """
+        stat = os.stat(local_path)
+        return LogExcerptCache.make_key('local', os.path.realpath(local_path),
+                                        stat.st_mtime_ns, stat.st_size)
+
+    def _process_failure_log(self, failure: Dict) -> Tuple[Optional[str], float, bool]:
+        """Fetch and parse the log of a single failure, returning (error_details, seconds, cached)"""
+        start = time.perf_counter()
+        error_details = None
+        local_path, url = self._resolve_log_source(failure['log_link'])
+
+        cache_key = None
+        if self.log_cache and local_path:
+            try:
+                cache_key = self._log_cache_key(local_path)
+            except OSError:
+                cache_key = None
+            if cache_key:
+                error_details = self.log_cache.get(cache_key)
+                if error_details is not None:
+                    return error_details, time.perf_counter() - start, True
+
+        try:
+            if local_path and self._process_pool:
+                # Only the path is sent to the worker process, only the excerpt comes back
+                error_details = self._process_pool.submit(
+                    _extract_log_file_excerpt, local_path, self.max_error_hits).result()
+            elif local_path:
+                # Stream local logs line by line instead of reading them whole
+                with open(local_path, 'rb') as f:
+                    error_details = self.extract_error_details_from_stream(f, gzipped=local_path.endswith('.gz'))
+            elif url:
+                error_details, cache_key, cached = self._extract_remote_log(url)
+                if cached:
+                    return error_details, time.perf_counter() - start, True
+        except Exception as e:
+            if self.verbose:
+                print(f"  Warning: Error fetching log content: {e}")
+            error_details = None
+
+        if cache_key and error_details and not error_details.startswith('Error parsing log content'):
+            self.log_cache.put(cache_key, error_details)
+        return error_details, time.perf_counter() - start, False
+
     def analyze_failures(self, fetch_logs: bool = False) -> List[Dict]:
         """Analyze failed tests and extract details"""
         try:
+            failures = self.results['failures']
             if self.verbose:
-                print(f"\nAnalyzing {len(self.results['failures'])} failed/error tests...")
+                print(f"\nAnalyzing {len(failures)} failed/error tests...")
 
-            for idx, failure in enumerate(self.results['failures'], 1):
+            if not fetch_logs:
                 if self.verbose:
-                    print(f"  [{idx}/{len(self.results['failures'])}] {failure['suite']} > {failure['name']} ({failure['status']})")
-
-                # Fetch and extract error details if requested
-                if fetch_logs and failure['log_link']:
-                    log_content = self.fetch_log_content(failure['log_link'])
-                    if log_content:
-                        error_details = self.extract_error_details(log_content)
-                        failure['detailed_info'] = error_details
-                        if self.verbose and error_details:
-                            print(f"      └─ Error details extracted")
+                    for idx, failure in enumerate(failures, 1):
+                        print(f"  [{idx}/{len(failures)}] {failure['suite']} > {failure['name']} ({failure['status']})")
+                return failures
+
+            # Fetch and parse logs concurrently; results are written back by index
+            # so the failure order is preserved regardless of completion order
+            pending = [(idx, failure) for idx, failure in enumerate(failures) if failure['log_link']]
+            timings = [None] * len(failures)
+            start = time.perf_counter()
+
+            if pending:
+                workers = min(self.max_workers, len(pending))
+                # In process mode the threads hand local logs to a process pool (see
+                # _process_failure_log); the pool is shut down with the thread pool
+                if self.executor == 'process':
+                    self._process_pool = ProcessPoolExecutor(max_workers=workers)
+                with ThreadPoolExecutor(max_workers=workers) as executor, (self._process_pool or nullcontext()):
+                    futures = {
+                        executor.submit(self._process_failure_log, failure): idx
+                        for idx, failure in pending
+                    }
+                    for done, future in enumerate(as_completed(futures), 1):
+                        idx = futures[future]
+                        failure = failures[idx]
+                        try:
+                            error_details, elapsed, cached = future.result()
+                        except Exception as e:
+                            error_details, elapsed, cached = None, 0.0, False
+                            if self.verbose:
+                                print(f"  Warning: Error processing log for {failure['name']}: {e}")
+
+                        if error_details:
+                            failure['detailed_info'] = error_details
+                        timings[idx] = {
+                            'suite': failure['suite'],
+                            'name': failure['name'],
+                            'seconds': round(elapsed, 3),
+                            'extracted': bool(error_details),
+                            'cached': cached
+                        }
 
-            return self.results['failures']
+                        if self.verbose:
+                            print(f"  [{done}/{len(pending)}] {failure['suite']} > {failure['name']} "
+                                  f"({failure['status']}) - {elapsed:.2f}s{' (cached)' if cached else ''}")
+                            if error_details:
+                                print(f"      └─ Error details extracted")
+                self._process_pool = None
+
+            self.results['log_timings'] = [t for t in timings if t is not None]
+            if self.log_cache:
+                self.results['log_cache'] = self.log_cache.stats()
+
+            if self.verbose and pending:
+                total = time.perf_counter() - start
+                slowest = max(t['seconds'] for t in self.results['log_timings'])
+                print(f"✓ Processed {len(pending)} logs in {total:.2f}s "
+                      f"(workers: {min(self.max_workers, len(pending))}, {self.executor} executor, slowest: {slowest:.2f}s)")
+                if self.results['remote_log_bytes']:
+                    print(f"  - Remote log bytes transferred: {self.results['remote_log_bytes']:,}")
+                if self.log_cache:
+                    stats = self.results['log_cache']
+                    print(f"  - Log cache: {stats['hits']} hits, {stats['misses']} misses, "
+                          f"{stats['evictions']} evictions")
+
+            return failures
 
         except Exception as e:
             print(f"Warning: Error analyzing failures: {e}")
@@ -469,6 +1179,56 @@ class TestResultsAnalyzer:
         report.append("\n" + "=" * 80)
         return "\n".join(report)
 
+    def _structured_report_header(self) -> Dict:
+        """Report-level fields of the structured report"""
+        total = self.results['total_tests']
+        failed = self.results['failed_tests']
+        return {
+            'version': self.STRUCTURED_REPORT_VERSION,
+            'html_file': str(self.html_file),
+            'summary': self.results['summary'],
+            'total_tests': total,
+            'failed_tests': failed,
+            'pass_rate': round((total - failed) / total * 100, 1) if total > 0 else None
+        }
+
+    def _iter_structured_tests(self) -> Iterator[Dict]:
+        """Per-test records of the structured report, with the extracted log excerpt"""
+        for test in self.results['test_suites']:
+            record = dict(test)
+            record['failed'] = test['status'] in self.FAILURE_STATUSES
+            yield record
+
+    def generate_structured_report(self) -> Dict:
+        """
+        Generate a machine-readable report: summary counts plus one record per test
+        (suite, name, status, failure_message, log_link, detailed_info, failed)
+        """
+        report = self._structured_report_header()
+        report['tests'] = list(self._iter_structured_tests())
+        return report
+
+    def save_structured_report(self, output_file: str) -> bool:
+        """
+        Save the structured report as JSON, or as NDJSON when output_file ends in
+        .ndjson/.jsonl: a {"record": "report", ...} line followed by one
+        {"record": "test", ...} line per test, written as they are serialized
+        """
+        try:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                if output_file.endswith(('.ndjson', '.jsonl')):
+                    f.write(json.dumps({'record': 'report', **self._structured_report_header()}, ensure_ascii=False) + '\n')
+                    for record in self._iter_structured_tests():
+                        f.write(json.dumps({'record': 'test', **record}, ensure_ascii=False) + '\n')
+                else:
+                    json.dump(self.generate_structured_report(), f, ensure_ascii=False)
+            if self.verbose:
+                print(f"✓ Structured report saved to: {output_file}")
+            return True
+        except Exception as e:
+            print(f"Error saving structured report: {e}")
+            return False
+
     def run(self, fetch_logs: bool = False) -> bool:
         """Run the complete analysis"""
         print("Starting Test Results Analysis...\n")
@@ -502,6 +1262,18 @@ class TestResultsAnalyzer:
             return False
 
 
+@lru_cache(maxsize=None)
+def _worker_analyzer(max_error_hits: Optional[int]) -> TestResultsAnalyzer:
+    """Analyzer reused by a worker process for extracting log excerpts"""
+    return TestResultsAnalyzer('', use_cache=False, max_error_hits=max_error_hits)
+
+
+def _extract_log_file_excerpt(path: str, max_error_hits: Optional[int]) -> Optional[str]:
+    """Process-pool worker: extract the error excerpt of a local log file"""
+    with open(path, 'rb') as f:
+        return _worker_analyzer(max_error_hits).extract_error_details_from_stream(f, gzipped=path.endswith('.gz'))
+
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(
@@ -516,6 +1288,11 @@ def main():
         help='Save report to output file',
         default=None
     )
+    parser.add_argument(
+        '-j', '--json-output',
+        help='Also save a structured report (JSON, or NDJSON if the file ends in .ndjson/.jsonl)',
+        default=None
+    )
     parser.add_argument(
         '-l', '--fetch-logs',
         action='store_true',
@@ -531,6 +1308,42 @@ def main():
         help='Base URL for resolving relative links',
         default=None
     )
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        help=f'Number of logs to fetch and parse concurrently (default: {TestResultsAnalyzer.DEFAULT_MAX_WORKERS})',
+        default=TestResultsAnalyzer.DEFAULT_MAX_WORKERS
+    )
+    parser.add_argument(
+        '-x', '--executor',
+        choices=TestResultsAnalyzer.EXECUTORS,
+        help='Parse local logs in threads or in worker processes, for CPU-bound parsing '
+             'of large logs on multi-core hosts (default: thread)',
+        default='thread'
+    )
+    parser.add_argument(
+        '-p', '--parser',
+        choices=TestResultsAnalyzer.PARSER_ENGINES,
+        help='HTML parsing engine for index.html (default: auto, uses lxml when installed)',
+        default='auto'
+    )
+    parser.add_argument(
+        '--max-error-hits',
+        type=int,
+        help=f'Stop scanning a log after this many error hits, 0 = no limit '
+             f'(default: {TestResultsAnalyzer.DEFAULT_MAX_ERROR_HITS})',
+        default=TestResultsAnalyzer.DEFAULT_MAX_ERROR_HITS
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not read or write the on-disk log excerpt cache'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        help='Directory for the log excerpt cache (default: ~/.cache/report_analyzer/log_excerpts)',
+        default=None
+    )
 
     args = parser.parse_args()
 
@@ -538,7 +1351,13 @@ def main():
     analyzer = TestResultsAnalyzer(
         html_file=args.html_file,
         base_url=args.base_url,
-        verbose=args.verbose
+        verbose=args.verbose,
+        max_workers=args.workers,
+        parser=args.parser,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+        max_error_hits=args.max_error_hits or None,
+        executor=args.executor
     )
 
     # Run analysis
@@ -549,6 +1368,8 @@ def main():
         # Save report if requested
         if args.output:
             analyzer.save_report(args.output)
+        if args.json_output:
+            analyzer.save_structured_report(args.json_output)
     else:
         sys.exit(1)
 
@@ -31,7 +31,9 @@ class AnalyzerWrapper:
         self,
         index_html_path: Path,
         fetch_logs: bool = False,
-        verbose: bool = False
+        verbose: bool = False,
+        max_workers: Optional[int] = None,
+        executor: Optional[str] = None
     ) -> Tuple[bool, Optional[str], Optional[Dict]]:
         """
         Analyze test results from index.html file.
@@ -40,6 +42,9 @@ class AnalyzerWrapper:
             index_html_path: Path to index.html file (NOT detail.html)
             fetch_logs: Whether to fetch detailed logs (slower)
             verbose: Enable verbose output
+            max_workers: Number of logs fetched concurrently (None = analyzer default)
+            executor: 'thread' or 'process' to parse local logs in worker processes
+                      (None = analyzer default)
             
         Returns:
             Tuple of (success, report_path, results_dict)
@@ -56,10 +61,17 @@ class AnalyzerWrapper:
                 return False, None, {"error": f"Expected index.html but got: {index_html_path.name}"}
             
             # Create analyzer instance
+            analyzer_kwargs = {}
+            if max_workers is not None:
+                analyzer_kwargs['max_workers'] = max_workers
+            if executor is not None:
+                analyzer_kwargs['executor'] = executor
+            
             self.analyzer = TestResultsAnalyzer(
                 html_file=str(index_html_path),
                 base_url=None,
-                verbose=verbose
+                verbose=verbose,
+                **analyzer_kwargs
             )
             
             # Run analysis with fetch_logs parameter
@@ -79,17 +91,26 @@ class AnalyzerWrapper:
             if not self.analyzer.save_report(str(report_path)):
                 return False, None, {"error": "Failed to save report"}
             
+            # Structured artifact next to the text report, read by the summarizer
+            # instead of re-parsing the text (see read_structured_report)
+            structured_report_path = report_path.with_suffix('.json')
+            if not self.analyzer.save_structured_report(str(structured_report_path)):
+                structured_report_path = None
+            
             self.report_path = report_path
             self.results = self.analyzer.results
             
             # Return results dictionary
             results_dict = {
                 'report_path': str(report_path),
+                'structured_report_path': str(structured_report_path) if structured_report_path else None,
                 'summary': self.analyzer.results.get('summary', {}),
                 'total_tests': self.analyzer.results.get('total_tests', 0),
                 'failed_tests': self.analyzer.results.get('failed_tests', 0),
                 'failures': self.analyzer.results.get('failures', []),
-                'test_suites': self.analyzer.results.get('test_suites', [])
+                'test_suites': self.analyzer.results.get('test_suites', []),
+                'log_timings': self.analyzer.results.get('log_timings', []),
+                'log_cache': self.analyzer.results.get('log_cache', {})
             }
             
             return True, str(report_path), results_dict
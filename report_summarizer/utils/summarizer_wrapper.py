@@ -2,9 +2,11 @@
 Summarizer Wrapper - Wraps circuit_langchain_summarizer.py functionality
 """
 
+import asyncio
 import sys
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional, Tuple, Dict, List
+from typing import Optional, Tuple, Dict, List, Iterator
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -14,12 +16,30 @@ try:
         get_oauth_token,
         initialize_llm,
         read_report_file,
+        read_structured_report,
         analyze_report,
         quick_summarize_report,
         compare_reports,
+        compare_builds,
         chat_with_report,
         chat_with_comparison,
+        chat_with_builds,
+        aanalyze_report,
+        aquick_summarize_report,
+        acompare_reports,
+        acompare_builds,
+        achat_with_report,
+        achat_with_comparison,
+        achat_with_builds,
+        stream_report_analysis,
+        stream_chat_with_report,
+        stream_chat_with_comparison,
+        stream_chat_with_builds,
         test_token_validity,
+        bypass_llm_cache,
+        get_llm_cache,
+        get_rate_limiter,
+        get_stage_stats,
         CLIENT_ID,
         CLIENT_SECRET
     )
@@ -32,11 +52,23 @@ except ImportError as e:
 class SummarizerWrapper:
     """Wrapper for circuit_langchain_summarizer.py functionality"""
     
-    def __init__(self):
-        """Initialize the summarizer wrapper"""
+    # Attempts per call: the first one, plus one with a fresh token if it expired
+    MAX_RETRIES = 2
+    
+    def __init__(self, use_cache: bool = True):
+        """
+        Initialize the summarizer wrapper
+        
+        Args:
+            use_cache: Reuse cached LLM responses for identical requests (False bypasses the
+                       cache for this wrapper's requests only)
+        """
         self.llm = None
         self.last_analysis = None
+        self.last_stream_result = None
         self.access_token = None
+        self._init_lock = None  # asyncio.Lock, created on first async use
+        self.use_cache = use_cache
     
     def initialize(self, force_refresh=False) -> Tuple[bool, Optional[str]]:
         """
@@ -73,83 +105,192 @@ class SummarizerWrapper:
         except Exception as e:
             return False, f"Failed to initialize summarizer: {str(e)}"
     
-    def analyze_full(
-        self,
-        report_path: str,
-        callback=None
-    ) -> Tuple[bool, Optional[Dict], Optional[str]]:
+    # ------------------------------------------------------------------
+    # Shared retry / auth-refresh path
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _is_auth_error(error: Exception) -> bool:
+        """Check if an error means the access token expired"""
+        if getattr(error, 'status_code', None) == 401 or type(error).__name__ == 'AuthenticationError':
+            return True
+        # Errors re-raised without the openai exception type still carry the status in the text
+        error_str = str(error)
+        return "401" in error_str or "Expired" in error_str or "AuthenticationError" in error_str
+    
+    def _should_retry(self, error: Exception, retry_count: int, callback=None) -> bool:
         """
-        Perform full analysis of the report using AI with automatic token refresh on expiry.
+        Decide whether a failed attempt is retried with a fresh token.
+        
+        Returns:
+            True for an expired token with retries left, False otherwise (the traceback is printed)
+        """
+        if self._is_auth_error(error) and retry_count < self.MAX_RETRIES - 1:
+            print(f"\n⚠️  Token expired, getting new token (attempt {retry_count + 1}/{self.MAX_RETRIES})...")
+            if callback:
+                callback("Token expired, refreshing authentication...")
+            return True
+        
+        # Not an auth error or out of retries
+        import traceback
+        traceback.print_exc()
+        return False
+    
+    def _cache_scope(self):
+        """Context in which this wrapper's requests run: bypassing the response cache if use_cache is off"""
+        return bypass_llm_cache() if not self.use_cache else nullcontext()
+    
+    def _run_with_retry(self, run, failure: str, callback=None) -> Tuple[bool, Optional[object], Optional[str]]:
+        """
+        Call run(llm) with an initialized LLM, refreshing the token and retrying once if it
+        fails with an expired token. Shared by all synchronous methods.
         
         Args:
-            report_path: Path to the error report file
+            run: Function called with the LLM, returning the method's result
+            failure: Error message prefix, e.g. "Analysis failed"
             callback: Optional callback function for progress updates
             
         Returns:
-            Tuple of (success, result_dict, error_message)
+            Tuple of (success, result, error_message)
         """
         if not SUMMARIZER_AVAILABLE:
             return False, None, "Summarizer module not available"
         
-        max_retries = 2
-        retry_count = 0
-        
-        while retry_count < max_retries:
+        for retry_count in range(self.MAX_RETRIES):
             try:
-                # Initialize if not already done
+                # Initialize if not already done, with a fresh token on retry
                 if self.llm is None or retry_count > 0:
                     if callback:
                         callback("Initializing AI model...")
                     
-                    force_refresh = (retry_count > 0)  # Force refresh on retry
-                    success, error = self.initialize(force_refresh=force_refresh)
+                    success, error = self.initialize(force_refresh=(retry_count > 0))
                     if not success:
                         return False, None, error
                 
-                # Read report
-                if callback:
-                    callback("Reading report file...")
-                report_content = read_report_file(report_path)
-                
-                # Analyze with AI (callback will be used for chunk progress)
-                if callback:
-                    callback("Analyzing with AI...")
-                analysis_result = analyze_report(self.llm, report_content, callback=callback)
+                with self._cache_scope():
+                    return True, run(self.llm), None
                 
-                self.last_analysis = analysis_result
+            except Exception as e:
+                if not self._should_retry(e, retry_count, callback):
+                    return False, None, f"{failure}: {str(e)}"
                 
-                # Format result
-                result_dict = {
-                    'content': analysis_result['content'],
-                    'metadata': analysis_result.get('metadata', {}),
-                    'message_id': analysis_result.get('message_id', 'N/A'),
-                    'usage': analysis_result.get('usage', {}),
-                    'report_size': len(report_content)
-                }
+                # Reset LLM to force reinitialization with new token
+                self.llm = None
+        
+        return False, None, "Failed after retrying with fresh token"
+    
+    async def _ainitialize(self, stale_llm=None, callback=None):
+        """
+        Initialize the LLM for the async methods, once for all concurrent callers.
+        
+        Args:
+            stale_llm: LLM whose token expired; replaced with one using a fresh token
+                       unless another caller already did
+            callback: Optional callback function for progress updates
+            
+        Returns:
+            Tuple of (llm, error_message)
+        """
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        
+        async with self._init_lock:
+            if self.llm is not None and self.llm is not stale_llm:
+                return self.llm, None
+            
+            if callback:
+                callback("Initializing AI model...")
+            
+            # Token requests are blocking HTTP calls
+            success, error = await asyncio.to_thread(self.initialize, force_refresh=stale_llm is not None)
+            return (self.llm, None) if success else (None, error)
+    
+    async def _arun_with_retry(self, run, failure: str, callback=None) -> Tuple[bool, Optional[object], Optional[str]]:
+        """
+        Async counterpart of _run_with_retry: awaits run(llm), refreshing the token and
+        retrying once on an expired token. Concurrent calls share one LLM, and one token
+        refresh when it expires.
+        """
+        if not SUMMARIZER_AVAILABLE:
+            return False, None, "Summarizer module not available"
+        
+        llm = self.llm
+        for retry_count in range(self.MAX_RETRIES):
+            try:
+                if llm is None or retry_count > 0:
+                    llm, error = await self._ainitialize(stale_llm=llm, callback=callback)
+                    if llm is None:
+                        return False, None, error
                 
-                return True, result_dict, None
+                with self._cache_scope():
+                    return True, await run(llm), None
                 
             except Exception as e:
-                error_str = str(e)
-                
-                # Check if it's an authentication error (token expired)
-                if ("401" in error_str or "Expired" in error_str or "AuthenticationError" in error_str) and retry_count < max_retries - 1:
-                    print(f"\n⚠️  Token expired, getting new token (attempt {retry_count + 1}/{max_retries})...")
-                    if callback:
-                        callback("Token expired, refreshing authentication...")
-                    
-                    # Reset LLM to force reinitialization with new token
-                    self.llm = None
-                    retry_count += 1
-                    continue
-                else:
-                    # Not an auth error or out of retries
-                    import traceback
-                    traceback.print_exc()
-                    return False, None, f"Analysis failed: {str(e)}"
+                if not self._should_retry(e, retry_count, callback):
+                    return False, None, f"{failure}: {str(e)}"
         
         return False, None, "Failed after retrying with fresh token"
     
+    # ------------------------------------------------------------------
+    # Synchronous API
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _format_analysis(analysis_result: Dict, report_content: str) -> Dict:
+        """Result dict of analyze_full / analyze_quick"""
+        return {
+            'content': analysis_result['content'],
+            'metadata': analysis_result.get('metadata', {}),
+            'message_id': analysis_result.get('message_id', 'N/A'),
+            'usage': analysis_result.get('usage', {}),
+            'preprocessing': analysis_result.get('preprocessing'),
+            'report_size': len(report_content)
+        }
+    
+    @staticmethod
+    def _format_comparison(comparison_result: Dict, build_names: List[str]) -> Dict:
+        """Result dict of compare_multiple"""
+        return {
+            'content': comparison_result['content'],
+            'metadata': comparison_result.get('metadata', {}),
+            'message_id': comparison_result.get('message_id', 'N/A'),
+            'usage': comparison_result.get('usage', {}),
+            'builds_compared': build_names,
+            'diff': comparison_result.get('diff'),
+            'matrix': comparison_result.get('matrix')
+        }
+    
+    def analyze_full(
+        self,
+        report_path: str,
+        callback=None
+    ) -> Tuple[bool, Optional[Dict], Optional[str]]:
+        """
+        Perform full analysis of the report using AI with automatic token refresh on expiry.
+        
+        Args:
+            report_path: Path to the error report file
+            callback: Optional callback function for progress updates
+            
+        Returns:
+            Tuple of (success, result_dict, error_message)
+        """
+        def run(llm):
+            # Read report
+            if callback:
+                callback("Reading report file...")
+            report_content = read_report_file(report_path)
+            
+            # Analyze with AI (callback will be used for chunk progress)
+            if callback:
+                callback("Analyzing with AI...")
+            analysis_result = analyze_report(llm, report_content, callback=callback)
+            
+            self.last_analysis = analysis_result
+            return self._format_analysis(analysis_result, report_content)
+        
+        return self._run_with_retry(run, "Analysis failed", callback)
+    
     def analyze_quick(
         self,
         report_path: str,
@@ -166,67 +307,21 @@ class SummarizerWrapper:
         Returns:
             Tuple of (success, result_dict, error_message)
         """
-        if not SUMMARIZER_AVAILABLE:
-            return False, None, "Summarizer module not available"
-        
-        max_retries = 2
-        retry_count = 0
-        
-        while retry_count < max_retries:
-            try:
-                # Initialize if not already done
-                if self.llm is None or retry_count > 0:
-                    if callback:
-                        callback("Initializing AI model...")
-                    
-                    force_refresh = (retry_count > 0)  # Force refresh on retry
-                    success, error = self.initialize(force_refresh=force_refresh)
-                    if not success:
-                        return False, None, error
-                
-                # Read report
-                if callback:
-                    callback("Reading report file...")
-                report_content = read_report_file(report_path)
-                
-                # Quick summarize with AI (callback will be used for chunk progress)
-                if callback:
-                    callback("Generating quick AI summary...")
-                summary_result = quick_summarize_report(self.llm, report_content, callback=callback)
-                
-                self.last_analysis = summary_result
-                
-                # Format result
-                result_dict = {
-                    'content': summary_result['content'],
-                    'metadata': summary_result.get('metadata', {}),
-                    'message_id': summary_result.get('message_id', 'N/A'),
-                    'usage': summary_result.get('usage', {}),
-                    'report_size': len(report_content)
-                }
-                
-                return True, result_dict, None
-                
-            except Exception as e:
-                error_str = str(e)
-                
-                # Check if it's an authentication error (token expired)
-                if ("401" in error_str or "Expired" in error_str or "AuthenticationError" in error_str) and retry_count < max_retries - 1:
-                    print(f"\n⚠️  Token expired, getting new token (attempt {retry_count + 1}/{max_retries})...")
-                    if callback:
-                        callback("Token expired, refreshing authentication...")
-                    
-                    # Reset LLM to force reinitialization with new token
-                    self.llm = None
-                    retry_count += 1
-                    continue
-                else:
-                    # Not an auth error or out of retries
-                    import traceback
-                    traceback.print_exc()
-                    return False, None, f"Quick analysis failed: {str(e)}"
+        def run(llm):
+            # Read report
+            if callback:
+                callback("Reading report file...")
+            report_content = read_report_file(report_path)
+            
+            # Quick summarize with AI (callback will be used for chunk progress)
+            if callback:
+                callback("Generating quick AI summary...")
+            summary_result = quick_summarize_report(llm, report_content, callback=callback)
+            
+            self.last_analysis = summary_result
+            return self._format_analysis(summary_result, report_content)
         
-        return False, None, "Failed after retrying with fresh token"
+        return self._run_with_retry(run, "Quick summary failed", callback)
     
     def compare_multiple(
         self,
@@ -236,92 +331,69 @@ class SummarizerWrapper:
         """
         Compare multiple test reports using AI analysis.
         
+        Two reports are compared through their test diff; three or more in one pass
+        through a test × build status matrix (see compare_builds).
+        
         Args:
-            report_paths: List of tuples [(report_path, build_name), ...]
+            report_paths: List of tuples [(report_path, build_name), ...], oldest build first
             callback: Optional callback function for progress updates
             
         Returns:
             Tuple of (success, result_dict, error_message)
         """
-        if not SUMMARIZER_AVAILABLE:
-            return False, None, "Summarizer module not available"
-        
         if len(report_paths) < 2:
             return False, None, "Need at least 2 reports to compare"
         
-        # For now, compare first two reports
-        # Can be extended to support more than 2 in the future
-        report1_path, build1_name = report_paths[0]
-        report2_path, build2_name = report_paths[1]
-        
-        max_retries = 2
-        retry_count = 0
-        
-        while retry_count < max_retries:
-            try:
-                # Initialize if not already done
-                if self.llm is None or retry_count > 0:
-                    if callback:
-                        callback("Initializing AI model...")
-                    
-                    force_refresh = (retry_count > 0)
-                    success, error = self.initialize(force_refresh=force_refresh)
-                    if not success:
-                        return False, None, error
-                
-                # Read both reports
+        if len(report_paths) > 2:
+            def run(llm):
                 if callback:
-                    callback(f"Reading reports for {build1_name} and {build2_name}...")
+                    callback(f"Reading reports for {len(report_paths)} builds...")
+                builds = [(build_name, read_report_file(report_path), read_structured_report(report_path))
+                          for report_path, build_name in report_paths]
                 
-                report1_content = read_report_file(report1_path)
-                report2_content = read_report_file(report2_path)
-                
-                # Compare with AI
                 if callback:
-                    callback("Analyzing differences and similarities (this may take 30-60 seconds)...")
-                
-                comparison_result = compare_reports(
-                    self.llm,
-                    report1_content,
-                    report2_content,
-                    build1_name,
-                    build2_name,
-                    callback=callback  # Pass callback for chunking progress
-                )
+                    callback("Analyzing trends across builds (this may take 30-60 seconds)...")
+                comparison_result = compare_builds(llm, builds, callback=callback)
                 
                 self.last_analysis = comparison_result
-                
-                # Format result
-                result_dict = {
-                    'content': comparison_result['content'],
-                    'metadata': comparison_result.get('metadata', {}),
-                    'message_id': comparison_result.get('message_id', 'N/A'),
-                    'usage': comparison_result.get('usage', {}),
-                    'builds_compared': [build1_name, build2_name]
-                }
-                
-                return True, result_dict, None
-                
-            except Exception as e:
-                error_str = str(e)
-                
-                # Check if it's an authentication error (token expired)
-                if ("401" in error_str or "Expired" in error_str or "AuthenticationError" in error_str) and retry_count < max_retries - 1:
-                    print(f"\n⚠️  Token expired, getting new token (attempt {retry_count + 1}/{max_retries})...")
-                    if callback:
-                        callback("Token expired, refreshing authentication...")
-                    
-                    # Reset LLM to force reinitialization with new token
-                    self.llm = None
-                    retry_count += 1
-                    continue
-                else:
-                    # Not an auth error or out of retries
-                    import traceback
-                    traceback.print_exc()
-                    return False, None, f"Comparison failed: {str(e)}"
+                return self._format_comparison(comparison_result, [build_name for _, build_name in report_paths])
+            
+            return self._run_with_retry(run, "Comparison failed", callback)
         
-        return False, None, "Failed after retrying with fresh token"
+        report1_path, build1_name = report_paths[0]
+        report2_path, build2_name = report_paths[1]
+        
+        def run(llm):
+            # Read both reports
+            if callback:
+                callback(f"Reading reports for {build1_name} and {build2_name}...")
+            
+            report1_content = read_report_file(report1_path)
+            report2_content = read_report_file(report2_path)
+            
+            # Structured reports written alongside by the analyzer, if present
+            report1_data = read_structured_report(report1_path)
+            report2_data = read_structured_report(report2_path)
+            
+            # Compare with AI
+            if callback:
+                callback("Analyzing differences and similarities (this may take 30-60 seconds)...")
+            
+            comparison_result = compare_reports(
+                llm,
+                report1_content,
+                report2_content,
+                build1_name,
+                build2_name,
+                callback=callback,  # Pass callback for chunking progress
+                report1_data=report1_data,
+                report2_data=report2_data
+            )
+            
+            self.last_analysis = comparison_result
+            return self._format_comparison(comparison_result, [build1_name, build2_name])
+        
+        return self._run_with_retry(run, "Comparison failed", callback)
     
     def chat(
         self,
@@ -344,58 +416,15 @@ class SummarizerWrapper:
         Returns:
             Tuple of (success, ai_response, error_message)
         """
-        if not SUMMARIZER_AVAILABLE:
-            return False, None, "Summarizer module not available"
-        
-        max_retries = 2
-        retry_count = 0
-        
-        while retry_count < max_retries:
-            try:
-                # Initialize if not already done
-                if self.llm is None or retry_count > 0:
-                    if callback:
-                        callback("Initializing AI model...")
-                    
-                    force_refresh = (retry_count > 0)
-                    success, error = self.initialize(force_refresh=force_refresh)
-                    if not success:
-                        return False, None, error
-                
-                # Get AI response
-                if callback:
-                    callback("Getting AI response...")
-                
-                chat_result = chat_with_report(
-                    self.llm,
-                    report_content,
-                    ai_summary,
-                    chat_history,
-                    user_question
-                )
-                
-                return True, chat_result['content'], None
-                
-            except Exception as e:
-                error_str = str(e)
-                
-                # Check if it's an authentication error (token expired)
-                if ("401" in error_str or "Expired" in error_str or "AuthenticationError" in error_str) and retry_count < max_retries - 1:
-                    print(f"\n⚠️  Token expired, getting new token (attempt {retry_count + 1}/{max_retries})...")
-                    if callback:
-                        callback("Token expired, refreshing authentication...")
-                    
-                    # Reset LLM to force reinitialization with new token
-                    self.llm = None
-                    retry_count += 1
-                    continue
-                else:
-                    # Not an auth error or out of retries
-                    import traceback
-                    traceback.print_exc()
-                    return False, None, f"Chat failed: {str(e)}"
+        def run(llm):
+            # Get AI response
+            if callback:
+                callback("Getting AI response...")
+            
+            chat_result = chat_with_report(llm, report_content, ai_summary, chat_history, user_question)
+            return chat_result['content']
         
-        return False, None, "Failed after retrying with fresh token"
+        return self._run_with_retry(run, "Chat failed", callback)
     
     def chat_comparison(
         self,
@@ -424,61 +453,358 @@ class SummarizerWrapper:
         Returns:
             Tuple of (success, ai_response, error_message)
         """
-        if not SUMMARIZER_AVAILABLE:
-            return False, None, "Summarizer module not available"
+        def run(llm):
+            # Get AI response
+            if callback:
+                callback("Getting AI response...")
+            
+            chat_result = chat_with_comparison(llm, report1_content, report2_content, comparison_summary,
+                                               build1_name, build2_name, chat_history, user_question)
+            return chat_result['content']
         
-        max_retries = 2
-        retry_count = 0
+        return self._run_with_retry(run, "Comparison chat failed", callback)
+    
+    def chat_builds(
+        self,
+        builds: List[Tuple[str, str]],
+        comparison_summary: str,
+        chat_history: List[Dict],
+        user_question: str,
+        callback=None
+    ) -> Tuple[bool, Optional[str], Optional[str]]:
+        """
+        Chat with AI about a comparison of two or more test reports (see compare_multiple).
         
-        while retry_count < max_retries:
-            try:
-                # Initialize if not already done
-                if self.llm is None or retry_count > 0:
-                    if callback:
-                        callback("Initializing AI model...")
-                    
-                    force_refresh = (retry_count > 0)
-                    success, error = self.initialize(force_refresh=force_refresh)
-                    if not success:
-                        return False, None, error
-                
-                # Get AI response
-                if callback:
-                    callback("Getting AI response...")
-                
-                chat_result = chat_with_comparison(
-                    self.llm,
-                    report1_content,
-                    report2_content,
-                    comparison_summary,
-                    build1_name,
-                    build2_name,
-                    chat_history,
-                    user_question
+        Args:
+            builds: List of tuples [(build_name, report_content), ...], in the order compared
+            comparison_summary: The AI-generated comparison summary
+            chat_history: List of previous chat messages
+            user_question: The user's current question
+            callback: Optional callback function for progress updates
+            
+        Returns:
+            Tuple of (success, ai_response, error_message)
+        """
+        def run(llm):
+            if callback:
+                callback("Getting AI response...")
+            
+            chat_result = chat_with_builds(llm, builds, comparison_summary, chat_history, user_question)
+            return chat_result['content']
+        
+        return self._run_with_retry(run, "Comparison chat failed", callback)
+    
+    # ------------------------------------------------------------------
+    # Async API: the same methods on ainvoke, for running many analyses
+    # concurrently on one event loop (e.g. from FastAPI or a batch driver)
+    # ------------------------------------------------------------------
+    
+    async def aanalyze_full(self, report_path: str, callback=None) -> Tuple[bool, Optional[Dict], Optional[str]]:
+        """Async variant of analyze_full"""
+        async def run(llm):
+            report_content = await asyncio.to_thread(read_report_file, report_path)
+            analysis_result = await aanalyze_report(llm, report_content, callback=callback)
+            self.last_analysis = analysis_result
+            return self._format_analysis(analysis_result, report_content)
+        
+        return await self._arun_with_retry(run, "Analysis failed", callback)
+    
+    async def aanalyze_quick(self, report_path: str, callback=None) -> Tuple[bool, Optional[Dict], Optional[str]]:
+        """Async variant of analyze_quick"""
+        async def run(llm):
+            report_content = await asyncio.to_thread(read_report_file, report_path)
+            summary_result = await aquick_summarize_report(llm, report_content, callback=callback)
+            self.last_analysis = summary_result
+            return self._format_analysis(summary_result, report_content)
+        
+        return await self._arun_with_retry(run, "Quick summary failed", callback)
+    
+    async def acompare_multiple(
+        self,
+        report_paths: List[Tuple[str, str]],
+        callback=None
+    ) -> Tuple[bool, Optional[Dict], Optional[str]]:
+        """Async variant of compare_multiple"""
+        if len(report_paths) < 2:
+            return False, None, "Need at least 2 reports to compare"
+        
+        if len(report_paths) > 2:
+            async def run(llm):
+                contents, structured = await asyncio.gather(
+                    asyncio.gather(*(asyncio.to_thread(read_report_file, path) for path, _ in report_paths)),
+                    asyncio.gather(*(asyncio.to_thread(read_structured_report, path) for path, _ in report_paths))
                 )
+                build_names = [build_name for _, build_name in report_paths]
+                comparison_result = await acompare_builds(llm, list(zip(build_names, contents, structured)),
+                                                          callback=callback)
+                self.last_analysis = comparison_result
+                return self._format_comparison(comparison_result, build_names)
+            
+            return await self._arun_with_retry(run, "Comparison failed", callback)
+        
+        report1_path, build1_name = report_paths[0]
+        report2_path, build2_name = report_paths[1]
+        
+        async def run(llm):
+            report1_content, report2_content, report1_data, report2_data = await asyncio.gather(
+                asyncio.to_thread(read_report_file, report1_path),
+                asyncio.to_thread(read_report_file, report2_path),
+                asyncio.to_thread(read_structured_report, report1_path),
+                asyncio.to_thread(read_structured_report, report2_path)
+            )
+            comparison_result = await acompare_reports(llm, report1_content, report2_content, build1_name,
+                                                       build2_name, callback=callback,
+                                                       report1_data=report1_data, report2_data=report2_data)
+            self.last_analysis = comparison_result
+            return self._format_comparison(comparison_result, [build1_name, build2_name])
+        
+        return await self._arun_with_retry(run, "Comparison failed", callback)
+    
+    async def achat(
+        self,
+        report_content: str,
+        ai_summary: str,
+        chat_history: List[Dict],
+        user_question: str,
+        callback=None
+    ) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Async variant of chat"""
+        async def run(llm):
+            chat_result = await achat_with_report(llm, report_content, ai_summary, chat_history, user_question)
+            return chat_result['content']
+        
+        return await self._arun_with_retry(run, "Chat failed", callback)
+    
+    async def achat_comparison(
+        self,
+        report1_content: str,
+        report2_content: str,
+        comparison_summary: str,
+        build1_name: str,
+        build2_name: str,
+        chat_history: List[Dict],
+        user_question: str,
+        callback=None
+    ) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Async variant of chat_comparison"""
+        async def run(llm):
+            chat_result = await achat_with_comparison(llm, report1_content, report2_content, comparison_summary,
+                                                      build1_name, build2_name, chat_history, user_question)
+            return chat_result['content']
+        
+        return await self._arun_with_retry(run, "Comparison chat failed", callback)
+    
+    async def achat_builds(
+        self,
+        builds: List[Tuple[str, str]],
+        comparison_summary: str,
+        chat_history: List[Dict],
+        user_question: str,
+        callback=None
+    ) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Async variant of chat_builds"""
+        async def run(llm):
+            chat_result = await achat_with_builds(llm, builds, comparison_summary, chat_history, user_question)
+            return chat_result['content']
+        
+        return await self._arun_with_retry(run, "Comparison chat failed", callback)
+    
+    # ------------------------------------------------------------------
+    # Streaming API
+    # ------------------------------------------------------------------
+    
+    def _stream_with_auth_retry(self, start_stream, callback=None) -> Iterator[str]:
+        """
+        Yield the text of the LLMStream returned by start_stream(), refreshing the token
+        and starting over if the request fails with an expired token before any text arrived.
+        
+        The result dict of the finished stream is stored in self.last_stream_result.
+        """
+        self.last_stream_result = None
+        
+        for retry_count in range(self.MAX_RETRIES):
+            # Initialize if not already done
+            if self.llm is None or retry_count > 0:
+                if callback:
+                    callback("Initializing AI model...")
                 
-                return True, chat_result['content'], None
-                
+                success, error = self.initialize(force_refresh=(retry_count > 0))
+                if not success:
+                    raise RuntimeError(error)
+            
+            started = False
+            try:
+                # The stream resolves its cache when created
+                with self._cache_scope():
+                    stream = start_stream()
+                for text in stream:
+                    started = True
+                    yield text
+                self.last_stream_result = stream.result
+                return
             except Exception as e:
-                error_str = str(e)
+                if started or not self._should_retry(e, retry_count, callback):
+                    raise
                 
-                # Check if it's an authentication error (token expired)
-                if ("401" in error_str or "Expired" in error_str or "AuthenticationError" in error_str) and retry_count < max_retries - 1:
-                    print(f"\n⚠️  Token expired, getting new token (attempt {retry_count + 1}/{max_retries})...")
-                    if callback:
-                        callback("Token expired, refreshing authentication...")
-                    
-                    # Reset LLM to force reinitialization with new token
-                    self.llm = None
-                    retry_count += 1
-                    continue
-                else:
-                    # Not an auth error or out of retries
-                    import traceback
-                    traceback.print_exc()
-                    return False, None, f"Comparison chat failed: {str(e)}"
+                # Reset LLM to force reinitialization with new token
+                self.llm = None
+    
+    def _stream_analysis(self, report_path: str, quick: bool, callback=None) -> Iterator[str]:
+        """Stream a full analysis or quick summary of the report, see stream_analyze_full"""
+        if not SUMMARIZER_AVAILABLE:
+            raise RuntimeError("Summarizer module not available")
         
-        return False, None, "Failed after retrying with fresh token"
+        # Read report
+        if callback:
+            callback("Reading report file...")
+        report_content = read_report_file(report_path)
+        
+        yield from self._stream_with_auth_retry(
+            lambda: stream_report_analysis(self.llm, report_content, quick=quick, callback=callback),
+            callback=callback
+        )
+        
+        analysis_result = self.last_stream_result
+        self.last_analysis = analysis_result
+        
+        # Format result like analyze_full / analyze_quick
+        self.last_stream_result = {
+            'content': analysis_result['content'],
+            'metadata': analysis_result.get('metadata', {}),
+            'message_id': analysis_result.get('message_id', 'N/A'),
+            'usage': analysis_result.get('usage', {}),
+            'preprocessing': analysis_result.get('preprocessing'),
+            'report_size': len(report_content)
+        }
+    
+    def stream_analyze_full(self, report_path: str, callback=None) -> Iterator[str]:
+        """
+        Streaming variant of analyze_full: yields the analysis text as it is generated.
+        
+        Usage:
+            text = st.write_stream(summarizer.stream_analyze_full(report_path))
+            result_dict = summarizer.last_stream_result
+        
+        Args:
+            report_path: Path to the error report file
+            callback: Optional callback function for progress updates
+            
+        Yields:
+            Pieces of the analysis text; afterwards self.last_stream_result holds the
+            same result dict analyze_full returns. Errors are raised.
+        """
+        return self._stream_analysis(report_path, quick=False, callback=callback)
+    
+    def stream_analyze_quick(self, report_path: str, callback=None) -> Iterator[str]:
+        """
+        Streaming variant of analyze_quick, see stream_analyze_full.
+        
+        Args:
+            report_path: Path to the error report file
+            callback: Optional callback function for progress updates
+            
+        Yields:
+            Pieces of the summary text; afterwards self.last_stream_result holds the
+            same result dict analyze_quick returns. Errors are raised.
+        """
+        return self._stream_analysis(report_path, quick=True, callback=callback)
+    
+    def stream_chat(
+        self,
+        report_content: str,
+        ai_summary: str,
+        chat_history: List[Dict],
+        user_question: str,
+        callback=None
+    ) -> Iterator[str]:
+        """
+        Streaming variant of chat: yields the answer as it is generated.
+        
+        Args:
+            report_content: The full test report content
+            ai_summary: The AI-generated summary
+            chat_history: List of previous chat messages [{"role": "user/assistant", "content": "..."}]
+            user_question: The user's current question
+            callback: Optional callback function for progress updates
+            
+        Yields:
+            Pieces of the answer; afterwards self.last_stream_result holds the chat
+            response dict (content, metadata, message_id, usage). Errors are raised.
+        """
+        if not SUMMARIZER_AVAILABLE:
+            raise RuntimeError("Summarizer module not available")
+        
+        return self._stream_with_auth_retry(
+            lambda: stream_chat_with_report(self.llm, report_content, ai_summary, chat_history, user_question),
+            callback=callback
+        )
+    
+    def stream_chat_comparison(
+        self,
+        report1_content: str,
+        report2_content: str,
+        comparison_summary: str,
+        build1_name: str,
+        build2_name: str,
+        chat_history: List[Dict],
+        user_question: str,
+        callback=None
+    ) -> Iterator[str]:
+        """
+        Streaming variant of chat_comparison, see stream_chat.
+        
+        Args:
+            report1_content: Content of the first test report
+            report2_content: Content of the second test report
+            comparison_summary: The AI-generated comparison summary
+            build1_name: Name of the first build
+            build2_name: Name of the second build
+            chat_history: List of previous chat messages
+            user_question: The user's current question
+            callback: Optional callback function for progress updates
+            
+        Yields:
+            Pieces of the answer; afterwards self.last_stream_result holds the chat
+            response dict. Errors are raised.
+        """
+        if not SUMMARIZER_AVAILABLE:
+            raise RuntimeError("Summarizer module not available")
+        
+        return self._stream_with_auth_retry(
+            lambda: stream_chat_with_comparison(self.llm, report1_content, report2_content, comparison_summary,
+                                                build1_name, build2_name, chat_history, user_question),
+            callback=callback
+        )
+    
+    def stream_chat_builds(
+        self,
+        builds: List[Tuple[str, str]],
+        comparison_summary: str,
+        chat_history: List[Dict],
+        user_question: str,
+        callback=None
+    ) -> Iterator[str]:
+        """
+        Streaming variant of chat_builds, see stream_chat.
+        
+        Args:
+            builds: List of tuples [(build_name, report_content), ...], in the order compared
+            comparison_summary: The AI-generated comparison summary
+            chat_history: List of previous chat messages
+            user_question: The user's current question
+            callback: Optional callback function for progress updates
+            
+        Yields:
+            Pieces of the answer; afterwards self.last_stream_result holds the chat
+            response dict. Errors are raised.
+        """
+        if not SUMMARIZER_AVAILABLE:
+            raise RuntimeError("Summarizer module not available")
+        
+        return self._stream_with_auth_retry(
+            lambda: stream_chat_with_builds(self.llm, builds, comparison_summary, chat_history, user_question),
+            callback=callback
+        )
     
     def get_token_usage(self) -> Optional[Dict]:
         """
@@ -490,4 +816,39 @@ class SummarizerWrapper:
         if self.last_analysis and 'usage' in self.last_analysis:
             return self.last_analysis['usage']
         return None
-
+    
+    def get_cache_stats(self) -> Optional[Dict]:
+        """
+        Get LLM response cache counters.
+        
+        Returns:
+            Dict with hits, misses, expired, evictions, hit_rate and size_bytes, or None if the cache is disabled
+        """
+        if not SUMMARIZER_AVAILABLE:
+            return None
+        cache = get_llm_cache()
+        return cache.stats() if cache else None
+    
+    def get_rate_limit_stats(self) -> Optional[Dict]:
+        """
+        Get counters of the shared LLM rate limiter.
+        
+        Returns:
+            Dict with the configured limits, requests, throttles, transient_errors, retries,
+            waits, wait_seconds and backoff_seconds, or None if the summarizer is unavailable
+        """
+        if not SUMMARIZER_AVAILABLE:
+            return None
+        return get_rate_limiter().stats()
+    
+    def get_stage_stats(self) -> Optional[Dict]:
+        """
+        Get LLM request counts and latency per pipeline stage (map, reduce, summary_compare, chat).
+        
+        Returns:
+            Dict of stage -> deployments, requests, cached, seconds, avg_seconds and max_seconds,
+            or None if the summarizer is unavailable
+        """
+        if not SUMMARIZER_AVAILABLE:
+            return None
+        return get_stage_stats()